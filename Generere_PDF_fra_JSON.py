@@ -1,35 +1,27 @@
-import json
+import io
 import sys
 import os
+import pickle
 import shutil
-import pandas as pd
+import zipfile
+import zlib
 from fpdf import FPDF
 from datetime import datetime
-from Hjelpeskript.kommune_til_fylke import finn_fylke
-
-# Filstier
-# Use the uploaded JSON file passed from Streamlit
-if len(sys.argv) > 1:
-    json_file_path = sys.argv[1]
-else:
-    raise FileNotFoundError("No JSON file provided to the script.")
+from Hjelpeskript.produktprioritet import finn_produktbeskrivelse
+from Hjelpeskript.json_innlesing import i_blokker
+from Hjelpeskript.flere_eksporter import finn_eksportfiler, les_eksporter
+from Hjelpeskript.ordreberikelse import berik_ordrer
+from Hjelpeskript.arbeidsomrade import Arbeidsomrade
 
+# Standard mappe for PDF-filene når scriptet kjøres fra kommandolinjen
 output_folder = "generated_pdfs/"
 
-# Slett eksisterende innhold i mappen hvis den finnes
-if os.path.exists(output_folder):
-    for filename in os.listdir(output_folder):
-        file_path = os.path.join(output_folder, filename)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                os.unlink(file_path)  # Slett fil eller symbolsk lenke
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)  # Slett mappe og alt innhold
-        except Exception as e:
-            print(f'Feil ved sletting av {file_path}: {e}')
-
-# Opprett mappe for PDF-filer hvis den ikke finnes
-os.makedirs(output_folder, exist_ok=True)
+# Antall work orders som berikes samlet når eksporten leses som en strøm
+BLOKKSTORRELSE = 500
+
+# Står i toppteksten til PDF-en ferdigstilles, og byttes da ut med tidspunktet for kjøringen,
+# se ferdigstill_pdf. Et utkast fra en tidligere kjøring får dermed riktig tidspunkt.
+TIDSPUNKT_ALIAS = "{tidspunkt}"
 
 def format_date(iso_string):
     """Hjelpefunksjon for å formattere ISO8601-datoer til f.eks. DD.MM.YYYY."""
@@ -69,15 +61,7 @@ def start_section_if_room(pdf, title, needed_height):
 
 # Finne Produktbeskrivelse fra ID
 def find_product_description(produkt_id):
-    df = pd.read_excel("Datafiler/WOC_Prioritering_Produktkategorier.xlsx", engine="openpyxl")
-
-    resultat = df[df["Produktkode"].str.lower() == produkt_id.lower()]
-
-    if not resultat.empty:
-        return resultat["Produkt"].values[0]
-    else:
-        print(f"Fant ikke produktbeskrivelse for: {produkt_id}")
-        return None
+    return finn_produktbeskrivelse(produkt_id)
 
 
 class CustomPDF(FPDF):
@@ -86,11 +70,10 @@ class CustomPDF(FPDF):
         self.set_fill_color(230, 230, 230)
         self.rect(0, 0, self.w, 15, 'F')
 
-        # Skriv dagens dato og klokkeslett (venstre hjørne)
+        # Skriv dato og klokkeslett for kjøringen (venstre hjørne), se ferdigstill_pdf
         self.set_xy(5, 5)  # x=5, y=5 for litt margin
-        now_str = datetime.now().strftime("%d.%m.%Y, %H:%M")
         self.set_font("Arial", "", 10)
-        self.cell(0, 0, now_str, ln=0, align="L")
+        self.cell(0, 0, TIDSPUNKT_ALIAS, ln=0, align="L")
 
         # Skriv overskrift (midtstilt)
         self.set_y(3)
@@ -111,55 +94,48 @@ class CustomPDF(FPDF):
         self.set_fill_color(200, 200, 200)  # litt mørkere grå
         self.cell(0, 8, title, ln=True, align="L", fill=True)
 
-# Les JSON-filen
-with open(json_file_path, "r", encoding="utf-8") as file:
-    data = json.load(file)
+def lag_pdf(entry, tidspunkt=None):
+    """
+    Lager PDF for én work order.
 
-# Generer PDF-er basert på JSON-data
-for entry in data:
+    :param entry: Dictionary som inneholder ordredata.
+    :param tidspunkt: Tidspunktet i toppteksten. Standard er nå.
+    :return: Tuple med (relativ filsti, PDF som bytes), eller None hvis ordren hoppes over.
+             Filstien er på formen '<fylke>/<orderType>/<ordrenummer> <adresse>.pdf'.
+    """
+    ordrer = berik_ordrer([entry])
+    if not ordrer:
+        return None
+    return lag_pdf_for_ordre(ordrer[0], tidspunkt)
 
-    # Hopp over rader hvor supplier.contactPersons ikke er tom
-    if entry.get("supplier", {}).get("contactPersons"):
-        continue
-    elif not entry.get("wocOrderStatus", {}).lower() in ['accepted', 'received', 'appointed']:
-        continue
 
-    ### Bygg en filnavn-vennlig tittel
-    client_order_id = entry["clientOrderId"]["referenceNumber"]
-    short_street = ""
-    short_house = ""
-    address_info = entry.get("workOrderAddress", [])
-    if address_info:
-        # Tar første "workOrderAddress" hvis den finnes
-        street_data = address_info[0]["streetAddress"]
-        if street_data:
-            short_street = street_data.get("streetName", "")
-            short_house = street_data.get("houseNumber", "")
-            house_char = street_data.get("houseChar", "")
-            if house_char:
-                short_house = short_house+house_char
-            adresse = f"{short_street} {short_house}"
-            municipality_name = street_data.get("municipalityName")
-        else:
-            work_order_address = entry.get("workOrderAddress", [{}])[0]
-            cadastral_unit = work_order_address.get('cadastralUnit', {})
-            municipality_name = cadastral_unit.get('municipalityName')
-            cadastral_unit_number = cadastral_unit.get('cadastralUnitNumber')
-            property_unit_number = cadastral_unit.get('propertyUnitNumber')
-            adresse = f"Gnr. {cadastral_unit_number} Bnr. {property_unit_number}"
-    else:
-        adresse = "finner ikke addresse"
-        municipality_name = "Mangler info"
+def lag_pdf_for_ordre(ordre, tidspunkt=None):
+    """
+    Lager PDF for én ordre fra den felles berikelsen.
+
+    :param ordre: Beriket ordre fra berik_ordrer.
+    :param tidspunkt: Tidspunktet i toppteksten. Standard er nå.
+    :return: Tuple med (relativ filsti, PDF som bytes).
+    """
+    return ferdigstill_pdf(*lag_pdf_dokument(ordre), tidspunkt)
+
+
+def lag_pdf_dokument(ordre):
+    """
+    Legger ut PDF-en for én ordre, uten tidspunktet i toppteksten.
+
+    :param ordre: Beriket ordre fra berik_ordrer.
+    :return: Tuple med (relativ filsti, CustomPDF). Lag filen med ferdigstill_pdf.
+    """
+    entry = ordre["entry"]
 
     ### Lage filsti
-    fylke = finn_fylke(municipality_name)
+    client_order_id = entry["clientOrderId"]["referenceNumber"]
+    fylke = ordre["fylke"]
     order_type = entry.get("orderType", "")
     print(order_type)
-    output_folder = f"generated_pdfs/{fylke}/{order_type}"
-    os.makedirs(output_folder, exist_ok=True)
-
-    pdf_filename = f"{client_order_id} {adresse}.pdf"
-    pdf_filepath = os.path.join(output_folder, pdf_filename)
+    pdf_filename = f"{client_order_id} {ordre['kort_adresse']}.pdf"
+    pdf_filepath = os.path.join(f"{fylke}", f"{order_type}", pdf_filename)
 
     pdf = CustomPDF()
     pdf.alias_nb_pages()
@@ -187,23 +163,9 @@ for entry in data:
     if not customer_category:
         customer_category = "-"
 
-    # 4) CircuitId: finn resourceId i serviceDetails med resourceType="CircuitId"
-    circuit_id = ""
-    customer_id = ""
-    sd_list = entry["detailedOrderInformation"].get("serviceDetails", [])
-
-    if sd_list:
-        for sd in sd_list:
-            if sd.get("resourceType") == "CircuitId":
-                circuit_id = sd.get("resourceId", "")
-                break
-
-        # 5) CustomerId: finn resourceId i serviceDetails med resourceType="CustomerId"
-        customer_id = ""
-        for sd in sd_list:
-            if sd.get("resourceType") == "CustomerId":
-                customer_id = sd.get("resourceId", "")
-                break
+    # 4) CircuitId og 5) CustomerId fra serviceDetails
+    circuit_id = ordre["circuit_id"]
+    customer_id = ordre["customer_id"]
 
     # 6) OrderType
     order_type = entry.get("orderType", "")
@@ -332,6 +294,9 @@ for entry in data:
     # 3) WorkOrder Address (gateadresse, poststed osv.)
     pdf.section_title("WorkOrder Address")
     pdf.ln(2)
+    # Gateadressen fra workOrderAddress, med mindre user1 har en egen adresse
+    address_info = entry.get("workOrderAddress", [])
+    street_data = address_info[0].get("streetAddress") if address_info else None
     user1 = entry.get("detailedOrderInformation", {}).get("user1", {})
     if user1:
         address_data = user1.get("address", {})
@@ -348,6 +313,8 @@ for entry in data:
 
         pdf.set_font("Arial", "", 10)
 
+        org_id = "-"
+        full_name = ""
         if user1:
             org_id = user1.get("organizationId", "-")
             full_name = user1.get("fullName", "")
@@ -807,10 +774,142 @@ for entry in data:
     # ----------------------------------------------------
 
 
-    ### Lagre PDF
-    pdf.output(pdf_filepath)
+    return pdf_filepath, pdf
+
+
+def ferdigstill_pdf(pdf_filepath, pdf, tidspunkt=None):
+    """
+    Setter inn tidspunktet i toppteksten og lager PDF-filen.
+
+    :param pdf_filepath: Relativ filsti fra lag_pdf_dokument.
+    :param pdf: CustomPDF fra lag_pdf_dokument.
+    :param tidspunkt: Tidspunktet for kjøringen. Standard er nå.
+    :return: Tuple med (relativ filsti, PDF som bytes).
+    """
+    tekst = (tidspunkt or datetime.now()).strftime("%d.%m.%Y, %H:%M")
+    for side in pdf.pages:
+        pdf.pages[side] = pdf.pages[side].replace(TIDSPUNKT_ALIAS, tekst)
+    # FPDF gir en latin-1-streng med dest="S"
+    return pdf_filepath, pdf.output(dest="S").encode("latin-1")
+
+
+def lag_pdf_utkast(pdf_filepath, pdf):
+    """
+    Pakker en PDF fra lag_pdf_dokument som bytes, så den kan lagres og ferdigstilles i en senere kjøring.
+
+    :param pdf_filepath: Relativ filsti fra lag_pdf_dokument.
+    :param pdf: CustomPDF fra lag_pdf_dokument, før ferdigstill_pdf.
+    :return: Tuple med (relativ filsti, utkast som bytes).
+    """
+    return pdf_filepath, zlib.compress(pickle.dumps(pdf, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def ferdigstill_utkast(utkast, tidspunkt=None):
+    """
+    Lager PDF-filen fra et utkast fra lag_pdf_utkast.
+
+    :param utkast: Tuple med (relativ filsti, utkast som bytes).
+    :param tidspunkt: Tidspunktet for kjøringen. Standard er nå.
+    :return: Tuple med (relativ filsti, PDF som bytes).
+    """
+    pdf_filepath, data = utkast
+    return ferdigstill_pdf(pdf_filepath, pickle.loads(zlib.decompress(data)), tidspunkt)
+
+
+def generer_pdfer(json_data, tidspunkt=None):
+    """
+    Genererer PDF for hver aktuell work order.
+
+    :param json_data: Iterable med work orders fra WoC-eksporten.
+    :param tidspunkt: Tidspunktet i toppteksten på alle PDF-ene. Standard er når genereringen starter.
+    :return: Generator med (relativ filsti, PDF som bytes).
+    """
+    tidspunkt = tidspunkt or datetime.now()
+    for blokk in i_blokker(json_data, BLOKKSTORRELSE):
+        yield from generer_pdfer_for_ordrer(berik_ordrer(blokk), tidspunkt)
+
+
+def generer_pdfer_for_ordrer(ordrer, tidspunkt=None, utkast=None):
+    """
+    Genererer PDF for hver ordre fra den felles berikelsen.
+
+    :param ordrer: Liste med berikede ordrer fra berik_ordrer.
+    :param tidspunkt: Tidspunktet i toppteksten på alle PDF-ene. Standard er når genereringen starter.
+    :param utkast: Liste som får et utkast fra lag_pdf_utkast for hver PDF, f.eks. til ordrecachen.
+    :return: Generator med (relativ filsti, PDF som bytes).
+    """
+    tidspunkt = tidspunkt or datetime.now()
+    for ordre in ordrer:
+        pdf_filepath, pdf = lag_pdf_dokument(ordre)
+        if utkast is not None:
+            utkast.append(lag_pdf_utkast(pdf_filepath, pdf))
+        yield ferdigstill_pdf(pdf_filepath, pdf, tidspunkt)
+
+
+def skriv_pdfer(pdfer, output_folder=output_folder):
+    """
+    Tømmer output_folder og skriver PDF-ene dit, i undermapper per fylke og ordretype.
+
+    :param pdfer: Iterable med (relativ filsti, PDF som bytes).
+    :param output_folder: Mappen PDF-ene skal skrives til.
+    :return: Antall PDF-er som ble skrevet.
+    """
+    # Slett eksisterende innhold i mappen hvis den finnes
+    if os.path.exists(output_folder):
+        for filename in os.listdir(output_folder):
+            file_path = os.path.join(output_folder, filename)
+            try:
+                if os.path.isfile(file_path) or os.path.islink(file_path):
+                    os.unlink(file_path)  # Slett fil eller symbolsk lenke
+                elif os.path.isdir(file_path):
+                    shutil.rmtree(file_path)  # Slett mappe og alt innhold
+            except Exception as e:
+                print(f'Feil ved sletting av {file_path}: {e}')
+
+    # Opprett mappe for PDF-filer hvis den ikke finnes
+    os.makedirs(output_folder, exist_ok=True)
+
+    antall = 0
+    for pdf_filepath, pdf_bytes in pdfer:
+        full_path = os.path.join(output_folder, pdf_filepath)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(pdf_bytes)
+        antall += 1
+    return antall
+
+
+def lag_pdf_zip(pdfer):
+    """
+    Pakker PDF-ene i en ZIP i minnet, med samme mappestruktur som skriv_pdfer lager.
+
+    :param pdfer: Iterable med (relativ filsti, PDF som bytes).
+    :return: ZIP-filen som bytes.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_fil:
+        for pdf_filepath, pdf_bytes in pdfer:
+            zip_fil.writestr(pdf_filepath.replace(os.sep, "/"), pdf_bytes)
+    return buffer.getvalue()
+
+
+def main():
+    # Én eller flere JSON-filer eller mapper. Flere eksporter slås sammen uten duplikater.
+    if len(sys.argv) > 1:
+        json_file_paths = finn_eksportfiler(sys.argv[1:])
+    else:
+        raise FileNotFoundError("No JSON file provided to the script.")
+
+    # Leser JSON-filene som en strøm, og skriver hver PDF så snart den er generert.
+    # Mappen byttes ut først når alle PDF-ene er skrevet, så samtidige kjøringer ikke blandes.
+    mappe = os.path.abspath(output_folder)
+    with Arbeidsomrade(os.path.dirname(mappe)) as arbeidsomrade:
+        skriv_pdfer(generer_pdfer(les_eksporter(json_file_paths)), os.path.join(arbeidsomrade.sti, os.path.basename(mappe)))
+        arbeidsomrade.publiser()
+    print(f"PDF-filer er generert i mappen: {output_folder}")
 
 
-print(f"PDF-filer er generert i mappen: {output_folder}")
+if __name__ == "__main__":
+    main()
 
 
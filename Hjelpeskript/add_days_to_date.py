@@ -1,4 +1,11 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+# Årene helligdagskalenderen dekker som standard. Utvides automatisk ved behov.
+KALENDER_FRA_AR = 2020
+KALENDER_TIL_AR = 2040
 
 
 def calculate_easter(year):
@@ -44,31 +51,49 @@ def norwegian_holidays(year):
     return set(holidays)  # Returner som et sett for rask oppslag
 
 
+@lru_cache(maxsize=None)
+def norsk_arbeidsdagskalender(fra_ar=KALENDER_FRA_AR, til_ar=KALENDER_TIL_AR):
+    """
+    Lager en NumPy-arbeidsdagskalender (man-fre, uten røde dager) for årene fra_ar til og med til_ar.
+
+    Kalenderen bygges én gang per årsintervall og gjenbrukes.
+    """
+    helligdager = sorted(
+        dag.strftime("%Y-%m-%d")
+        for ar in range(fra_ar, til_ar + 1)
+        for dag in norwegian_holidays(ar)
+    )
+    return np.busdaycalendar(weekmask="1111100", holidays=helligdager)
+
+
+def add_working_days_batch(start_dates, days_to_add):
+    """
+    Legger til arbeidsdager for en hel kolonne med datoer i én operasjon.
+
+    :param start_dates: Liste med datoer, 'YYYY-MM-DD' eller ISO-format med klokkeslett.
+    :param days_to_add: Antall arbeidsdager (int eller liste med ett tall per dato).
+    :return: Liste med datoer som strenger på formatet 'YYYY-MM-DD'.
+    """
+    start = np.array([dato.split("T")[0] for dato in start_dates], dtype="datetime64[D]")
+    if start.size == 0:
+        return []
+    dager = np.broadcast_to(np.asarray(days_to_add, dtype=np.int64), start.shape)
+
+    # Sørg for at kalenderen dekker alle år vi kan havne i (ca. 250 arbeidsdager per år)
+    start_ar = start.astype("datetime64[Y]").astype(int) + 1970
+    fra_ar = min(KALENDER_FRA_AR, int(start_ar.min()))
+    til_ar = max(KALENDER_TIL_AR, int(start_ar.max()) + int(dager.max()) // 200 + 1)
+    kalender = norsk_arbeidsdagskalender(fra_ar, til_ar)
+
+    # roll="backward" gjør at en start på helg/rød dag teller neste arbeidsdag som dag 1
+    resultat = np.busday_offset(start, dager, roll="backward", busdaycal=kalender)
+    # Med 0 (eller færre) dager returneres startdatoen uendret
+    resultat = np.where(dager > 0, resultat, start)
+    return np.datetime_as_string(resultat, unit="D").tolist()
+
+
 def add_working_days_with_holidays(start_date: str, days_to_add: int) -> str:
-    # Convert ISO date format if necessary
-    start_date = start_date.split("T")[0]  # Extract only "YYYY-MM-DD"
-
-    # Konverterer startdato til datetime-objekt
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    current_date = start
-    days_added = 0
-
-    # Hent helligdager for året det gjelder
-    holidays = norwegian_holidays(start.year)
-
-    # Iterer til vi har lagt til det ønskede antallet arbeidsdager
-    while days_added < days_to_add:
-        current_date += timedelta(days=1)
-        # Sjekker om dagen er en arbeidsdag og ikke en rød dag
-        if current_date.weekday() < 5 and current_date not in holidays:
-            days_added += 1
-
-        # Hvis vi krysser til et nytt år, legg til røde dager for det nye året
-        if current_date.year != start.year:
-            holidays.update(norwegian_holidays(current_date.year))
-
-    # Returnerer datoen som streng i samme format
-    return current_date.strftime("%Y-%m-%d")
+    return add_working_days_batch([start_date], days_to_add)[0]
 
 
 # date = "2025-01-29T07:42:32.347Z"
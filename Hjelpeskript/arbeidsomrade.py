@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import time
+
+# Undermappen i målmappen der hver jobb får sitt eget arbeidsområde
+JOBBMAPPE = ".jobber"
+
+# Arbeidsområder som er eldre enn dette, er fra jobber som krasjet, og slettes
+JOBB_TTL_SEKUNDER = 24 * 60 * 60
+
+# Antall forsøk på å bytte inn en mappe når en annen jobb publiserer samtidig
+_MAKS_FORSOK = 10
+
+
+def rydd_arbeidsomrader(mal_mappe, ttl_sekunder=JOBB_TTL_SEKUNDER):
+    """
+    Sletter arbeidsområder som ikke er endret på ttl_sekunder, f.eks. etter en jobb som krasjet.
+
+    :param mal_mappe: Mappen arbeidsområdene ligger under, se Arbeidsomrade.
+    :param ttl_sekunder: Maks alder i sekunder.
+    :return: Antall arbeidsområder som ble slettet.
+    """
+    rot = os.path.join(mal_mappe, JOBBMAPPE)
+    grense = time.time() - ttl_sekunder
+    antall = 0
+    try:
+        navn = os.listdir(rot)
+    except FileNotFoundError:
+        return 0
+    for jobb in navn:
+        sti = os.path.join(rot, jobb)
+        try:
+            if os.path.getmtime(sti) < grense:
+                shutil.rmtree(sti)
+                antall += 1
+        except OSError:
+            # Slettet av en annen prosess i mellomtiden
+            continue
+    return antall
+
+
+def _bytt_inn_mappe(kilde, mal, soppel):
+    # Flytter den gamle mappen til side og den nye på plass. Mappen mangler bare mellom de to rename-kallene.
+    for _ in range(_MAKS_FORSOK):
+        try:
+            os.rename(mal, soppel)
+        except FileNotFoundError:
+            pass
+        try:
+            os.rename(kilde, mal)
+            return
+        except OSError:
+            # En annen jobb publiserte samme mappe mellom de to kallene. Prøv igjen.
+            if os.path.isdir(soppel):
+                shutil.rmtree(soppel)
+    raise OSError(f"Kunne ikke publisere {mal}, andre jobber publiserer samtidig.")
+
+
+class Arbeidsomrade:
+    """
+    Egen midlertidig mappe for én jobb, så samtidige jobber aldri skriver til de samme filene.
+
+    Mappen ligger under målmappen, så publiser() kan flytte de ferdige filene på plass med
+    rename på samme filsystem. En fil erstattes atomisk, så andre ser enten den gamle eller den nye
+    filen, aldri en halvskrevet. Arbeidsområdet slettes når with-blokken avsluttes, og gamle
+    arbeidsområder fra jobber som krasjet slettes når et nytt opprettes.
+    """
+
+    def __init__(self, mal_mappe, ttl_sekunder=JOBB_TTL_SEKUNDER):
+        """
+        :param mal_mappe: Mappen de ferdige filene publiseres til. Opprettes hvis den ikke finnes.
+        :param ttl_sekunder: Arbeidsområder under målmappen som er eldre enn dette, slettes.
+        """
+        self.mal_mappe = mal_mappe
+        rot = os.path.join(mal_mappe, JOBBMAPPE)
+        os.makedirs(rot, exist_ok=True)
+        rydd_arbeidsomrader(mal_mappe, ttl_sekunder)
+        self.sti = tempfile.mkdtemp(prefix=f"{time.strftime('%Y%m%d-%H%M%S')}-", dir=rot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.lukk()
+
+    def publiser(self):
+        """
+        Flytter alt i arbeidsområdet til målmappen.
+
+        Filer erstatter filene med samme navn atomisk. Mapper, f.eks. generated_pdfs, byttes ut
+        i sin helhet, så den publiserte mappen alltid er fra én og samme jobb.
+
+        :return: Liste med filstiene i målmappen som ble publisert.
+        """
+        publisert = []
+        soppel = tempfile.mkdtemp(prefix="gammel-", dir=self.sti)
+        for navn in sorted(os.listdir(self.sti)):
+            kilde = os.path.join(self.sti, navn)
+            if kilde == soppel:
+                continue
+            mal = os.path.join(self.mal_mappe, navn)
+            if os.path.isdir(kilde):
+                _bytt_inn_mappe(kilde, mal, os.path.join(soppel, navn))
+            else:
+                os.replace(kilde, mal)
+            publisert.append(mal)
+        return publisert
+
+    def lukk(self):
+        """Sletter arbeidsområdet med det som ikke er publisert."""
+        shutil.rmtree(self.sti, ignore_errors=True)
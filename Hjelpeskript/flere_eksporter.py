@@ -0,0 +1,134 @@
+import glob
+import math
+import os
+
+from dateutil.parser import parse
+
+from Hjelpeskript.json_innlesing import les_work_orders
+from Hjelpeskript.parallell import lag_pool
+
+# Filendelser som regnes som WoC-eksporter når en mappe gis som input
+EKSPORT_MONSTRE = ("*.json", "*.json.gz")
+
+
+def finn_eksportfiler(stier):
+    """
+    Gjør om filer og mapper til en liste med eksportfiler.
+
+    :param stier: Filstier og/eller mapper. Mapper gir alle .json- og .json.gz-filene i mappen, sortert.
+    :return: Liste med filstier, i samme rekkefølge som input.
+    """
+    filer = []
+    for sti in stier:
+        if os.path.isdir(sti):
+            treff = sorted(f for monster in EKSPORT_MONSTRE for f in glob.glob(os.path.join(sti, monster)))
+            if not treff:
+                raise FileNotFoundError(f"Fant ingen JSON-filer i mappen {sti}.")
+            filer.extend(treff)
+        elif os.path.isfile(sti):
+            filer.append(sti)
+        else:
+            raise FileNotFoundError(f"Finner ikke {sti}.")
+    return filer
+
+
+def work_order_nokkel(entry):
+    """
+    Lager nøkkelen som brukes til å finne samme ordre i flere eksporter.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: (referenceName, referenceNumber) fra workOrderId, eller None hvis ordren mangler ID.
+    """
+    work_order_id = entry.get("workOrderId")
+    if not isinstance(work_order_id, dict) or not work_order_id.get("referenceNumber"):
+        return None
+    return work_order_id.get("referenceName"), work_order_id.get("referenceNumber")
+
+
+def endret_tidspunkt(entry):
+    """
+    Returnerer modifiedDate som tidsstempel, slik at ordre fra flere eksporter kan sammenlignes.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: Sekunder siden epoch, eller -inf hvis modifiedDate mangler eller ikke kan leses.
+    """
+    modified_date = entry.get("modifiedDate")
+    if not modified_date:
+        return -math.inf
+    try:
+        return parse(modified_date).timestamp()
+    except (ValueError, OverflowError):
+        return -math.inf
+
+
+def indekser_eksport(kilde):
+    """
+    Leser én eksport og henter ut nøkkel og modifiedDate for hver ordre. Kjøres i en arbeidsprosess.
+
+    :param kilde: Filsti eller bytes, se les_work_orders.
+    :return: Liste med (nøkkel, tidsstempel), én per ordre, i samme rekkefølge som i eksporten.
+    """
+    return [(work_order_nokkel(entry), endret_tidspunkt(entry)) for entry in les_work_orders(kilde)]
+
+
+def velg_nyeste(indekser):
+    """
+    Finner hvilken forekomst av hver ordre som skal beholdes.
+
+    Forekomsten med nyest modifiedDate vinner. Ved likt tidspunkt vinner den fra eksporten
+    som kommer sist.
+
+    :param indekser: Liste med resultatet fra indekser_eksport, én per eksport.
+    :return: Dictionary med nøkkel -> (eksportnummer, posisjon i eksporten).
+    """
+    vinnere = {}
+    tidspunkter = {}
+    for eksportnummer, indeks in enumerate(indekser):
+        for posisjon, (nokkel, tidspunkt) in enumerate(indeks):
+            if nokkel is None:
+                continue
+            if nokkel not in vinnere or tidspunkt >= tidspunkter[nokkel]:
+                vinnere[nokkel] = (eksportnummer, posisjon)
+                tidspunkter[nokkel] = tidspunkt
+    return vinnere
+
+
+def les_eksporter(kilder, antall_arbeidere=None):
+    """
+    Leser flere WoC-eksporter som én, uten duplikater.
+
+    Samme ordre (workOrderId) i flere eksporter tas bare med én gang, med versjonen som har
+    nyest modifiedDate. Eksportene indekseres parallelt i en prosesspool, se lag_pool, og leses deretter
+    som en strøm i samme rekkefølge som de er gitt. Ordre uten workOrderId tas alltid med.
+    Med bare én eksport leses den direkte, uten indeksering.
+
+    :param kilder: Liste med filstier og/eller bytes (f.eks. opplastede filer).
+    :param antall_arbeidere: Maks antall prosesser. Standard er antall CPU-er.
+    :return: Generator med work orders.
+    """
+    kilder = list(kilder)
+    if len(kilder) == 1:
+        yield from les_work_orders(kilder[0])
+        return
+
+    # memoryview kan ikke sendes til en annen prosess
+    kilder = [bytes(kilde) if isinstance(kilde, memoryview) else kilde for kilde in kilder]
+
+    antall_arbeidere = min(len(kilder), antall_arbeidere or os.cpu_count() or 1)
+    if antall_arbeidere > 1:
+        with lag_pool(antall_arbeidere) as pool:
+            indekser = list(pool.map(indekser_eksport, kilder))
+    else:
+        indekser = [indekser_eksport(kilde) for kilde in kilder]
+    vinnere = velg_nyeste(indekser)
+
+    totalt = sum(len(indeks) for indeks in indekser)
+    uten_nokkel = sum(1 for indeks in indekser for nokkel, _ in indeks if nokkel is None)
+    duplikater = totalt - len(vinnere) - uten_nokkel
+    print(f"{totalt} work orders i {len(kilder)} eksporter, {duplikater} duplikater fjernet.")
+
+    for eksportnummer, kilde in enumerate(kilder):
+        for posisjon, entry in enumerate(les_work_orders(kilde)):
+            nokkel = work_order_nokkel(entry)
+            if nokkel is None or vinnere[nokkel] == (eksportnummer, posisjon):
+                yield entry
@@ -1,24 +1,24 @@
-import pandas as pd
+from Hjelpeskript.oppslag import Oppslagsindeks, normaliser_postnummer
+from Hjelpeskript.referansedata import hent_tabell
 
-# Laste inn Excel-filen
-file_path = "Datafiler/Fordeling_Entreprenor.xlsx"
-df = pd.read_excel(file_path, sheet_name="Postnummerregister")
+# Oppslag postnummer -> entreprenør, bygges første gang det trengs
+_entreprenor_indeks = None
 
-# Rense kolonnenavn
-df.columns = ["Fylke", "Kommunenummer", "Kommunenavn", "Postnummer", "Poststed", "Entreprenør"]
 
-# Sikre at 'Postnummer' er en streng
-df["Postnummer"] = df["Postnummer"].astype(str)
+def hent_entreprenor_indeks():
+    """Returnerer oppslaget fra postnummer til entreprenør. Tabellen lastes ved første oppslag."""
+    global _entreprenor_indeks
+    if _entreprenor_indeks is None:
+        # Postnumrene nullfylles, så '0150' treffer 150 fra Excel
+        df = hent_tabell("entreprenor")
+        _entreprenor_indeks = Oppslagsindeks(
+            df["Postnummer"], df["Entreprenør"], normaliser_postnummer,
+            "Fant ikke entreprenør for postnr. {}",
+        )
+    return _entreprenor_indeks
 
 # Funksjon for å finne entreprenør basert på postnummer
 def finn_entreprenor(post_nummer):
-    post_nummer = str(post_nummer).strip()  # Sikre at input er en streng og fjern unødvendige mellomrom
-    resultat = df[df["Postnummer"] == post_nummer]  # Direkte sammenligning fungerer bedre
-
-    if not resultat.empty:
-        return resultat["Entreprenør"].values[0]
-    else:
-        print(f"Fant ikke entreprenør for postnr. {post_nummer}")
-        return None
+    return hent_entreprenor_indeks().finn(post_nummer)
 
 
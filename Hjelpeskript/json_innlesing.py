@@ -0,0 +1,238 @@
+import gc
+import gzip
+import io
+import itertools
+import json
+import os
+
+# Antall tegn som leses om gangen fra eksporten
+CHUNK_STORRELSE = 64 * 1024
+
+# De to første bytene i en gzip-fil
+_GZIP_MAGI = b"\x1f\x8b"
+
+# Dekoder som brukes når ingen er valgt: "auto", "orjson" eller "json".
+# Kan overstyres med miljøvariabelen WOC_JSON_DEKODER.
+STANDARD_DEKODER = os.environ.get("WOC_JSON_DEKODER", "auto")
+
+# Med "auto" dekodes eksporter i minnet med en rask dekoder bare opp til denne størrelsen.
+# Hel dekoding bruker rundt 7 ganger eksportens størrelse i minne, mens en strøm bare holder én
+# ordre om gangen. Større eksporter leses derfor som en strøm, så minnebruken ikke vokser med eksporten.
+MAKS_BYTES_HEL_DEKODING = 4 * 1024 * 1024
+
+
+def _orjson_loads():
+    """Returnerer orjson.loads hvis orjson er installert, ellers None."""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.loads
+
+
+def tilgjengelige_dekodere():
+    """
+    Returnerer JSON-dekoderne som kan brukes i denne installasjonen.
+
+    :return: Dictionary med navn -> loads-funksjon. "json" finnes alltid.
+    """
+    dekodere = {}
+    orjson_loads = _orjson_loads()
+    if orjson_loads is not None:
+        dekodere["orjson"] = orjson_loads
+    dekodere["json"] = json.loads
+    return dekodere
+
+
+def velg_dekoder(navn=None):
+    """
+    Velger JSON-dekoder.
+
+    :param navn: "auto" (raskeste installerte), "orjson" eller "json". Standard er STANDARD_DEKODER.
+    :return: Navnet på dekoderen som brukes.
+    """
+    navn = navn or STANDARD_DEKODER
+    dekodere = tilgjengelige_dekodere()
+    if navn == "auto":
+        return next(iter(dekodere))
+    if navn not in dekodere:
+        raise ValueError(f"JSON-dekoderen '{navn}' er ikke tilgjengelig. Velg en av: {', '.join(dekodere)}.")
+    return navn
+
+
+def dekod_eksport(data, dekoder=None):
+    """
+    Dekoder en hel WoC-eksport som ligger i minnet.
+
+    :param data: Eksporten som bytes/memoryview, f.eks. uploaded_file.getbuffer(). Kan være gzip.
+    :param dekoder: Se velg_dekoder.
+    :return: Liste med work orders.
+    """
+    data = memoryview(data)
+    if data[:2] == _GZIP_MAGI:
+        data = memoryview(gzip.decompress(data))
+    # Hopper over BOM, som orjson ikke godtar
+    if data[:3] == b"\xef\xbb\xbf":
+        data = data[3:]
+
+    loads = tilgjengelige_dekodere()[velg_dekoder(dekoder)]
+    if loads is json.loads:
+        # json.loads godtar ikke memoryview
+        data = data.tobytes()
+    # Syklisk GC er unødvendig her, men kjøres mange ganger mens tusenvis av dictionaries
+    # opprettes, og tar da mer tid enn selve dekodingen
+    gc_var_pa = gc.isenabled()
+    gc.disable()
+    try:
+        entries = loads(data)
+    finally:
+        if gc_var_pa:
+            gc.enable()
+    if not isinstance(entries, list):
+        raise ValueError("WoC-eksporten må være en JSON-liste med work orders.")
+    return entries
+
+
+def _er_gzip(strom):
+    """Sjekker om strømmen starter med gzip-signaturen, uten å lese forbi den."""
+    if hasattr(strom, "peek"):
+        return strom.peek(2)[:2] == _GZIP_MAGI
+    start = strom.tell()
+    magi = strom.read(2)
+    strom.seek(start)
+    return magi == _GZIP_MAGI
+
+
+def apne_eksport(kilde):
+    """
+    Åpner en WoC-eksport som en binær strøm. Gzip gjenkjennes automatisk.
+
+    :param kilde: Filsti, bytes/memoryview (f.eks. uploaded_file.getbuffer()) eller en binær filstrøm.
+    :return: Binær filstrøm.
+    """
+    if isinstance(kilde, (str, os.PathLike)):
+        strom = open(kilde, "rb")
+    elif isinstance(kilde, (bytes, bytearray, memoryview)):
+        strom = io.BytesIO(kilde)
+    else:
+        strom = kilde
+
+    if _er_gzip(strom):
+        return gzip.GzipFile(fileobj=strom, mode="rb")
+    return strom
+
+
+def les_work_orders(kilde, chunk_storrelse=CHUNK_STORRELSE, dekoder=None):
+    """
+    Leser work orders én og én fra toppnivå-listen i en WoC-eksport.
+
+    Eksporten leses som en strøm: bare ordren som leses og en liten lesebuffer holdes i minnet,
+    uansett hvor stor eksporten er. Unntaket er eksporter som allerede ligger i minnet
+    (bytes/memoryview): de dekodes i én omgang med den raskeste dekoderen når de er mindre enn
+    MAKS_BYTES_HEL_DEKODING, eller uansett størrelse når en dekoder er valgt eksplisitt. Hel
+    dekoding bruker rundt 7 ganger eksportens størrelse i minne.
+
+    :param kilde: Filsti, bytes/memoryview, gzip-fil eller binær filstrøm, se apne_eksport.
+    :param chunk_storrelse: Antall tegn som leses om gangen når eksporten leses som en strøm.
+    :param dekoder: Se velg_dekoder. "json" gir alltid strømmende lesing.
+    :return: Generator med én dictionary per work order.
+    """
+    if isinstance(kilde, (bytes, bytearray, memoryview)):
+        navn = velg_dekoder(dekoder)
+        hel_dekoding = (dekoder or STANDARD_DEKODER) != "auto" or memoryview(kilde).nbytes <= MAKS_BYTES_HEL_DEKODING
+        if navn != "json" and hel_dekoding:
+            return _gi_fra_liste(dekod_eksport(kilde, navn))
+    return _les_work_orders_strom(kilde, chunk_storrelse)
+
+
+def _gi_fra_liste(entries):
+    # Slipper hver ordre når den er gitt videre, så minnet frigjøres underveis
+    entries.reverse()
+    while entries:
+        yield entries.pop()
+
+
+def _les_work_orders_strom(kilde, chunk_storrelse):
+    """Strømmende lesing med JSONDecoder.raw_decode, se les_work_orders."""
+    decoder = json.JSONDecoder()
+    # Strømmer som kalleren har åpnet, skal ikke lukkes her
+    egen_strom = isinstance(kilde, (str, os.PathLike, bytes, bytearray, memoryview))
+    strom = apne_eksport(kilde)
+    tekst = io.TextIOWrapper(strom, encoding="utf-8-sig")
+    buffer = ""
+    pos = 0
+    slutt_pa_fil = False
+
+    def les_mer(antall):
+        nonlocal buffer, pos, slutt_pa_fil
+        chunk = tekst.read(antall)
+        if not chunk:
+            slutt_pa_fil = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def neste_tegn():
+        # Hopper over mellomrom og returnerer neste tegn, eller "" ved slutten av filen
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or slutt_pa_fil:
+                return buffer[pos] if pos < len(buffer) else ""
+            les_mer(chunk_storrelse)
+
+    try:
+        if neste_tegn() != "[":
+            raise ValueError("WoC-eksporten må være en JSON-liste med work orders.")
+        pos += 1
+
+        forventer_komma = False
+        while True:
+            tegn = neste_tegn()
+            if tegn == "]":
+                return
+            if tegn == "":
+                raise ValueError("WoC-eksporten slutter før listen er avsluttet.")
+            if forventer_komma:
+                if tegn != ",":
+                    raise ValueError(f"Ugyldig JSON i WoC-eksporten ved '{tegn}'.")
+                pos += 1
+                neste_tegn()
+
+            # Les mer til hele ordren ligger i bufferen. Leselengden dobles for store ordre.
+            antall = chunk_storrelse
+            while True:
+                try:
+                    entry, slutt = decoder.raw_decode(buffer, pos)
+                    if slutt < len(buffer) or slutt_pa_fil:
+                        break
+                except json.JSONDecodeError:
+                    if slutt_pa_fil:
+                        raise
+                les_mer(antall)
+                antall *= 2
+
+            pos = slutt
+            forventer_komma = True
+            yield entry
+    finally:
+        if egen_strom:
+            tekst.close()
+        else:
+            tekst.detach()
+
+
+def i_blokker(iterable, storrelse):
+    """
+    Deler en iterable opp i lister med maks `storrelse` elementer, uten å lese alt på en gang.
+
+    :param iterable: F.eks. generatoren fra les_work_orders.
+    :param storrelse: Maks antall elementer per blokk.
+    :return: Generator med lister.
+    """
+    iterator = iter(iterable)
+    while True:
+        blokk = list(itertools.islice(iterator, storrelse))
+        if not blokk:
+            return
+        yield blokk
@@ -0,0 +1,283 @@
+import numpy as np
+
+# Klassifiseringen av ordrene som tabell, og det eneste stedet reglene finnes. Reglene for hver
+# kolonne prøves i rekkefølge, og første regel der alle betingelsene slår til bestemmer verdien.
+# benchmarks/klassifisering.py har de gamle if/elif-kjedene som fasit.
+#
+# Hver regel er (navn, betingelser, verdi, melding). En betingelse er (felt, operator, verdi), eller
+# ("eller", [betingelser]). Feltene er Monday-kolonnene, og kolonnene tidligere i tabellen kan
+# brukes i reglene for kolonnene etter. Meldingen skrives ut for ordrene regelen slår til for.
+
+# Felt som regnes ut fra et annet felt: navn -> (felt, normalisering)
+AVLEDEDE_FELT = {
+    "kundekategori": ("Customer Category", "tekst_lav"),
+    "kontrakt": ("kontraktdetaljer", "tekst_lav"),
+    "hovedprodukt_lav": ("Hovedprodukt", "lav"),
+}
+
+_BEDRIFT = ("Kunde Kategori", "==", "bedrift")
+_PRIVAT = ("Kunde Kategori", "==", "privat")
+
+KLASSIFISERINGSREGLER = {
+    "Kunde Kategori": [
+        ("bedrift", [("eller", [("kundekategori", "inneholder_noen", ("bedrift", "fttb")),
+                                ("kontrakt", "inneholder_noen", ("bedrift", "fttb"))])], "bedrift", None),
+        ("privat", [("eller", [("kundekategori", "inneholder", "privat"),
+                               ("kontrakt", "inneholder", "ftth")])], "privat", None),
+        ("ukjent", [], "denne må sjekkes", "Sjekk om denne er bedrift eller privat"),
+    ],
+    "Status Leveranse": [
+        ("bedrift: U0009A", [_BEDRIFT, ("Produkt ID", "inneholder", "U0009A")], "", None),
+        ("bedrift: LVLU", [_BEDRIFT, ("Produkt ID", "inneholder", "LVLU")], "Booket", None),
+        ("bedrift: wholesale", [_BEDRIFT, ("Wholesale ?", "ikke_tom", None)], "NY wholesale", None),
+        ("bedrift: BB_ACCESS", [_BEDRIFT, ("Orderinfo Description", "==", "BB_ACCESS")], "NY FWA", None),
+        ("bedrift: FTTB/HELIOS", [_BEDRIFT, ("eller", [("kontraktdetaljer", "==", "FTTB"),
+                                                       ("GPON/P2P - WOC", "==", "HELIOS")])], "NY bedrift", None),
+        ("bedrift: ukjent", [_BEDRIFT], None, "Bedriftsoppdrag leveransekode må sjekkes"),
+        ("privat: FTTH-produkt", [_PRIVAT, ("Produkt ID", "inneholder_noen", ("LVA1A", "LVA1B", "LVA1D", "LVA2F"))],
+         "NY FTTH", None),
+        ("privat: wholesale", [_PRIVAT, ("Wholesale ?", "ikke_tom", None)], "NY wholesale", None),
+        ("privat: BB_ACCESS", [_PRIVAT, ("Orderinfo Description", "==", "BB_ACCESS")], "NY FWA", None),
+        ("privat", [_PRIVAT], "NY privat", None),
+        ("ukjent kategori", [], None, "Oppdrag kategori må sjekkes"),
+    ],
+    "Type oppdrag": [
+        ("BB_ACCESS", [("Orderinfo Description", "==", "BB_ACCESS")], "BB-Access", None),
+        ("LVA1A", [("Hovedprodukt", "inneholder", "LVA1A")], "Komplett fortetning", None),
+        ("LVK0", [("Hovedprodukt", "inneholder", "LVK0")], "Eksperthjelpen", None),
+        ("LVK2F", [("Hovedprodukt", "inneholder", "LVK2F")], "Installasjonshjelpen", None),
+        # Wholesale ? er en liste, og sammenlignes i sin helhet slik som i de gamle if/elif-kjedene
+        ("VULA", [("Wholesale ?", "==", "VULA")], "VULA", None),
+        ("VULA CDK", [("Wholesale ?", "==", "VULA CDK")], "VULA CDK", None),
+        ("LVT2D", [("Hovedprodukt", "inneholder", "LVT2D")], "AEG", None),
+        ("LVT1C", [("Hovedprodukt", "inneholder", "LVT1C")], "Leveranse timer - Fiber", None),
+        ("DLS99", [("Hovedprodukt", "inneholder", "DLS99")], "DLS99", None),
+        ("ingen", [], None, None),
+    ],
+    "Type FTTx": [
+        ("bedrift: U0009A", [_BEDRIFT, ("Produkt ID", "inneholder", "U0009A")], "FTTB Planunderlag", None),
+        ("bedrift: LVLU", [_BEDRIFT, ("Produkt ID", "inneholder", "LVLU")], "FTTB Offnet", None),
+        ("bedrift: FTTB/HELIOS/BB_ACCESS", [_BEDRIFT, ("eller", [("kontraktdetaljer", "==", "FTTB"),
+                                                                 ("GPON/P2P - WOC", "==", "HELIOS"),
+                                                                 ("Orderinfo Description", "==", "BB_ACCESS")])],
+         "FTTB Onnet", None),
+        ("bedrift: DLS99", [_BEDRIFT, ("Hovedprodukt", "inneholder", "DLS99")], "FTTB Onnet", None),
+        ("bedrift: ukjent", [_BEDRIFT], None, "Mangler FTTx"),
+        ("privat: wholesale", [_PRIVAT, ("Status Leveranse", "==", "NY wholesale")], "Wholesale", None),
+        ("privat: service", [_PRIVAT, ("hovedprodukt_lav", "inneholder_noen",
+                                       ("aeg", "eksperthjelpen", "installasjonshjelpen"))], "FTTH Service", None),
+        ("privat: NY FTTH", [_PRIVAT, ("Status Leveranse", "==", "NY FTTH")], "FTTH Fortetning", None),
+        ("privat: ukjent", [_PRIVAT], "FTTH Fortetning", "Mangler FTTx"),
+        ("ukjent kategori", [], None, "Mangler FTTx"),
+    ],
+    "GPON/P2P": [
+        ("NY FWA", [("Status Leveranse", "==", "NY FWA")], "Antenne", None),
+        ("NY FTTH", [("Status Leveranse", "==", "NY FTTH")], "FTTH", None),
+        ("GPON", [("eller", [("Wholesale ?", "ikke_tom", None), ("GPON/P2P - WOC", "==", "GPON")])], "GPON", None),
+        ("LEIDE SAMBAND", [("GPON/P2P - WOC", "==", "LEIDE SAMBAND")], "P2P", None),
+        ("NY privat", [("Status Leveranse", "==", "NY privat")], "AEG", None),
+        ("NORDIC CONNECT", [("GPON/P2P - WOC", "==", "NORDIC CONNECT")], "Ruterbytte", None),
+        ("ingen", [], None, None),
+    ],
+}
+
+_NORMALISERINGER = {
+    "tekst_lav": lambda verdi: (verdi or "").lower().strip(),
+    "lav": lambda verdi: verdi.lower(),
+}
+
+_OPERATORER = {
+    "==": lambda verdi, mal: verdi == mal,
+    "inneholder": lambda verdi, mal: mal in verdi,
+    "inneholder_noen": lambda verdi, mal: any(m in verdi for m in mal),
+    "ikke_tom": lambda verdi, mal: bool(verdi),
+}
+
+_regler = None
+
+
+def kompiler_regler(regler):
+    """
+    Sjekker regeltabellen og slår opp operatorene, så tabellen kan brukes i klassifiser.
+
+    :param regler: Dictionary med kolonne -> liste med regler, f.eks. KLASSIFISERINGSREGLER.
+    :return: Liste med (kolonne, liste med (navn, betingelser, verdi, melding)), der operatorene er funksjoner.
+    :raises ValueError: Hvis en regel bruker en ukjent operator eller en kolonne før den er regnet ut.
+    """
+    utregnet = set()
+
+    def kompiler(betingelse, kolonne):
+        if betingelse[0] == "eller":
+            return ("eller", tuple(kompiler(b, kolonne) for b in betingelse[1]))
+        felt, operator, mal = betingelse
+        if operator not in _OPERATORER:
+            raise ValueError(f"Ukjent operator '{operator}' i reglene for {kolonne}.")
+        if felt in regler and felt not in utregnet:
+            raise ValueError(f"Reglene for {kolonne} bruker {felt}, som ikke er regnet ut ennå.")
+        return (felt, operator, _OPERATORER[operator], mal)
+
+    kompilert = []
+    for kolonne, kolonneregler in regler.items():
+        kompilert.append((kolonne, [
+            (navn, tuple(kompiler(b, kolonne) for b in betingelser), verdi, melding)
+            for navn, betingelser, verdi, melding in kolonneregler
+        ]))
+        utregnet.add(kolonne)
+    return kompilert
+
+
+def hent_regler():
+    """
+    Returnerer de kompilerte klassifiseringsreglene. Kompileres første gang funksjonen kalles.
+
+    :return: Resultatet fra kompiler_regler(KLASSIFISERINGSREGLER).
+    """
+    global _regler
+    if _regler is None:
+        _regler = kompiler_regler(KLASSIFISERINGSREGLER)
+    return _regler
+
+
+def _faktoriser(verdier):
+    # Unike verdier og posisjonen til hver verdi blant dem. Lister blir tupler, så de kan brukes som nøkler.
+    nokler = verdier
+    try:
+        koder = dict.fromkeys(nokler)
+    except TypeError:
+        nokler = [tuple(verdi) if isinstance(verdi, list) else verdi for verdi in verdier]
+        koder = dict.fromkeys(nokler)
+    for kode, nokkel in enumerate(koder):
+        koder[nokkel] = kode
+    return list(koder), np.fromiter(map(koder.__getitem__, nokler), dtype=np.intp, count=len(nokler))
+
+
+def _objekter(verdier):
+    # numpy-array med Python-objektene, uten at numpy tolker verdiene
+    resultat = np.empty(len(verdier), dtype=object)
+    resultat[:] = verdier
+    return resultat
+
+
+def klassifiser(kolonner, regler=None):
+    """
+    Klassifiserer alle ordrene i én omgang.
+
+    Hver betingelse regnes bare ut for de unike verdiene i feltet, og gir en boolsk maske for alle
+    ordrene. Reglene for hver kolonne kombineres med maskene i samme rekkefølge som i tabellen.
+
+    :param kolonner: Dictionary med Monday-kolonne -> liste med verdier, én per ordre. Må inneholde
+                     feltene reglene bruker og 'Item'.
+    :param regler: Kompilerte regler, standard er hent_regler().
+    :return: Tuple med (dictionary med kolonne -> liste med verdier,
+             dictionary med kolonne -> liste med navnet på regelen som slo til).
+    """
+    if regler is None:
+        regler = hent_regler()
+    antall = len(kolonner["Item"])
+
+    felt_koder = {}
+    masker = {}
+
+    def koder(felt):
+        if felt not in felt_koder:
+            if felt in AVLEDEDE_FELT:
+                grunnfelt, normalisering = AVLEDEDE_FELT[felt]
+                unike, posisjoner = koder(grunnfelt)
+                felt_koder[felt] = ([_NORMALISERINGER[normalisering](verdi) for verdi in unike], posisjoner)
+            else:
+                felt_koder[felt] = _faktoriser(kolonner[felt])
+        return felt_koder[felt]
+
+    def maske(betingelse):
+        if betingelse[0] == "eller":
+            resultat = np.zeros(antall, dtype=bool)
+            for b in betingelse[1]:
+                resultat |= maske(b)
+            return resultat
+        felt, operator, funksjon, mal = betingelse
+        nokkel = (felt, operator, mal)
+        if nokkel not in masker:
+            unike, posisjoner = koder(felt)
+            treff = np.fromiter((funksjon(verdi, mal) for verdi in unike), dtype=bool, count=len(unike))
+            masker[nokkel] = treff[posisjoner]
+        return masker[nokkel]
+
+    verdier = {}
+    regelnavn = {}
+    for kolonne, kolonneregler in regler:
+        # Nummeret på regelen som slo til for hver ordre. len(kolonneregler) betyr ingen.
+        valgt = np.full(antall, len(kolonneregler), dtype=np.intp)
+        ledig = np.ones(antall, dtype=bool)
+        for nummer, (_, betingelser, _, _) in enumerate(kolonneregler):
+            treff = ledig.copy()
+            for betingelse in betingelser:
+                treff &= maske(betingelse)
+            valgt[treff] = nummer
+            ledig &= ~treff
+
+        kolonneverdier = [verdi for _, _, verdi, _ in kolonneregler] + [None]
+        felt_koder[kolonne] = (kolonneverdier, valgt)
+        verdier[kolonne] = _objekter(kolonneverdier)[valgt].tolist()
+        regelnavn[kolonne] = _objekter([navn for navn, _, _, _ in kolonneregler] + [None])[valgt].tolist()
+    return verdier, regelnavn
+
+
+def samle_meldinger(regelnavn, items, meldinger, regler=None):
+    """
+    Samler ordrene for hver regel med melding, så meldingene for flere blokker kan skrives ut samlet.
+
+    :param regelnavn: Regelnavnene fra klassifiser.
+    :param items: Item-navnene til ordrene, i samme rekkefølge.
+    :param meldinger: Dictionary med (kolonne, regelnavn) -> liste med items. Endres på stedet.
+    :param regler: Kompilerte regler, standard er hent_regler().
+    :return: meldinger.
+    """
+    if regler is None:
+        regler = hent_regler()
+    for kolonne, kolonneregler in regler:
+        med_melding = {navn for navn, _, _, melding in kolonneregler if melding is not None}
+        for item, regel in zip(items, regelnavn[kolonne]):
+            if regel in med_melding:
+                meldinger.setdefault((kolonne, regel), []).append(str(item))
+    return meldinger
+
+
+def skriv_samlede_meldinger(meldinger, regler=None):
+    """
+    Skriver ut én linje per regel med melding, med alle ordrene fra samle_meldinger.
+
+    :param meldinger: Dictionary fra samle_meldinger.
+    :param regler: Kompilerte regler, standard er hent_regler().
+    """
+    if regler is None:
+        regler = hent_regler()
+    for kolonne, kolonneregler in regler:
+        for navn, _, _, melding in kolonneregler:
+            treff = meldinger.get((kolonne, navn))
+            if melding is not None and treff:
+                print(f"{kolonne} - {melding} [{navn}] ({len(treff)}): {', '.join(treff)}")
+
+
+def skriv_meldinger(regelnavn, items, regler=None):
+    """
+    Skriver ut én linje per regel med melding, med alle ordrene regelen slo til for.
+
+    :param regelnavn: Regelnavnene fra klassifiser.
+    :param items: Item-navnene til ordrene, i samme rekkefølge.
+    :param regler: Kompilerte regler, standard er hent_regler().
+    """
+    skriv_samlede_meldinger(samle_meldinger(regelnavn, items, {}, regler), regler)
+
+
+def tell_regler(regelnavn):
+    """
+    Teller hvor mange ordre hver regel slo til for.
+
+    :param regelnavn: Regelnavnene fra klassifiser.
+    :return: Dictionary med kolonne -> {regelnavn: antall}.
+    """
+    antall = {}
+    for kolonne, navn in regelnavn.items():
+        unike, posisjoner = _faktoriser(navn)
+        antall[kolonne] = dict(zip(unike, np.bincount(posisjoner, minlength=len(unike)).tolist()))
+    return antall
@@ -1,22 +1,25 @@
-import pandas as pd
+from Hjelpeskript.oppslag import Oppslagsindeks, normaliser_navn
+from Hjelpeskript.referansedata import hent_tabell
 
-# Laste inn Excel-filen
-file_path = "Datafiler/Kommune_Fylke_Oversikt.xlsx"
-df = pd.read_excel(file_path, sheet_name="Ark1")
+# Oppslag kommunenavn -> fylkesnavn, bygges første gang det trengs
+_fylke_indeks = None
 
-# Rense kolonnenavn
-df.columns = ["Fylkesnavn", "Fylkesnr", "Kommunenavn", "Kommunenr", "Kommunenr_2023"]
+
+def hent_fylke_indeks():
+    """Returnerer oppslaget fra kommunenavn til fylke. Tabellen lastes ved første oppslag."""
+    global _fylke_indeks
+    if _fylke_indeks is None:
+        df = hent_tabell("kommune_fylke")
+        _fylke_indeks = Oppslagsindeks(
+            df["Kommunenavn"], df["Fylkesnavn"], normaliser_navn,
+            "Fant ikke Fylke for kommune: {}", stedsnavn=True,
+        )
+    return _fylke_indeks
 
 
 # Funksjon for å finne fylke basert på kommunenavn
 def finn_fylke(kommune_navn):
-    resultat = df[df["Kommunenavn"].str.lower() == kommune_navn.lower()]
-
-    if not resultat.empty:
-        return resultat["Fylkesnavn"].values[0]
-    else:
-        print(f"Fant ikke Fylke for kommune: {kommune_navn}")
-        return None
+    return hent_fylke_indeks().finn(kommune_navn)
 
 
 
@@ -0,0 +1,426 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MONDAY_API_URL = "https://api.monday.com/v2"
+MONDAY_API_VERSJON = "2024-10"
+
+# Miljøvariabelen med API-tokenet. Tokenet skal aldri ligge i koden eller i git.
+TOKEN_MILJOVARIABEL = "MONDAY_API_TOKEN"
+
+# Antall rader per GraphQL-kall. Halveres når Monday begrenser, og økes gradvis igjen etterpå.
+STANDARD_BATCHSTORRELSE = 25
+MAKS_BATCHSTORRELSE = 50
+
+# Maks antall samtidige kall, og dermed maks antall åpne tilkoblinger
+ANTALL_TILKOBLINGER = 4
+
+# Antall forsøk per kall før vi gir opp
+MAKS_FORSOK = 8
+
+# Antall ordrenumre per oppslag etter eksisterende items
+OPPSLAG_STORRELSE = 100
+
+# Feilkoder fra Monday som betyr at kallet ble avvist før det ble utført, og kan sendes på nytt
+_BEGRENSNINGSKODER = {"ComplexityException", "COMPLEXITY_BUDGET_EXHAUSTED", "RATE_LIMIT_EXCEEDED",
+                      "maxConcurrencyExceeded", "IP_RATE_LIMIT_EXCEEDED"}
+_SEKUNDER_I_MELDING = re.compile(r"(\d+) seconds?")
+
+_KOMPLEKSITET = "complexity { query after reset_in_x_seconds }"
+
+_OPPSLAG = """query ($b: ID!, $k: [ItemsPageByColumnValuesQuery!], $c: [String!]) {
+  items_page_by_column_values(limit: 500, board_id: $b, columns: $k) { cursor items { id column_values(ids: $c) { text } } }
+  %s
+}""" % _KOMPLEKSITET
+
+_NESTE_SIDE = """query ($n: String!, $c: [String!]) {
+  next_items_page(limit: 500, cursor: $n) { cursor items { id column_values(ids: $c) { text } } }
+  %s
+}""" % _KOMPLEKSITET
+
+
+class _UsikkertResultat(Exception):
+    """Kallet kan ha blitt utført av Monday selv om svaret ikke kom frem."""
+
+
+class _AvvistAvMonday(RuntimeError):
+    """Monday avviste innholdet i kallet, f.eks. en ugyldig kolonneverdi, uten å si hvilket felt som var feil."""
+
+
+def monday_verdi(verdi):
+    """
+    Gjør om en verdi fra Monday-importen til teksten som sendes i column_values.
+
+    :param verdi: Verdien fra raden.
+    :return: Tekst. Tomme verdier gir "", så kolonnen tømmes ved oppdatering.
+    """
+    if verdi is None or (isinstance(verdi, float) and math.isnan(verdi)):
+        return ""
+    if isinstance(verdi, (list, tuple)):
+        return ", ".join(str(v) for v in verdi)
+    if isinstance(verdi, float) and verdi.is_integer():
+        return str(int(verdi))
+    return str(verdi)
+
+
+def les_kolonnekart(filsti):
+    """
+    Leser hvilken Monday-kolonne hver kolonne i importen skal til.
+
+    :param filsti: JSON-fil med {"kolonnenavn i importen": "kolonne-ID i Monday"}.
+    :return: Dictionary med kolonnenavn -> kolonne-ID.
+    :raises ValueError: Hvis filen ikke inneholder et slikt objekt.
+    """
+    with open(filsti, encoding="utf-8") as f:
+        kolonnekart = json.load(f)
+    if not isinstance(kolonnekart, dict) or not all(isinstance(v, str) for v in kolonnekart.values()):
+        raise ValueError(f"{filsti} må inneholde et JSON-objekt med kolonnenavn -> Monday-kolonne-ID.")
+    return kolonnekart
+
+
+class MondayKlient:
+    """
+    Klient for Monday sitt GraphQL-API med et begrenset antall gjenbrukte tilkoblinger.
+
+    Kall som Monday avviser på grunn av kompleksitetsbudsjettet eller rate limits, sendes på nytt
+    etter ventetiden Monday oppgir. Ventetiden gjelder alle tråder som bruker klienten, mens
+    nettverks- og serverfeil gir eksponentiell ventetid bare for kallet som feilet. Når
+    budsjettet fra forrige svar ikke rekker til et nytt kall av samme størrelse, ventes det til
+    budsjettet fornyes før kallet sendes.
+    """
+
+    def __init__(self, token, url=MONDAY_API_URL, antall_tilkoblinger=ANTALL_TILKOBLINGER,
+                 maks_forsok=MAKS_FORSOK, tidsavbrudd=60):
+        """
+        :param token: API-token, se TOKEN_MILJOVARIABEL.
+        :param url: API-adressen, f.eks. en lokal testserver.
+        :param antall_tilkoblinger: Maks antall åpne tilkoblinger, og maks antall samtidige kall.
+        :param maks_forsok: Antall forsøk per kall.
+        :param tidsavbrudd: Sekunder før et kall regnes som feilet.
+        """
+        self.url = url
+        self.antall_tilkoblinger = antall_tilkoblinger
+        self.maks_forsok = maks_forsok
+        self.tidsavbrudd = tidsavbrudd
+        self.session = requests.Session()
+        # pool_block gjør at tråder venter på en ledig tilkobling i stedet for å åpne flere
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=antall_tilkoblinger, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": token, "API-Version": MONDAY_API_VERSJON})
+
+        self.antall_kall = 0
+        self.antall_begrenset = 0
+        self.antall_feil = 0
+        self._lock = threading.Lock()
+        self._pause_til = 0.0
+        self._budsjett = None
+        self._siste_kostnad = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.lukk()
+
+    def lukk(self):
+        """Lukker tilkoblingene."""
+        self.session.close()
+
+    def utfor(self, query, variabler=None, kan_gjentas=True, feil_per_alias=None):
+        """
+        Sender ett GraphQL-kall.
+
+        :param query: GraphQL-dokumentet.
+        :param variabler: Variablene til dokumentet.
+        :param kan_gjentas: Sett til False for kall som ikke må utføres to ganger, f.eks. create_item.
+                            Da sendes kallet bare på nytt når Monday har avvist det.
+        :param feil_per_alias: Dictionary som fylles med alias -> feilmelding når Monday bare avviser enkelte
+                               felt i kallet. Da returneres data for resten av feltene i stedet for å kaste feil.
+        :return: "data" fra svaret.
+        :raises _UsikkertResultat: Hvis kan_gjentas er False og kallet kan ha blitt utført uten at svaret kom frem.
+        :raises RuntimeError: Ved feil fra Monday, eller når alle forsøkene er brukt opp.
+        """
+        for forsok in range(1, self.maks_forsok + 1):
+            self._vent()
+            with self._lock:
+                self.antall_kall += 1
+            try:
+                svar = self.session.post(self.url, json={"query": query, "variables": variabler or {}},
+                                         timeout=self.tidsavbrudd)
+            except requests.ConnectTimeout:
+                # Tilkoblingen ble aldri opprettet, så kallet er ikke utført
+                self._feilet(forsok)
+                continue
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not kan_gjentas:
+                    raise _UsikkertResultat(str(e)) from e
+                self._feilet(forsok)
+                continue
+
+            if svar.status_code == 429:
+                self._begrenset(_tall(svar.headers.get("Retry-After")) or _backoff(forsok))
+                continue
+            if svar.status_code >= 500:
+                if not kan_gjentas:
+                    raise _UsikkertResultat(f"HTTP {svar.status_code} fra Monday")
+                self._feilet(forsok)
+                continue
+
+            try:
+                innhold = svar.json()
+            except ValueError:
+                raise RuntimeError(f"Monday svarte med HTTP {svar.status_code}: {svar.text[:200]}") from None
+            feil = innhold.get("errors") or ([innhold] if "error_code" in innhold else [])
+            if feil:
+                ventetid = _ventetid_ved_begrensning(feil)
+                if ventetid is not None:
+                    self._begrenset(ventetid or _backoff(forsok))
+                    continue
+                if svar.status_code in (401, 403):
+                    raise RuntimeError(f"Monday svarte med HTTP {svar.status_code}: {_feilmelding(feil[0])}")
+                data = innhold.get("data")
+                if feil_per_alias is not None and isinstance(data, dict) and all(f.get("path") for f in feil):
+                    for f in feil:
+                        feil_per_alias[str(f["path"][0])] = _feilmelding(f)
+                    self._registrer_kompleksitet(data.get("complexity"))
+                    return data
+                raise _AvvistAvMonday("Monday svarte med feil: " + "; ".join(_feilmelding(f) for f in feil))
+            if svar.status_code >= 400:
+                raise RuntimeError(f"Monday svarte med HTTP {svar.status_code}: {svar.text[:200]}")
+
+            data = innhold.get("data") or {}
+            self._registrer_kompleksitet(data.get("complexity"))
+            return data
+        raise RuntimeError(f"Ga opp etter {self.maks_forsok} forsøk mot Monday.")
+
+    def _vent(self):
+        # Venter til pausen etter en avvisning er over, og til budsjettet rekker til et nytt kall
+        while True:
+            with self._lock:
+                na = time.monotonic()
+                ventetid = self._pause_til - na
+                if self._budsjett is not None:
+                    gjenstaende, fornyes = self._budsjett
+                    if fornyes <= na:
+                        self._budsjett = None
+                    elif gjenstaende < self._siste_kostnad:
+                        ventetid = max(ventetid, fornyes - na)
+            if ventetid <= 0:
+                return
+            time.sleep(ventetid)
+
+    def _pause(self, sekunder):
+        with self._lock:
+            self._pause_til = max(self._pause_til, time.monotonic() + sekunder)
+
+    def _begrenset(self, sekunder):
+        with self._lock:
+            self.antall_begrenset += 1
+        self._pause(sekunder)
+
+    def _feilet(self, forsok):
+        # Nettverks- og serverfeil gjelder bare dette kallet, så bare denne tråden venter
+        with self._lock:
+            self.antall_feil += 1
+        time.sleep(_backoff(forsok))
+
+    def _registrer_kompleksitet(self, kompleksitet):
+        if not kompleksitet:
+            return
+        with self._lock:
+            self._siste_kostnad = kompleksitet.get("query") or 0
+            if kompleksitet.get("after") is not None:
+                fornyes = time.monotonic() + (kompleksitet.get("reset_in_x_seconds") or 0)
+                self._budsjett = (kompleksitet["after"], fornyes)
+
+
+def _tall(tekst):
+    try:
+        return float(tekst)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(forsok):
+    # Eksponentiell ventetid med tilfeldig spredning, så samtidige tråder ikke prøver igjen i takt
+    return min(60.0, 2.0 ** (forsok - 1)) * random.uniform(0.5, 1.0)
+
+
+def _feilmelding(feil):
+    return feil.get("message") or feil.get("error_message") or str(feil)
+
+
+def _ventetid_ved_begrensning(feil):
+    # Returnerer ventetiden hvis feilene betyr at kallet ble avvist (0 hvis Monday ikke oppgir den), ellers None
+    ventetid = None
+    for f in feil:
+        utvidelser = f.get("extensions") or {}
+        kode = utvidelser.get("code") or f.get("error_code")
+        melding = f.get("message") or f.get("error_message") or ""
+        if kode not in _BEGRENSNINGSKODER and "budget exhausted" not in melding.lower():
+            return None
+        sekunder = utvidelser.get("retry_in_seconds")
+        if sekunder is None:
+            treff = _SEKUNDER_I_MELDING.search(melding)
+            sekunder = int(treff.group(1)) if treff else 0
+        ventetid = max(ventetid or 0, sekunder)
+    return ventetid
+
+
+def finn_eksisterende(klient, board_id, nokkelkolonne, ordrenumre):
+    """
+    Finner items som allerede finnes på boardet, ut fra Ordrenummer.
+
+    :param klient: MondayKlient.
+    :param board_id: Boardet.
+    :param nokkelkolonne: Kolonne-ID-en til Ordrenummer i Monday.
+    :param ordrenumre: Liste med ordrenumre som tekst.
+    :return: Dictionary med ordrenummer -> item-ID. Finnes det flere, brukes det første.
+    """
+    funnet = {}
+    for start in range(0, len(ordrenumre), OPPSLAG_STORRELSE):
+        kolonner = [{"column_id": nokkelkolonne, "column_values": ordrenumre[start:start + OPPSLAG_STORRELSE]}]
+        side = klient.utfor(_OPPSLAG, {"b": str(board_id), "k": kolonner, "c": [nokkelkolonne]})[
+            "items_page_by_column_values"]
+        while True:
+            for item in side["items"]:
+                if item["column_values"]:
+                    funnet.setdefault(item["column_values"][0]["text"], item["id"])
+            if not side.get("cursor"):
+                break
+            side = klient.utfor(_NESTE_SIDE, {"n": side["cursor"], "c": [nokkelkolonne]})["next_items_page"]
+    return funnet
+
+
+def _lag_mutasjon(board_id, poster):
+    # Lager ett GraphQL-dokument med create_item for nye og change_multiple_column_values for eksisterende items
+    deklarasjoner = ["$b: ID!"]
+    felt = []
+    variabler = {"b": str(board_id)}
+    for i, (_, item_id, navn, verdier) in enumerate(poster):
+        deklarasjoner.append(f"$v{i}: JSON!")
+        if item_id is None:
+            variabler[f"n{i}"] = navn
+            variabler[f"v{i}"] = json.dumps(verdier, ensure_ascii=False)
+            deklarasjoner.append(f"$n{i}: String!")
+            felt.append(f"m{i}: create_item(board_id: $b, item_name: $n{i}, column_values: $v{i}, "
+                        f"create_labels_if_missing: true) {{ id }}")
+        else:
+            variabler[f"i{i}"] = str(item_id)
+            variabler[f"v{i}"] = json.dumps(dict(verdier, name=navn), ensure_ascii=False)
+            deklarasjoner.append(f"$i{i}: ID!")
+            felt.append(f"m{i}: change_multiple_column_values(item_id: $i{i}, board_id: $b, column_values: $v{i}, "
+                        f"create_labels_if_missing: true) {{ id }}")
+    query = f"mutation ({', '.join(deklarasjoner)}) {{\n  " + "\n  ".join(felt) + f"\n  {_KOMPLEKSITET}\n}}"
+    return query, variabler
+
+
+def _send_batch(klient, board_id, nokkelkolonne, rader, eksisterende):
+    # Sender én batch og returnerer (opprettet, oppdatert, feilet), der feilet er (ordrenummer, melding)
+    # for radene Monday avviste. Etter et usikkert resultat slås radene opp igjen, så items som ble
+    # opprettet likevel, oppdateres i stedet for å opprettes på nytt.
+    for forsok in range(1, klient.maks_forsok + 1):
+        poster = [(ordrenummer, eksisterende.get(ordrenummer), navn, verdier) for ordrenummer, navn, verdier in rader]
+        query, variabler = _lag_mutasjon(board_id, poster)
+        feil_per_alias = {}
+        try:
+            data = klient.utfor(query, variabler, kan_gjentas=False, feil_per_alias=feil_per_alias)
+        except _UsikkertResultat:
+            klient._feilet(forsok)
+            eksisterende.update(finn_eksisterende(klient, board_id, nokkelkolonne, [rad[0] for rad in rader]))
+            continue
+        except _AvvistAvMonday as e:
+            if len(rader) == 1:
+                return 0, 0, [(rader[0][0], str(e))]
+            # Monday sier ikke hvilken rad som var feil, og radene før den kan være utført. Slå opp
+            # radene igjen og send halvdelene hver for seg, til den feilende raden står alene.
+            eksisterende.update(finn_eksisterende(klient, board_id, nokkelkolonne, [rad[0] for rad in rader]))
+            midten = len(rader) // 2
+            forste = _send_batch(klient, board_id, nokkelkolonne, rader[:midten], eksisterende)
+            andre = _send_batch(klient, board_id, nokkelkolonne, rader[midten:], eksisterende)
+            return forste[0] + andre[0], forste[1] + andre[1], forste[2] + andre[2]
+        opprettet = oppdatert = 0
+        feilet = []
+        for i, (ordrenummer, item_id, _, _) in enumerate(poster):
+            svar = data.get(f"m{i}")
+            if not svar:
+                feilet.append((ordrenummer, feil_per_alias.get(f"m{i}", "Monday returnerte ikke noe item.")))
+            elif item_id is None:
+                eksisterende[ordrenummer] = svar["id"]
+                opprettet += 1
+            else:
+                oppdatert += 1
+        return opprettet, oppdatert, feilet
+    raise RuntimeError(f"Ga opp å sende {len(rader)} rader til Monday etter {klient.maks_forsok} forsøk.")
+
+
+def send_til_monday(df, klient, board_id, kolonnekart, batchstorrelse=STANDARD_BATCHSTORRELSE):
+    """
+    Oppretter eller oppdaterer ett item per rad på et Monday-board.
+
+    Ordrenummer er nøkkelen: rader med et ordrenummer som allerede finnes på boardet, oppdaterer
+    det itemet, så en ny kjøring aldri lager duplikater. Radene sendes i batcher med flere mutasjoner
+    per kall, med opptil klient.antall_tilkoblinger kall samtidig. Batchstørrelsen halveres når
+    Monday begrenser, og økes med én for hver batch som går gjennom. Rader som Monday avviser,
+    f.eks. på grunn av en ugyldig kolonneverdi, rapporteres i 'feilet' mens resten sendes som vanlig.
+
+    :param df: DataFrame med Monday-importen. Item-navnet hentes fra 'Item'.
+    :param klient: MondayKlient.
+    :param board_id: Boardet.
+    :param kolonnekart: Dictionary med kolonnenavn i importen -> kolonne-ID i Monday. Må inneholde Ordrenummer.
+    :param batchstorrelse: Antall rader i den første batchen.
+    :return: Dictionary med antall opprettet, oppdatert og uten_ordrenummer, feilet som liste med
+             (ordrenummer, melding) for avviste rader, og kall, begrenset og feil fra klienten.
+    :raises ValueError: Hvis kolonnekartet mangler Ordrenummer.
+    """
+    if "Ordrenummer" not in kolonnekart:
+        raise ValueError("Kolonnekartet mangler Ordrenummer, som brukes til å finne eksisterende items.")
+    nokkelkolonne = kolonnekart["Ordrenummer"]
+
+    # Siste rad per ordrenummer, så samme ordre ikke opprettes to ganger i samme kjøring
+    rader = {}
+    uten_ordrenummer = 0
+    for rad in df.to_dict("records"):
+        ordrenummer = monday_verdi(rad.get("Ordrenummer"))
+        if not ordrenummer:
+            uten_ordrenummer += 1
+            continue
+        verdier = {monday_id: monday_verdi(rad.get(kolonne)) for kolonne, monday_id in kolonnekart.items()}
+        rader[ordrenummer] = (ordrenummer, monday_verdi(rad.get("Item")) or ordrenummer, verdier)
+    rader = list(rader.values())
+
+    eksisterende = finn_eksisterende(klient, board_id, nokkelkolonne, [rad[0] for rad in rader])
+
+    opprettet = oppdatert = 0
+    feilet = []
+    posisjon = 0
+    with ThreadPoolExecutor(max_workers=klient.antall_tilkoblinger) as pool:
+        underveis = {}
+        while posisjon < len(rader) or underveis:
+            while posisjon < len(rader) and len(underveis) < klient.antall_tilkoblinger:
+                batch = rader[posisjon:posisjon + batchstorrelse]
+                posisjon += len(batch)
+                fremtid = pool.submit(_send_batch, klient, board_id, nokkelkolonne, batch, eksisterende)
+                underveis[fremtid] = klient.antall_begrenset
+            ferdige, _ = wait(underveis, return_when=FIRST_COMPLETED)
+            for fremtid in ferdige:
+                begrenset_for = underveis.pop(fremtid)
+                batch_opprettet, batch_oppdatert, batch_feilet = fremtid.result()
+                opprettet += batch_opprettet
+                oppdatert += batch_oppdatert
+                feilet.extend(batch_feilet)
+                if klient.antall_begrenset > begrenset_for:
+                    batchstorrelse = max(1, batchstorrelse // 2)
+                else:
+                    batchstorrelse = min(MAKS_BATCHSTORRELSE, batchstorrelse + 1)
+
+    return {"opprettet": opprettet, "oppdatert": oppdatert, "uten_ordrenummer": uten_ordrenummer,
+            "feilet": feilet, "kall": klient.antall_kall, "begrenset": klient.antall_begrenset, "feil": klient.antall_feil}
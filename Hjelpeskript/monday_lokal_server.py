@@ -0,0 +1,259 @@
+"""
+Lokal stand-in for Monday sitt GraphQL-API, til å teste send_til_monday uten nettverk.
+
+Serveren forstår bare dokumentene monday_api sender: oppslag med items_page_by_column_values
+og next_items_page, og mutasjoner med create_item og change_multiple_column_values. Den har et
+kompleksitetsbudsjett per tidsvindu som Monday, og kan legge inn forsinkelse og tilfeldige feil,
+både før og etter at et kall er utført. Kolonneverdier i ugyldige_verdier avvises med
+ColumnValueException, enten bare for den mutasjonen eller for hele kallet, se delvise_feil.
+
+Bruk:
+    python -m Hjelpeskript.monday_lokal_server [--port 8765] [--budsjett 1000000] [--feilrate 0.05]
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_OPPRETT = re.compile(r"(\w+): create_item\(board_id: \$(\w+), item_name: \$(\w+), column_values: \$(\w+)")
+_ENDRE = re.compile(r"(\w+): change_multiple_column_values\(item_id: \$(\w+), board_id: \$(\w+), "
+                    r"column_values: \$(\w+)")
+_OPPSLAG = re.compile(r"items_page_by_column_values\(limit: (\d+), board_id: \$(\w+), columns: \$(\w+)\)"
+                      r".*?column_values\(ids: \$(\w+)\)", re.S)
+_NESTE_SIDE = re.compile(r"next_items_page\(limit: (\d+), cursor: \$(\w+)\).*?column_values\(ids: \$(\w+)\)", re.S)
+
+
+class LokalMonday:
+    """
+    Tilstanden til den lokale serveren: items per board, kompleksitetsbudsjett og feilinnstillinger.
+    """
+
+    def __init__(self, budsjett=1_000_000, vindu_sekunder=60, kostnad_mutasjon=10_000, kostnad_oppslag=1_000,
+                 feilrate=0.0, feilrate_etter=0.0, forsinkelse=0.0, token=None, seed=None, ugyldige_verdier=(),
+                 delvise_feil=True):
+        """
+        :param budsjett: Kompleksitet per tidsvindu.
+        :param vindu_sekunder: Lengden på tidsvinduet før budsjettet fornyes.
+        :param kostnad_mutasjon: Kompleksitet per create_item/change_multiple_column_values.
+        :param kostnad_oppslag: Kompleksitet per oppslag.
+        :param feilrate: Andel kall som får HTTP 503 før de utføres.
+        :param feilrate_etter: Andel kall som utføres, men får HTTP 502, så klienten ikke vet at de gikk gjennom.
+        :param forsinkelse: Sekunder hvert kall tar.
+        :param token: Tokenet som kreves i Authorization. None godtar alle.
+        :param seed: Seed for de tilfeldige feilene.
+        :param ugyldige_verdier: Kolonneverdier som avvises med ColumnValueException.
+        :param delvise_feil: True gir feil med path per mutasjon og data for resten, som GraphQL. False gir
+                             én feil uten path for hele kallet, der mutasjonene før den feilende er utført.
+        """
+        self.budsjett = budsjett
+        self.vindu_sekunder = vindu_sekunder
+        self.kostnad_mutasjon = kostnad_mutasjon
+        self.kostnad_oppslag = kostnad_oppslag
+        self.feilrate = feilrate
+        self.feilrate_etter = feilrate_etter
+        self.forsinkelse = forsinkelse
+        self.token = token
+        self.ugyldige_verdier = set(ugyldige_verdier)
+        self.delvise_feil = delvise_feil
+        self.items = {}
+        self.antall_kall = 0
+        self.antall_avvist = 0
+        self.antall_feil = 0
+        self._lock = threading.Lock()
+        self._tilfeldig = random.Random(seed)
+        self._id = itertools.count(1)
+        self._sider = {}
+        self._vindu_start = time.monotonic()
+        self._brukt = 0
+
+    def items_pa_board(self, board_id):
+        """Returnerer items på boardet som liste med {"id", "name", "verdier"}."""
+        with self._lock:
+            return [dict(item, id=item_id) for item_id, item in self.items.items() if item["board"] == str(board_id)]
+
+    def behandle(self, query, variabler):
+        """
+        Behandler ett GraphQL-kall.
+
+        :return: Tuple med (HTTP-status, svar som dictionary).
+        """
+        with self._lock:
+            self.antall_kall += 1
+            if self._tilfeldig.random() < self.feilrate:
+                self.antall_feil += 1
+                return 503, {"error_message": "Service unavailable"}
+
+            opprett = _OPPRETT.findall(query)
+            endre = _ENDRE.findall(query)
+            oppslag = _OPPSLAG.search(query)
+            neste_side = _NESTE_SIDE.search(query)
+            kostnad = (len(opprett) + len(endre)) * self.kostnad_mutasjon
+            if oppslag or neste_side:
+                kostnad += self.kostnad_oppslag
+
+            na = time.monotonic()
+            if na - self._vindu_start >= self.vindu_sekunder:
+                self._vindu_start = na
+                self._brukt = 0
+            fornyes = self.vindu_sekunder - (na - self._vindu_start)
+            if self._brukt + kostnad > self.budsjett:
+                self.antall_avvist += 1
+                return 200, {"errors": [{
+                    "message": "Complexity budget exhausted",
+                    "extensions": {"code": "COMPLEXITY_BUDGET_EXHAUSTED", "retry_in_seconds": math.ceil(fornyes)},
+                }]}
+            self._brukt += kostnad
+
+            data = {}
+            feil = []
+            for alias, board, navn, verdier in opprett:
+                nye = json.loads(variabler[verdier])
+                avvist = self._avvis(alias, nye, None)
+                if avvist:
+                    if not self.delvise_feil:
+                        return 200, avvist
+                    feil.append(avvist)
+                    data[alias] = None
+                    continue
+                item_id = str(next(self._id))
+                self.items[item_id] = {"board": str(variabler[board]), "name": variabler[navn], "verdier": nye}
+                data[alias] = {"id": item_id}
+            for alias, item_id, board, verdier in endre:
+                nye = json.loads(variabler[verdier])
+                item = self.items.get(str(variabler[item_id]))
+                if item is None or item["board"] != str(variabler[board]):
+                    avvist = self._avvis(alias, nye, variabler[item_id])
+                else:
+                    avvist = self._avvis(alias, nye, None)
+                if avvist:
+                    if not self.delvise_feil:
+                        return 200, avvist
+                    feil.append(avvist)
+                    data[alias] = None
+                    continue
+                item["name"] = nye.pop("name", item["name"])
+                item["verdier"].update(nye)
+                data[alias] = {"id": variabler[item_id]}
+            if oppslag:
+                grense, board, kolonner, ider = oppslag.groups()
+                treff = self._finn(str(variabler[board]), variabler[kolonner])
+                data["items_page_by_column_values"] = self._side(treff, int(grense), variabler[ider])
+            if neste_side:
+                grense, markor, ider = neste_side.groups()
+                data["next_items_page"] = self._side(self._sider.pop(variabler[markor], []), int(grense),
+                                                     variabler[ider])
+            data["complexity"] = {"query": kostnad, "after": self.budsjett - self._brukt,
+                                  "reset_in_x_seconds": math.ceil(fornyes)}
+
+            if self._tilfeldig.random() < self.feilrate_etter:
+                self.antall_feil += 1
+                return 502, {"error_message": "Bad gateway"}
+            if feil:
+                return 200, {"data": data, "errors": feil}
+            return 200, {"data": data}
+
+    def _avvis(self, alias, verdier, mangler_item):
+        # Feilen for en mutasjon med ugyldig verdi eller et item som ikke finnes, eller None hvis den er gyldig
+        if mangler_item is not None:
+            kode, melding = "InvalidItemIdException", f"Item {mangler_item} finnes ikke"
+        else:
+            ugyldige = [kolonne for kolonne, verdi in verdier.items() if verdi in self.ugyldige_verdier]
+            if not ugyldige:
+                return None
+            kode, melding = "ColumnValueException", f"Ugyldig verdi i kolonne {ugyldige[0]}"
+        if self.delvise_feil:
+            return {"message": melding, "path": [alias], "extensions": {"code": kode}}
+        return {"error_code": kode, "error_message": melding, "status_code": 200}
+
+    def _finn(self, board, kolonner):
+        # Items på boardet der alle kolonnene har en av verdiene
+        return [
+            (item_id, item) for item_id, item in self.items.items()
+            if item["board"] == board and all(
+                item["verdier"].get(k["column_id"]) in k["column_values"] for k in kolonner)
+        ]
+
+    def _side(self, treff, grense, ider):
+        markor = None
+        if len(treff) > grense:
+            markor = uuid.uuid4().hex
+            self._sider[markor] = treff[grense:]
+        items = [{"id": item_id, "column_values": [{"id": i, "text": item["verdier"].get(i, "")} for i in ider]}
+                 for item_id, item in treff[:grense]]
+        return {"cursor": markor, "items": items}
+
+
+def _lag_handler(tilstand):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            innhold = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if tilstand.forsinkelse:
+                time.sleep(tilstand.forsinkelse)
+            if tilstand.token is not None and self.headers.get("Authorization") != tilstand.token:
+                status, svar = 401, {"error_message": "Not Authenticated"}
+            else:
+                try:
+                    kall = json.loads(innhold)
+                    status, svar = tilstand.behandle(kall["query"], kall.get("variables") or {})
+                except (ValueError, KeyError) as e:
+                    status, svar = 400, {"errors": [{"message": f"Ugyldig kall: {e}"}]}
+            data = json.dumps(svar).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_lokal_server(port=0, **innstillinger):
+    """
+    Starter den lokale serveren i en bakgrunnstråd.
+
+    :param port: Porten. 0 velger en ledig port.
+    :param innstillinger: Sendes til LokalMonday, f.eks. budsjett og feilrate.
+    :return: Tuple med (server, LokalMonday, URL). Stopp med server.shutdown().
+    """
+    tilstand = LokalMonday(**innstillinger)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _lag_handler(tilstand))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, tilstand, f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--budsjett", type=int, default=1_000_000, help="Kompleksitet per tidsvindu.")
+    parser.add_argument("--vindu", type=float, default=60, help="Sekunder før budsjettet fornyes.")
+    parser.add_argument("--feilrate", type=float, default=0.0, help="Andel kall som feiler før de utføres.")
+    parser.add_argument("--feilrate-etter", type=float, default=0.0,
+                        help="Andel kall som utføres, men der svaret er en feil.")
+    parser.add_argument("--forsinkelse", type=float, default=0.0, help="Sekunder hvert kall tar.")
+    args = parser.parse_args()
+
+    server, _, url = start_lokal_server(args.port, budsjett=args.budsjett, vindu_sekunder=args.vindu,
+                                        feilrate=args.feilrate, feilrate_etter=args.feilrate_etter,
+                                        forsinkelse=args.forsinkelse)
+    print(f"Lokal Monday-server på {url}. Avslutt med Ctrl+C.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
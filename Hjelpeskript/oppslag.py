@@ -0,0 +1,109 @@
+import math
+import unicodedata
+
+# Svenske/danske skrivemåter som skal treffe de norske bokstavene
+_TEGNVARIANTER = str.maketrans({"ä": "æ", "ö": "ø", "ǿ": "ø"})
+
+# Translitterasjoner som brukes når æøå er skrevet uten norske tegn
+_TRANSLITTERASJONER = (("aa", "å"), ("ae", "æ"), ("oe", "ø"))
+
+
+def normaliser_navn(navn):
+    """
+    Normaliserer et stedsnavn til en oppslagsnøkkel (små bokstaver, enkle mellomrom, NFC).
+
+    :param navn: Navn (str) eller None.
+    :return: Normalisert nøkkel (str) eller None hvis navnet mangler.
+    """
+    if not isinstance(navn, str):
+        return None
+    navn = unicodedata.normalize("NFC", navn).casefold()
+    navn = " ".join(navn.split()).translate(_TEGNVARIANTER)
+    return navn or None
+
+
+def translitterer(nokkel):
+    """Gjør om 'aa', 'ae' og 'oe' til 'å', 'æ' og 'ø' i en normalisert nøkkel."""
+    for fra, til in _TRANSLITTERASJONER:
+        nokkel = nokkel.replace(fra, til)
+    return nokkel
+
+
+def normaliser_postnummer(postnummer):
+    """
+    Normaliserer et postnummer til en firesifret streng med ledende nuller.
+
+    :param postnummer: Postnummer som str, int eller float (slik Excel leverer det).
+    :return: Postnummer (str), f.eks. '0150', eller None hvis det mangler.
+    """
+    if postnummer is None:
+        return None
+    if isinstance(postnummer, float):
+        if math.isnan(postnummer):
+            return None
+        postnummer = int(postnummer)
+    postnummer = str(postnummer).strip()
+    if postnummer.isdigit():
+        return postnummer.zfill(4)
+    return postnummer or None
+
+
+class Oppslagsindeks:
+    """
+    Ferdigbygd dictionary-oppslag fra en nøkkelkolonne til en verdikolonne.
+
+    Første forekomst av en nøkkel vinner, slik som `.values[0]` på et filtrert DataFrame.
+    Nøkler som ikke finnes huskes, slik at gjentatte bom ikke logges på nytt.
+    """
+
+    def __init__(self, nokler, verdier, normaliser, melding, stedsnavn=False):
+        """
+        :param nokler: Iterable med nøkler fra referansetabellen.
+        :param verdier: Iterable med verdier, i samme rekkefølge som nøklene.
+        :param normaliser: Funksjon som lager oppslagsnøkkel av en rå verdi.
+        :param melding: Format-streng som skrives ut første gang en nøkkel ikke finnes.
+        :param stedsnavn: Registrer også hver del av navn som 'Trondheim - Tråante',
+                          og godta 'aa'/'ae'/'oe' for 'å'/'æ'/'ø'.
+        """
+        self.normaliser = normaliser
+        self.melding = melding
+        self.indeks = {}
+        self.ikke_funnet = set()
+
+        par = [(normaliser(n), v) for n, v in zip(nokler, verdier)]
+        for nokkel, verdi in par:
+            if nokkel is not None:
+                self.indeks.setdefault(nokkel, verdi)
+
+        # Alias og translitterasjon skal aldri overstyre et eksakt navn
+        self.reserve = {}
+        if stedsnavn:
+            for nokkel, verdi in par:
+                if nokkel is not None and " - " in nokkel:
+                    for del_navn in nokkel.split(" - "):
+                        if del_navn not in self.indeks:
+                            self.reserve.setdefault(del_navn, verdi)
+            for nokkel, verdi in list(self.indeks.items()) + list(self.reserve.items()):
+                self.reserve.setdefault(translitterer(nokkel), verdi)
+
+    def finn(self, verdi):
+        """
+        Slår opp en verdi.
+
+        :param verdi: Rå oppslagsverdi, f.eks. kommunenavn eller postnummer.
+        :return: Verdien fra referansetabellen, eller None hvis den ikke finnes.
+        """
+        nokkel = self.normaliser(verdi)
+        if nokkel in self.indeks:
+            return self.indeks[nokkel]
+        if nokkel is not None and self.reserve:
+            if nokkel in self.reserve:
+                return self.reserve[nokkel]
+            translitterert = translitterer(nokkel)
+            if translitterert in self.reserve:
+                return self.reserve[translitterert]
+
+        if nokkel not in self.ikke_funnet:
+            self.ikke_funnet.add(nokkel)
+            print(self.melding.format(verdi))
+        return None
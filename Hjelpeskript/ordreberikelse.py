@@ -0,0 +1,258 @@
+from Hjelpeskript.kommune_til_fylke import finn_fylke
+from Hjelpeskript.fylke_kommune_entreprenor import finn_entreprenor
+from Hjelpeskript.produktprioritet import velg_hovedprodukter
+
+# Ordrestatuser fra WOC som skal med i Monday-importen og PDF-ene
+AKTUELLE_STATUSER = ['accepted', 'received', 'appointed']
+
+
+def er_aktuell_ordre(entry):
+    """
+    Sjekker om en work order skal med i Monday-importen og PDF-ene.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: True hvis supplier.contactPersons er tom og wocOrderStatus er en av AKTUELLE_STATUSER.
+    """
+    # Hopp over rader hvor supplier.contactPersons ikke er tom
+    if entry.get("supplier", {}).get("contactPersons"):
+        return False
+    return entry.get("wocOrderStatus", {}).lower() in AKTUELLE_STATUSER
+
+
+# Finne Item-navn
+def extract_item(entry):
+    user1_info = entry.get("detailedOrderInformation", {}).get("user1", {})
+    entr_title = entry.get("title")
+
+    if user1_info:
+        return user1_info.get("fullName")
+
+    cp_fullname = entry.get("connectionPoint", {}).get("fullName")
+    cp_id = entry.get("connectionPoint", {}).get("id")
+    detailed_aos = entry.get("detailedAreaOfSubject")
+    if entr_title.strip().endswith("OLT"):
+        return f"{cp_fullname}-{cp_id}-{detailed_aos}-OLT"
+
+    return f"{cp_fullname}-{cp_id}-{detailed_aos}"
+
+# WorkOrderAddress
+def extract_work_order_details(entry):
+    """
+    Henter adresse, kommune, fylke og koordinater fra første workOrderAddress.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: Dictionary med adresse (til Monday), kort_adresse (til PDF-filnavnet), post_nummer,
+             kommune, fylke, coordsys, x_koordinat og y_koordinat.
+    """
+    address_info = entry.get("workOrderAddress", [{}])
+    if not address_info:
+        return {
+            "adresse": "finner ikke addresse", "kort_adresse": "finner ikke addresse",
+            "post_nummer": None, "kommune": None, "fylke": finn_fylke("Mangler info"),
+            "coordsys": None, "x_koordinat": None, "y_koordinat": None,
+        }
+    work_order_address = address_info[0]
+
+    # Henter gateadresse eller matrikkeladresse
+    street_address = work_order_address.get("streetAddress", {})
+    if street_address:
+        municipality = street_address.get("municipalityName")
+        adr_step = f"{street_address.get('streetName', '')} {street_address.get('houseNumber', '')}"
+        house_char = street_address.get('houseChar', '')
+        if house_char:
+            adr_step += house_char
+        kort_adresse = adr_step
+        adresse = f"{adr_step}, {street_address.get('city')}, Norge"
+        post_nummer = street_address.get('postalCode')
+    else:
+        cadastral_unit = work_order_address.get('cadastralUnit', {})
+        municipality = cadastral_unit.get('municipalityName')
+        cadastral_unit_number = cadastral_unit.get('cadastralUnitNumber')
+        property_unit_number = cadastral_unit.get('propertyUnitNumber')
+        adresse = f"Gnr. {cadastral_unit_number} Bnr. {property_unit_number}"
+        kort_adresse = adresse
+        post_nummer = cadastral_unit.get('postalCode')
+
+    # Hent koordinater
+    coordinates = work_order_address.get("coordinates", {})
+
+    return {
+        "adresse": adresse,
+        "kort_adresse": kort_adresse,
+        "post_nummer": post_nummer,
+        "kommune": municipality,
+        # Hent fylke basert på kommunenavn
+        "fylke": finn_fylke(municipality),
+        "coordsys": coordinates.get("system"),
+        "x_koordinat": coordinates.get("x"),
+        "y_koordinat": coordinates.get("y"),
+    }
+
+# Ressurs-IDer og produktbeskrivelser fra serviceDetails
+def indekser_ressurser(entry):
+    """
+    Går gjennom serviceDetails én gang og lager et oppslag som alle ressursfunksjonene bruker.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: Dictionary med 'typer' (resourceType med strip og små bokstaver -> serviceDetails-linjene
+             med den typen, i samme rekkefølge som i ordren), 'andre' (tekst for ressurser som ikke er
+             CircuitId eller CustomerId) og 'beskrivelser' (productDescription som ikke er tomme).
+    """
+    typer = {}
+    andre = []
+    beskrivelser = []
+
+    service_details = entry.get("detailedOrderInformation", {}).get("serviceDetails", [])
+    if isinstance(service_details, list):
+        for d in service_details:
+            resource_type = d.get("resourceType", "").strip()
+            normalisert = resource_type.lower()
+
+            linjer = typer.get(normalisert)
+            if linjer is None:
+                typer[normalisert] = [d]
+            else:
+                linjer.append(d)
+
+            if normalisert != "circuitid" and normalisert != "customerid":
+                andre.append(f"{resource_type}: {d.get('resourceId', '').strip()}")
+
+            prod_dscr = d.get("productDescription")
+            if prod_dscr:  # Sikrer at None-verdier ikke legges til
+                beskrivelser.append(prod_dscr)
+
+    return {"typer": typer, "andre": andre, "beskrivelser": beskrivelser}
+
+
+def _forste_resource_id(linjer):
+    # Første resourceId som ikke er tom, uten mellomrom. None hvis ingen finnes.
+    for d in linjer:
+        resource_id = d.get("resourceId")
+        if resource_id:
+            return resource_id.strip()
+    return None
+
+# Sambandsnummer
+def extract_service_details(entry, item, ressurser=None):
+    """
+    Ekstraherer sambandsnummer og tilgjengelige ressurser fra detailedOrderInformation.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :param item: Valgfritt navn eller ID for logging hvis ingen sambandsnummer finnes.
+    :param ressurser: Ferdig oppslag fra indekser_ressurser. Lages hvis det ikke er gitt.
+    :return: Tuple med (sambandsnummer, available_resources).
+    """
+    if ressurser is None:
+        ressurser = indekser_ressurser(entry)
+    typer = ressurser["typer"]
+
+    # PRIORITET 1: Finn første CircuitId, PRIORITET 2: Finn første CustomerId
+    sambandsnummer = _forste_resource_id(typer.get("circuitid", ()))
+    if sambandsnummer is None:
+        sambandsnummer = _forste_resource_id(typer.get("customerid", ()))
+
+    # Andre ressurstyper, og DG i tillegg istedenfor å bruke det som sambandsnummer
+    available_resources = ressurser["andre"] + [
+        f"DG: {d.get('resourceId', '').strip()}" for d in typer.get("dg", ()) if d.get("resourceId")
+    ]
+
+    # Logging hvis ingen sambandsnummer er funnet
+    if not sambandsnummer:
+        print(f"\nIngen sambandsnummer funnet for: {item}")
+        print("Tilgjengelige nummer:", available_resources)
+
+    return sambandsnummer, available_resources
+
+# CircuitId og CustomerId slik de vises i PDF-en
+def extract_resource_id(entry, resource_type, ressurser=None):
+    """
+    Finner resourceId for første serviceDetails-linje med gitt resourceType.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :param resource_type: F.eks. 'CircuitId' eller 'CustomerId'.
+    :param ressurser: Ferdig oppslag fra indekser_ressurser. Lages hvis det ikke er gitt.
+    :return: resourceId (str), eller tom streng hvis ingen finnes.
+    """
+    if ressurser is None:
+        ressurser = indekser_ressurser(entry)
+    # Krever samme resourceType som gitt, ikke bare lik etter strip og små bokstaver
+    for sd in ressurser["typer"].get(resource_type.strip().lower(), ()):
+        if sd.get("resourceType") == resource_type:
+            return sd.get("resourceId", "")
+    return ""
+
+# Finn alle produkt-ID
+def extract_product_ids(entry):
+    """
+    Ekstraherer alle Produkt-IDer fra orderlines.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: Liste med Produkt-IDer (list) eller tom liste hvis ingen finnes.
+    """
+    orderlines_list = entry.get("orderlines", [{}])
+    orderlines_productId = []
+
+    if isinstance(orderlines_list, list):
+        for line in orderlines_list:
+            cp_id = line.get("contractorProductId")
+            if cp_id:  # Sjekk at verdien ikke er None eller tom
+                orderlines_productId.append(cp_id)
+
+    return orderlines_productId
+
+# Type oppdrag fra WOC
+def extract_woc_type_oppdrag(entry):
+    """
+    Ekstraherer type oppdrag fra WOC basert på orderlines.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: Liste med type oppdrag (list) eller tom liste hvis ingen finnes.
+    """
+    orderlines_list = entry.get("orderlines", [])
+    woc_type_oppdrag = []
+
+    if isinstance(orderlines_list, list):
+        for line in orderlines_list:
+            typop_id = line.get("description")
+            if typop_id and line.get("isMainProduct") is True:
+                woc_type_oppdrag.append(typop_id)
+
+    return woc_type_oppdrag
+
+
+def berik_ordrer(json_data):
+    """
+    Filtrerer og beriker work orders én gang, til bruk i både Monday-importen og PDF-ene.
+
+    Adresse, fylke, entreprenør, ressurs-IDer og hovedprodukt slås opp én gang per ordre.
+    serviceDetails gås gjennom én gang, og oppslaget lagres i 'ressurser' til resten av ressursfeltene.
+
+    :param json_data: Liste med work orders, f.eks. en blokk fra les_work_orders.
+    :return: Liste med én dictionary per aktuell ordre. 'entry' er den opprinnelige ordren.
+    """
+    entries = [entry for entry in json_data if er_aktuell_ordre(entry)]
+
+    # Produkt-ID og type oppdrag fra WOC for alle ordrene
+    alle_product_ids = [extract_product_ids(entry) for entry in entries]
+    alle_woc_type_oppdrag = [extract_woc_type_oppdrag(entry) for entry in entries]
+
+    # Finner Produkt-ID med høyeste prioritet for alle ordrene i én omgang
+    alle_hovedprodukter = velg_hovedprodukter(zip(alle_product_ids, alle_woc_type_oppdrag))
+
+    ordrer = []
+    for entry, product_ids, woc_type_oppdrag, hovedprodukt in zip(
+            entries, alle_product_ids, alle_woc_type_oppdrag, alle_hovedprodukter):
+        item = extract_item(entry)
+        ordre = {"entry": entry, "item": item}
+        ordre.update(extract_work_order_details(entry))
+        ordre["entreprenor"] = finn_entreprenor(ordre["post_nummer"])
+        ressurser = indekser_ressurser(entry)
+        ordre["ressurser"] = ressurser
+        ordre["sambandsnummer"], ordre["available_resources"] = extract_service_details(entry, item, ressurser)
+        ordre["circuit_id"] = extract_resource_id(entry, "CircuitId", ressurser)
+        ordre["customer_id"] = extract_resource_id(entry, "CustomerId", ressurser)
+        ordre["product_ids"] = product_ids
+        ordre["woc_type_oppdrag"] = woc_type_oppdrag
+        ordre["hovedprodukt"] = hovedprodukt
+        ordrer.append(ordre)
+    return ordrer
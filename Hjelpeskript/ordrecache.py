@@ -0,0 +1,153 @@
+import functools
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+
+from Hjelpeskript.referansedata import DATAFILER_MAPPE, PROSJEKT_MAPPE
+from Hjelpeskript.tilstandslager import innholdshash
+
+# Mappen med ferdige Monday-rader og PDF-utkast per ordre. Ligger sammen med snapshotet, utenfor git.
+ORDRECACHE_MAPPE = os.path.join(DATAFILER_MAPPE, ".cache", "ordrer")
+
+# Maks samlet størrelse på cachen. Filene som er brukt minst nylig slettes først.
+ORDRECACHE_MAKS_BYTES = 256 * 1024 * 1024
+
+# Når cachen er full, ryddes det ned til denne andelen av maks størrelse
+_RYDD_TIL_ANDEL = 0.9
+
+
+@functools.lru_cache(maxsize=1)
+def kodeversjon():
+    """
+    Returnerer en kort versjonsstreng som endres når Python-koden i prosjektet endres.
+
+    :return: Heksadesimal streng.
+    """
+    sha = hashlib.sha256()
+    filer = glob.glob(os.path.join(PROSJEKT_MAPPE, "*.py")) + glob.glob(os.path.join(PROSJEKT_MAPPE, "Hjelpeskript", "*.py"))
+    for filsti in sorted(filer):
+        sha.update(os.path.relpath(filsti, PROSJEKT_MAPPE).encode("utf-8"))
+        with open(filsti, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:16]
+
+
+class Ordrecache:
+    """
+    Cache på disk med ferdig Monday-rad og PDF-utkast per ordre.
+
+    Nøkkelen er en hash av hele ordren, referansedata-versjonen og kodeversjonen, så en ordre
+    som ikke er endret gir treff også i en annen eksport. Hver ordre lagres i en egen fil, og
+    når cachen blir større enn maks størrelse slettes filene som er brukt minst nylig.
+
+    PDF-en lagres som utkast uten tidspunktet i toppteksten (se lag_pdf_utkast), og ferdigstilles
+    med tidspunktet for kjøringen som henter den, så et treff aldri gir en PDF med gammelt tidspunkt.
+    """
+
+    def __init__(self, mappe=ORDRECACHE_MAPPE, maks_bytes=ORDRECACHE_MAKS_BYTES, versjon=""):
+        """
+        :param mappe: Mappen cachen lagres i. Opprettes hvis den ikke finnes.
+        :param maks_bytes: Maks samlet størrelse på cachen.
+        :param versjon: Versjon av referansedata e.l. som påvirker resultatet, i tillegg til koden.
+        """
+        self.mappe = mappe
+        self.maks_bytes = maks_bytes
+        self.versjon = f"{kodeversjon()}:{versjon}"
+        self.treff = 0
+        self.bom = 0
+        os.makedirs(mappe, exist_ok=True)
+        self.storrelse = sum(os.path.getsize(f) for f in self._filer())
+
+    def nokkel(self, entry):
+        """
+        Lager cache-nøkkelen for en work order.
+
+        :param entry: Dictionary som inneholder ordredata.
+        :return: Heksadesimal SHA-256.
+        """
+        return hashlib.sha256(f"{self.versjon}:{innholdshash(entry)}".encode("utf-8")).hexdigest()
+
+    def hent(self, nokkel, med_pdf=True):
+        """
+        Henter ferdig resultat for en ordre.
+
+        :param nokkel: Nøkkel fra nokkel().
+        :param med_pdf: Krev at PDF-utkastet også finnes i cachen.
+        :return: Tuple med (Monday-rad, utkast fra lag_pdf_utkast eller None), eller None ved bom.
+        """
+        filsti = self._filsti(nokkel)
+        try:
+            with open(filsti, "rb") as f:
+                rad, pdf = pickle.load(f)
+            # Oppdaterer endringstiden, som brukes til å finne filene som er brukt minst nylig
+            os.utime(filsti)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.bom += 1
+            return None
+        if med_pdf and pdf is None:
+            self.bom += 1
+            return None
+        self.treff += 1
+        return rad, pdf
+
+    def lagre(self, nokkel, rad, pdf):
+        """
+        Lagrer resultatet for en ordre.
+
+        :param nokkel: Nøkkel fra nokkel().
+        :param rad: Monday-raden, uten Ordreverdi.
+        :param pdf: Utkast fra lag_pdf_utkast, eller None hvis PDF ikke er laget.
+        """
+        filsti = self._filsti(nokkel)
+        os.makedirs(os.path.dirname(filsti), exist_ok=True)
+        data = pickle.dumps((rad, pdf), protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Skriv til en midlertidig fil først, så andre prosesser aldri leser en halvskrevet fil
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filsti), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, filsti)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        self.storrelse += len(data)
+        if self.storrelse > self.maks_bytes:
+            self.rydd()
+
+    def rydd(self):
+        """Sletter filene som er brukt minst nylig til cachen er under maks størrelse igjen."""
+        filer = []
+        for filsti in self._filer():
+            try:
+                stat = os.stat(filsti)
+            except FileNotFoundError:
+                continue
+            filer.append((stat.st_mtime, stat.st_size, filsti))
+        filer.sort()
+
+        self.storrelse = sum(storrelse for _, storrelse, _ in filer)
+        grense = self.maks_bytes * _RYDD_TIL_ANDEL
+        for _, storrelse, filsti in filer:
+            if self.storrelse <= grense:
+                break
+            try:
+                os.remove(filsti)
+            except FileNotFoundError:
+                pass
+            self.storrelse -= storrelse
+
+    def oppsummering(self):
+        """Returnerer antall treff og bom siden cachen ble åpnet."""
+        return {"treff": self.treff, "bom": self.bom}
+
+    def _filsti(self, nokkel):
+        # To tegn per undermappe, så det ikke blir for mange filer i én mappe
+        return os.path.join(self.mappe, nokkel[:2], f"{nokkel}.pkl")
+
+    def _filer(self):
+        return glob.glob(os.path.join(self.mappe, "*", "*.pkl"))
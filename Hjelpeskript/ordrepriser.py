@@ -0,0 +1,75 @@
+import pandas as pd
+
+from Hjelpeskript.referansedata import hent_tabell
+
+# Fagområde -> enhetspris, bygges første gang den trengs
+_prisindeks = None
+
+
+def hent_prisindeks():
+    """Returnerer oppslag fra fagområde til enhetspris. Bygges én gang per prosess."""
+    global _prisindeks
+    if _prisindeks is None:
+        df = hent_tabell("ordrepriser")
+        _prisindeks = {}
+        for fagomrade, enhetspris in zip(df["Fagområde"], df["Enhetspris"]):
+            _prisindeks.setdefault(fagomrade, enhetspris)
+    return _prisindeks
+
+
+def korriger_fagomrader(fagomrader, prioriterte_product_ids):
+    """
+    Gjør om 'FTTH Service' til fagområdet som brukes i pristabellen, basert på hovedproduktet.
+
+    :param fagomrader: Series med Type FTTx.
+    :param prioriterte_product_ids: Series med hovedprodukt, samme indeks.
+    :return: Series med korrigerte fagområder.
+    """
+    produkt = prioriterte_product_ids.fillna("").astype(str).str.lower()
+    service = fagomrader == "FTTH Service"
+    aeg = service & produkt.str.contains("aeg", regex=False)
+    hjelpen = service & ~aeg & (
+        produkt.str.contains("installasjonshjelpen", regex=False)
+        | produkt.str.contains("eksperthjelpen", regex=False)
+    )
+    return fagomrader.mask(aeg, "AEG").mask(hjelpen, "FTTH Ekspert-/Installasjonshjelpen")
+
+
+def skriv_ukjente_fagomrader(ukjente):
+    """
+    Skriver ut fagområdene som ikke finnes i pristabellen, én linje per fagområde.
+
+    :param ukjente: Dictionary med fagområde -> antall ordre.
+    """
+    for fagomrade, antall in ukjente.items():
+        print(f"'{fagomrade}' ble ikke funnet i Ordrepriser WOC.xlsx ({antall} ordre).")
+
+
+def finn_ordrepriser(fagomrader, prioriterte_product_ids, ukjente=None):
+    """
+    Finner ordreverdi for alle ordrene i én vektorisert join mot pristabellen.
+
+    Fagområder som ikke finnes i Ordrepriser WOC.xlsx rapporteres én gang per unike verdi
+    og får tom ordreverdi.
+
+    :param fagomrader: Type FTTx per ordre (liste eller Series).
+    :param prioriterte_product_ids: Hovedprodukt per ordre (liste eller Series).
+    :param ukjente: Dictionary med fagområde -> antall ordre. Hvis gitt, legges ukjente fagområder
+                    til her i stedet for å skrives ut, så de kan rapporteres samlet for flere blokker
+                    med skriv_ukjente_fagomrader.
+    :return: Series med enhetspris per ordre, i samme rekkefølge.
+    """
+    fagomrader = pd.Series(list(fagomrader), dtype=object)
+    prioriterte_product_ids = pd.Series(list(prioriterte_product_ids), dtype=object)
+    fagomrader = korriger_fagomrader(fagomrader, prioriterte_product_ids)
+
+    prisindeks = hent_prisindeks()
+    ukjent = ~fagomrader.isin(list(prisindeks))
+    antall_ukjente = fagomrader[ukjent].map(str).value_counts(sort=False)
+    if ukjente is None:
+        skriv_ukjente_fagomrader(antall_ukjente)
+    else:
+        for fagomrade, antall in antall_ukjente.items():
+            ukjente[fagomrade] = ukjente.get(fagomrade, 0) + int(antall)
+
+    return fagomrader.map(prisindeks)
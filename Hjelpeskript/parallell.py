@@ -0,0 +1,110 @@
+import collections
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Hjelpeskript.add_days_to_date import norsk_arbeidsdagskalender
+from Hjelpeskript.fylke_kommune_entreprenor import hent_entreprenor_indeks
+from Hjelpeskript.kommune_til_fylke import hent_fylke_indeks
+from Hjelpeskript.poststed_til_kommune import hent_postnummer_indeks, hent_poststed_indeks
+from Hjelpeskript.produktprioritet import hent_beskrivelse_indeks, hent_prioritetsindeks
+from Hjelpeskript.referansedata import hent_referansedata
+
+# Antall aktuelle ordre per oppgave i prosesspoolen. Mindre enn BLOKKSTORRELSE, så også
+# små eksporter fordeles på flere arbeidsprosesser.
+ARBEIDER_BLOKKSTORRELSE = 100
+
+# Maks antall oppgaver som venter per arbeidsprosess, så eksporten fortsatt leses som en strøm
+_VENTENDE_PER_ARBEIDER = 2
+
+
+def antall_arbeidere_eller_standard(antall_arbeidere):
+    """
+    Gjør om antall arbeidsprosesser fra CLI/app til et tall.
+
+    :param antall_arbeidere: Antall prosesser, 0 eller None for antall CPU-er.
+    :return: Antall prosesser (minst 1).
+    """
+    if not antall_arbeidere:
+        return os.cpu_count() or 1
+    return max(1, int(antall_arbeidere))
+
+
+def prosesskontekst():
+    """
+    Velger hvordan arbeidsprosessene startes.
+
+    fork er ikke trygt fra en prosess med flere tråder, som Streamlit-serveren, fordi barnet kan arve
+    låser som holdes av andre tråder. Arbeidsprosessene startes derfor fra en egen forkserver der den
+    finnes, og ellers med spawn. Ingen av dem arver noe fra denne prosessen.
+
+    :return: Multiprocessing-kontekst.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def lag_pool(antall_arbeidere, initializer=None):
+    """
+    Starter en prosesspool med startmetoden fra prosesskontekst.
+
+    :param antall_arbeidere: Antall prosesser.
+    :param initializer: Funksjon som kjøres i hver arbeidsprosess når den starter.
+    :return: ProcessPoolExecutor. Brukes i en with-blokk.
+    """
+    return ProcessPoolExecutor(max_workers=antall_arbeidere, mp_context=prosesskontekst(), initializer=initializer)
+
+
+def forbered_oppslag():
+    """
+    Laster referansedata og bygger alle oppslagsindeksene i denne prosessen.
+
+    Brukes som initializer i arbeidsprosessene, så indeksene er klare før første oppgave.
+    """
+    # ordrepriser importerer pandas, så den importeres først her
+    from Hjelpeskript.ordrepriser import hent_prisindeks
+
+    hent_referansedata()
+    hent_fylke_indeks()
+    hent_entreprenor_indeks()
+    hent_poststed_indeks()
+    hent_postnummer_indeks()
+    hent_prioritetsindeks()
+    hent_prisindeks()
+    hent_beskrivelse_indeks()
+    norsk_arbeidsdagskalender()
+
+
+def lag_prosesspool(antall_arbeidere):
+    """
+    Starter en prosesspool der hver arbeidsprosess bygger referansedata og oppslagsindekser når den starter.
+
+    :param antall_arbeidere: Antall prosesser.
+    :return: ProcessPoolExecutor. Brukes i en with-blokk.
+    """
+    return lag_pool(antall_arbeidere, initializer=forbered_oppslag)
+
+
+def map_i_rekkefolge(pool, funksjon, oppgaver, antall_arbeidere):
+    """
+    Kjører funksjonen på hver oppgave i prosesspoolen og gir resultatene i samme rekkefølge som oppgavene.
+
+    I motsetning til pool.map leses ikke alle oppgavene på forhånd. Bare noen få oppgaver per
+    arbeidsprosess venter om gangen, så eksporten fortsatt kan leses som en strøm.
+
+    :param pool: ProcessPoolExecutor fra lag_prosesspool.
+    :param funksjon: Funksjon på toppnivå i en modul, så den kan sendes til arbeidsprosessene.
+    :param oppgaver: Iterable med (kontekst, argument). Bare argumentet sendes til arbeidsprosessen.
+    :param antall_arbeidere: Antall prosesser i poolen.
+    :return: Generator med (kontekst, resultat).
+    """
+    ventende = collections.deque()
+    for kontekst, argument in oppgaver:
+        ventende.append((kontekst, pool.submit(funksjon, argument)))
+        if len(ventende) >= antall_arbeidere * _VENTENDE_PER_ARBEIDER:
+            kontekst, fremtid = ventende.popleft()
+            yield kontekst, fremtid.result()
+    while ventende:
+        kontekst, fremtid = ventende.popleft()
+        yield kontekst, fremtid.result()
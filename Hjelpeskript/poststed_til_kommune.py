@@ -1,31 +1,41 @@
-import pandas as pd
-
-# Laste inn Excel-filen
-file_path = "Datafiler/Kommune_Fylke_Oversikt.xlsx"
-df = pd.read_excel(file_path, sheet_name="Postnummerregister")
-
-# Rense kolonnenavn
-df.columns = ["Postnummer","Poststed","Kommunenummer","Kommunenavn","Kategori"]
-
-
-# Funksjon for å finne fylke basert på kommunenavn
+from Hjelpeskript.oppslag import Oppslagsindeks, normaliser_navn, normaliser_postnummer
+from Hjelpeskript.referansedata import hent_tabell
+
+# Oppslag poststed -> kommunenavn og postnummer -> kommunenavn, bygges første gang de trengs
+_poststed_indeks = None
+_postnummer_indeks = None
+
+
+def hent_poststed_indeks():
+    """Returnerer oppslaget fra poststed til kommune. Tabellen lastes ved første oppslag."""
+    global _poststed_indeks
+    if _poststed_indeks is None:
+        df = hent_tabell("poststed_kommune")
+        _poststed_indeks = Oppslagsindeks(
+            df["Poststed"], df["Kommunenavn"], normaliser_navn,
+            "Fant ikke kommune for poststed: {}", stedsnavn=True,
+        )
+    return _poststed_indeks
+
+
+def hent_postnummer_indeks():
+    """Returnerer oppslaget fra postnummer til kommune. Tabellen lastes ved første oppslag."""
+    global _postnummer_indeks
+    if _postnummer_indeks is None:
+        df = hent_tabell("poststed_kommune")
+        _postnummer_indeks = Oppslagsindeks(
+            df["Postnummer"], df["Kommunenavn"], normaliser_postnummer,
+            "Fant ikke kommune for poststed: {}",
+        )
+    return _postnummer_indeks
+
+
+# Funksjon for å finne kommune basert på poststed
 def finn_kommune(poststed_navn):
-    resultat = df[df["Poststed"].str.lower() == poststed_navn.lower()]
-
-    if not resultat.empty:
-        return resultat["Kommunenavn"].values[0]
-    else:
-        print(f"Fant ikke kommune for poststed: {poststed_navn}")
-        return None
+    return hent_poststed_indeks().finn(poststed_navn)
 
 def finn_kommune_fra_postnr(poststnr):
-    resultat = df[df["Postnummer"] == poststnr]
-
-    if not resultat.empty:
-        return resultat["Kommunenavn"].values[0]
-    else:
-        print(f"Fant ikke kommune for poststed: {poststnr}")
-        return None
+    return hent_postnummer_indeks().finn(poststnr)
 
 #print(f"Kommune: {finn_kommune_fra_postnr(3285)}")
 # kommune_input = input("Skriv inn kommunenavn: ")
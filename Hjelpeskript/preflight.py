@@ -0,0 +1,63 @@
+import importlib
+import importlib.metadata
+import sys
+import time
+
+# (modulnavn, pakkenavn på PyPI) for pakkene appen trenger
+PAKKER = [
+    ("pandas", "pandas"),
+    ("numpy", "numpy"),
+    ("openpyxl", "openpyxl"),
+    ("streamlit", "streamlit"),
+    ("fpdf", "fpdf"),
+    ("dateutil", "python-dateutil"),
+]
+
+
+def sjekk_pakke(modulnavn, pakkenavn):
+    """
+    Sjekker at en pakke kan importeres, uten nettverkstilgang.
+
+    :param modulnavn: Navnet som brukes i import.
+    :param pakkenavn: Navnet på pakken på PyPI, brukes for å finne versjonen.
+    :return: Dictionary med modul, pakke, versjon, ok og eventuell feil.
+    """
+    try:
+        versjon = importlib.metadata.version(pakkenavn)
+    except importlib.metadata.PackageNotFoundError:
+        versjon = None
+
+    try:
+        importlib.import_module(modulnavn)
+        feil = None
+    except Exception as e:
+        feil = f"{type(e).__name__}: {e}"
+
+    return {"modul": modulnavn, "pakke": pakkenavn, "versjon": versjon, "ok": feil is None, "feil": feil}
+
+
+def kjor_preflight(pakker=PAKKER):
+    """
+    Sjekker alle pakkene appen trenger og måler hvor lang tid det tok.
+
+    :param pakker: Liste med (modulnavn, pakkenavn).
+    :return: Dictionary med 'pakker' (resultat per pakke), 'mangler' (pakkenavn som ikke kan
+             importeres), 'python' (versjon) og 'sekunder' (tid brukt på sjekken).
+    """
+    start = time.perf_counter()
+    resultater = [sjekk_pakke(modulnavn, pakkenavn) for modulnavn, pakkenavn in pakker]
+    return {
+        "pakker": resultater,
+        "mangler": [r["pakke"] for r in resultater if not r["ok"]],
+        "python": sys.version.split()[0],
+        "sekunder": time.perf_counter() - start,
+    }
+
+
+if __name__ == "__main__":
+    resultat = kjor_preflight()
+    for pakke in resultat["pakker"]:
+        status = pakke["versjon"] if pakke["ok"] else f"MANGLER ({pakke['feil']})"
+        print(f"{pakke['pakke']:<16} {status}")
+    print(f"Python {resultat['python']}, sjekket på {resultat['sekunder'] * 1000:.0f} ms")
+    sys.exit(1 if resultat["mangler"] else 0)
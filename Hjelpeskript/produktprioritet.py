@@ -0,0 +1,109 @@
+import math
+
+from Hjelpeskript.oppslag import Oppslagsindeks, normaliser_navn
+from Hjelpeskript.referansedata import hent_tabell
+
+# Produktkode -> (prioritering, radnummer, "kode: produkt"), bygges første gang den trengs
+_prioritetsindeks = None
+
+# Produktkode -> produktbeskrivelse (uavhengig av store/små bokstaver), bygges første gang den trengs
+_beskrivelse_indeks = None
+
+
+def bygg_prioritetsindeks(df):
+    """
+    Bygger oppslag fra produktkode til prioritet og visningsnavn.
+
+    Lavest prioritet vinner. Ved lik prioritet vinner raden som står først i tabellen,
+    slik som idxmin på det filtrerte DataFrame-et.
+
+    :param df: Tabellen fra WOC_Prioritering_Produktkategorier.xlsx.
+    :return: Dictionary med produktkode -> (prioritering, radnummer, "kode: produkt").
+    """
+    indeks = {}
+    rader = zip(df["Prioritering"], df["Produktkode"], df["Produkt"])
+    for radnummer, (prioritering, kode, produkt) in enumerate(rader):
+        # Rader uten prioritet, kode eller produktnavn kan aldri bli valgt
+        if isinstance(prioritering, float) and math.isnan(prioritering):
+            continue
+        if not isinstance(kode, str) or not isinstance(produkt, str):
+            continue
+        kandidat = (prioritering, radnummer, f"{kode}: {produkt}")
+        if kode not in indeks or kandidat < indeks[kode]:
+            indeks[kode] = kandidat
+    return indeks
+
+
+def hent_prioritetsindeks():
+    """Returnerer prioritetsindeksen. Bygges én gang per prosess."""
+    global _prioritetsindeks
+    if _prioritetsindeks is None:
+        _prioritetsindeks = bygg_prioritetsindeks(hent_tabell("produktprioritet"))
+    return _prioritetsindeks
+
+
+def hent_beskrivelse_indeks():
+    """Returnerer oppslaget fra produktkode til produktbeskrivelse. Bygges én gang per prosess."""
+    global _beskrivelse_indeks
+    if _beskrivelse_indeks is None:
+        df = hent_tabell("produktprioritet")
+        _beskrivelse_indeks = Oppslagsindeks(
+            df["Produktkode"], df["Produkt"], normaliser_navn,
+            "Fant ikke produktbeskrivelse for: {}",
+        )
+    return _beskrivelse_indeks
+
+
+def finn_produktbeskrivelse(produkt_id):
+    """
+    Finner produktbeskrivelsen for en produktkode.
+
+    :param produkt_id: Produktkode, f.eks. 'LVK0'.
+    :return: Produktbeskrivelse (str) eller None hvis koden ikke finnes.
+    """
+    return hent_beskrivelse_indeks().finn(produkt_id)
+
+
+def velg_hovedprodukt(product_codes, woc_type_oppdrag, indeks=None):
+    """
+    Finner produktkoden med høyest prioritet (lavest tall i 'Prioritering').
+
+    :param product_codes: Liste med Produkt-IDer fra orderlines.
+    :param woc_type_oppdrag: Liste med type oppdrag fra WOC (hovedprodukter).
+    :param indeks: Prioritetsindeks, standard er den delte indeksen.
+    :return: "kode: produkt" hvis en av kodene er prioritert, ellers første type oppdrag
+             fra WOC, ellers første produktkode. Tom streng hvis ordren ikke har produkter.
+    """
+    if indeks is None:
+        indeks = hent_prioritetsindeks()
+
+    treff = [indeks[kode] for kode in product_codes if kode in indeks]
+    if treff:
+        return min(treff)[2]
+
+    print(f"Produkt ikke i liste: {product_codes}")
+    if woc_type_oppdrag:
+        return woc_type_oppdrag[0]
+    if product_codes:
+        return product_codes[0]
+    return ""
+
+
+def velg_hovedprodukter(ordre):
+    """
+    Finner hovedprodukt for alle ordrene i én omgang.
+
+    Like kombinasjoner av produktkoder og type oppdrag slås bare opp én gang.
+
+    :param ordre: Iterable med (product_codes, woc_type_oppdrag) per ordre.
+    :return: Liste med hovedprodukt per ordre, i samme rekkefølge.
+    """
+    indeks = hent_prioritetsindeks()
+    resultater = {}
+    hovedprodukter = []
+    for product_codes, woc_type_oppdrag in ordre:
+        nokkel = (tuple(product_codes), tuple(woc_type_oppdrag))
+        if nokkel not in resultater:
+            resultater[nokkel] = velg_hovedprodukt(product_codes, woc_type_oppdrag, indeks)
+        hovedprodukter.append(resultater[nokkel])
+    return hovedprodukter
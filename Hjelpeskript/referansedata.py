@@ -0,0 +1,206 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+# Filstier
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATAFILER_MAPPE = os.path.join(PROSJEKT_MAPPE, "Datafiler")
+SNAPSHOT_FIL = os.path.join(DATAFILER_MAPPE, ".cache", "referansedata.pkl")
+
+# Økes når formatet på snapshotet endres, slik at gamle snapshots bygges på nytt
+SNAPSHOT_VERSJON = 1
+
+# Tabellnavn -> (filnavn, arknavn, kolonnenavn). Kolonnenavn None beholder navnene fra Excel.
+TABELLER = {
+    "kommune_fylke": (
+        "Kommune_Fylke_Oversikt.xlsx", "Ark1",
+        ["Fylkesnavn", "Fylkesnr", "Kommunenavn", "Kommunenr", "Kommunenr_2023"],
+    ),
+    "poststed_kommune": (
+        "Kommune_Fylke_Oversikt.xlsx", "Postnummerregister",
+        ["Postnummer", "Poststed", "Kommunenummer", "Kommunenavn", "Kategori"],
+    ),
+    "entreprenor": (
+        "Fordeling_Entreprenor.xlsx", "Postnummerregister",
+        ["Fylke", "Kommunenummer", "Kommunenavn", "Postnummer", "Poststed", "Entreprenør"],
+    ),
+    "produktprioritet": ("WOC_Prioritering_Produktkategorier.xlsx", "Ark1", None),
+    "ordrepriser": ("Ordrepriser WOC.xlsx", "Ark1", None),
+}
+
+# Referansedata som allerede er lastet i denne prosessen, delt mellom alle tråder
+_referansedata = None
+_last_lock = threading.Lock()
+
+
+def _filhash(path):
+    """Returnerer SHA-256 av innholdet i en fil."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for blokk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(blokk)
+    return sha.hexdigest()
+
+
+def _kildefiler():
+    """Returnerer de unike Excel-filene som inngår i snapshotet."""
+    return sorted({filnavn for filnavn, _, _ in TABELLER.values()})
+
+
+def _fingeravtrykk(filnavn, tidligere=None):
+    """
+    Lager fingeravtrykk (størrelse, mtime, hash) for en kildefil.
+
+    Hashen beregnes bare på nytt hvis størrelse eller mtime er endret siden forrige snapshot.
+
+    :param filnavn: Filnavn i Datafiler-mappen.
+    :param tidligere: Fingeravtrykket fra forrige snapshot, eller None.
+    :return: Dictionary med size, mtime_ns og sha256.
+    """
+    path = os.path.join(DATAFILER_MAPPE, filnavn)
+    stat = os.stat(path)
+    if tidligere and tidligere["size"] == stat.st_size and tidligere["mtime_ns"] == stat.st_mtime_ns:
+        sha256 = tidligere["sha256"]
+    else:
+        sha256 = _filhash(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+
+
+def _les_excel_tabeller():
+    """Leser alle referansetabellene fra Excel. Hver arbeidsbok parses kun én gang."""
+    import pandas as pd
+
+    ark_per_fil = {}
+    for filnavn, arknavn, _ in TABELLER.values():
+        ark_per_fil.setdefault(filnavn, []).append(arknavn)
+
+    ark = {}
+    for filnavn, arknavn_liste in ark_per_fil.items():
+        path = os.path.join(DATAFILER_MAPPE, filnavn)
+        lest = pd.read_excel(path, sheet_name=arknavn_liste, engine="openpyxl")
+        for arknavn, df in lest.items():
+            ark[(filnavn, arknavn)] = df
+
+    tabeller = {}
+    for navn, (filnavn, arknavn, kolonner) in TABELLER.items():
+        df = ark[(filnavn, arknavn)].copy()
+        if kolonner:
+            df.columns = kolonner
+        tabeller[navn] = df
+    return tabeller
+
+
+def _les_snapshot():
+    """Leser snapshotet fra disk. Returnerer None hvis det mangler eller ikke kan leses."""
+    import pandas as pd
+
+    try:
+        with open(SNAPSHOT_FIL, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Kunne ikke lese referansedata-snapshot, bygger på nytt: {e}")
+        return None
+
+    if snapshot.get("versjon") != SNAPSHOT_VERSJON or snapshot.get("pandas") != pd.__version__:
+        return None
+    return snapshot
+
+
+def _skriv_snapshot(snapshot):
+    """Skriver snapshotet atomisk, slik at samtidige prosesser aldri leser en halvskrevet fil."""
+    mappe = os.path.dirname(SNAPSHOT_FIL)
+    try:
+        os.makedirs(mappe, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=mappe, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, SNAPSHOT_FIL)
+    except OSError as e:
+        # Uten skrivetilgang fungerer alt fortsatt, men neste kjøring må parse Excel på nytt
+        print(f"Kunne ikke lagre referansedata-snapshot: {e}")
+
+
+def bygg_snapshot():
+    """
+    Parser alle arbeidsbøkene i Datafiler og lagrer et nytt snapshot.
+
+    :return: Snapshot (dict) med fingeravtrykk og tabeller.
+    """
+    import pandas as pd
+
+    snapshot = {
+        "versjon": SNAPSHOT_VERSJON,
+        "pandas": pd.__version__,
+        "kilder": {filnavn: _fingeravtrykk(filnavn) for filnavn in _kildefiler()},
+        "tabeller": _les_excel_tabeller(),
+    }
+    _skriv_snapshot(snapshot)
+    return snapshot
+
+
+def _last_snapshot():
+    """Laster snapshotet fra disk, og bygger det på nytt hvis en arbeidsbok er endret."""
+    snapshot = _les_snapshot()
+    if snapshot is None or set(snapshot["kilder"]) != set(_kildefiler()):
+        return bygg_snapshot()
+
+    kilder = {
+        filnavn: _fingeravtrykk(filnavn, snapshot["kilder"][filnavn])
+        for filnavn in _kildefiler()
+    }
+    if any(kilder[f]["sha256"] != snapshot["kilder"][f]["sha256"] for f in kilder):
+        return bygg_snapshot()
+
+    if kilder != snapshot["kilder"]:
+        # Kun mtime er endret (f.eks. ny checkout), innholdet er det samme
+        snapshot["kilder"] = kilder
+        _skriv_snapshot(snapshot)
+    return snapshot
+
+
+def hent_referansedata():
+    """
+    Returnerer alle referansetabellene. Lastes fra snapshot ved første oppslag og deles deretter i prosessen.
+
+    Pandas importeres først her, slik at det er gratis å importere modulene som bruker tabellene.
+
+    :return: Dictionary med tabellnavn -> DataFrame.
+    """
+    global _referansedata
+    if _referansedata is None:
+        with _last_lock:
+            if _referansedata is None:
+                _referansedata = _last_snapshot()
+    return _referansedata["tabeller"]
+
+
+def hent_tabell(navn):
+    """
+    Returnerer én referansetabell. DataFrame-en deles i prosessen og må ikke endres av kalleren.
+
+    :param navn: Tabellnavn, se TABELLER.
+    :return: DataFrame.
+    """
+    return hent_referansedata()[navn]
+
+
+def referansedata_versjon():
+    """
+    Returnerer en kort versjonsstreng som endres når innholdet i en av arbeidsbøkene endres.
+
+    :return: Heksadesimal streng.
+    """
+    hent_referansedata()
+    sha = hashlib.sha256()
+    for filnavn, kilde in sorted(_referansedata["kilder"].items()):
+        sha.update(f"{filnavn}:{kilde['sha256']}".encode("utf-8"))
+    return sha.hexdigest()[:16]
+
+
+if __name__ == "__main__":
+    bygg_snapshot()
+    print(f"Referansedata-snapshot lagret i {SNAPSHOT_FIL} (versjon {referansedata_versjon()})")
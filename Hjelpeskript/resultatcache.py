@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def lag_resultatnokkel(data, *versjoner):
+    """
+    Lager en cache-nøkkel av innholdet i opplastede filer og versjonene som påvirker resultatet.
+
+    :param data: Filinnholdet som bytes, eller en liste med bytes for flere filer (rekkefølgen teller).
+    :param versjoner: F.eks. referansedata-versjonen.
+    :return: Heksadesimal SHA-256.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = [data]
+    sha = hashlib.sha256()
+    for filinnhold in data:
+        # Lengden tas med, så to filer ikke gir samme nøkkel som én fil med begge innholdene
+        sha.update(len(filinnhold).to_bytes(8, "big"))
+        sha.update(filinnhold)
+    for versjon in versjoner:
+        sha.update(b"\0" + str(versjon).encode("utf-8"))
+    return sha.hexdigest()
+
+
+class LRUCache:
+    """
+    Trådsikker cache med begrenset størrelse i bytes. Elementene som er brukt minst nylig kastes først.
+    """
+
+    def __init__(self, maks_bytes, storrelse):
+        """
+        :param maks_bytes: Maks samlet størrelse på elementene i cachen.
+        :param storrelse: Funksjon som gir omtrentlig størrelse i bytes for en verdi.
+        """
+        self.maks_bytes = maks_bytes
+        self.storrelse = storrelse
+        self.bytes = 0
+        # Nøkkel -> (verdi, størrelse)
+        self._elementer = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hent(self, nokkel):
+        """Returnerer verdien for nøkkelen, eller None hvis den ikke finnes."""
+        with self._lock:
+            if nokkel not in self._elementer:
+                return None
+            self._elementer.move_to_end(nokkel)
+            return self._elementer[nokkel][0]
+
+    def lagre(self, nokkel, verdi):
+        """
+        Lagrer verdien, og kaster de eldste elementene hvis cachen blir for stor.
+
+        Lagre verdien på nytt hvis den endres, så størrelsen regnes ut på nytt. En verdi som
+        alene er større enn maks størrelse, lagres ikke.
+        """
+        storrelse = self.storrelse(verdi)
+        with self._lock:
+            if nokkel in self._elementer:
+                self.bytes -= self._elementer.pop(nokkel)[1]
+            if storrelse > self.maks_bytes:
+                return
+            self._elementer[nokkel] = (verdi, storrelse)
+            self.bytes += storrelse
+            while self.bytes > self.maks_bytes:
+                _, (_, kastet) = self._elementer.popitem(last=False)
+                self.bytes -= kastet
+
+    def __len__(self):
+        return len(self._elementer)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+
+from Hjelpeskript.flere_eksporter import work_order_nokkel
+from Hjelpeskript.referansedata import DATAFILER_MAPPE
+
+# SQLite-databasen med hva som er behandlet tidligere. Ligger sammen med snapshotet, utenfor git.
+TILSTAND_FIL = os.path.join(DATAFILER_MAPPE, ".cache", "tilstand.sqlite")
+
+_OPPRETT_TABELL = """
+CREATE TABLE IF NOT EXISTS ordrer (
+    work_order_id TEXT PRIMARY KEY,
+    modified_date TEXT,
+    innholdshash TEXT NOT NULL,
+    versjon TEXT NOT NULL,
+    rad BLOB,
+    behandlet TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Hvor lenge en kjøring venter på skrivelåsen når en annen kjøring lagrer samtidig, f.eks. to
+# inkrementelle kjøringer i appen. Låsen holdes bare mens lagre() skriver, så dette er god margin.
+VENT_PA_LAS_SEKUNDER = 30
+
+# SQLite tillater maks 999 parametere i eldre versjoner
+_MAKS_PARAMETERE = 900
+
+
+def innholdshash(entry):
+    """
+    Lager en hash av hele work orderen, uavhengig av rekkefølgen på feltene.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: Heksadesimal SHA-256.
+    """
+    tekst = json.dumps(entry, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(tekst.encode("utf-8")).hexdigest()
+
+
+def work_order_id(entry):
+    """
+    Returnerer workOrderId som tekst, f.eks. 'WO-123456'.
+
+    :param entry: Dictionary som inneholder ordredata.
+    :return: ID (str), eller None hvis ordren mangler workOrderId.
+    """
+    nokkel = work_order_nokkel(entry)
+    if nokkel is None:
+        return None
+    return f"{nokkel[0]}-{nokkel[1]}"
+
+
+class Tilstandslager:
+    """
+    Lokal SQLite-database med siste behandlede modifiedDate, innholdshash og Monday-rad per workOrderId.
+
+    Endringer samles i minnet og skrives i én kort transaksjon i lagre(), slik at en kjøring som
+    feiler før resultatet er skrevet, behandles på nytt neste gang, og samtidige kjøringer bare
+    venter på hverandre mens de lagrer. Databasen bruker WAL, så lesing venter ikke på skriving.
+    """
+
+    def __init__(self, filsti=TILSTAND_FIL, versjon=""):
+        """
+        :param filsti: SQLite-filen. Opprettes hvis den ikke finnes.
+        :param versjon: Versjon av alt annet enn koden som påvirker radene, f.eks. referansedata-versjonen.
+                        Lagrede ordre med en annen versjon eller fra en annen kodeversjon regnes som endret.
+        """
+        # ordrecache importerer denne modulen, så kodeversjon importeres først her
+        from Hjelpeskript.ordrecache import kodeversjon
+
+        if filsti != ":memory:":
+            os.makedirs(os.path.dirname(filsti), exist_ok=True)
+        self.versjon = f"{kodeversjon()}:{versjon}"
+        self.tilkobling = sqlite3.connect(filsti, timeout=VENT_PA_LAS_SEKUNDER)
+        self.tilkobling.execute("PRAGMA journal_mode=WAL")
+        self.tilkobling.execute(_OPPRETT_TABELL)
+        self._registrert = []
+        self.tilkobling.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.lukk()
+
+    def finn_endrede(self, entries):
+        """
+        Deler work orders i nye/endrede og uendrede.
+
+        :param entries: Liste med work orders.
+        :return: Tuple med (liste med nye eller endrede work orders,
+                 dictionary med id(entry) -> lagret Monday-rad for uendrede ordre). Rad er None
+                 for ordre som ikke var med i Monday-importen.
+        """
+        hasher = [innholdshash(entry) for entry in entries]
+        ider = [work_order_id(entry) for entry in entries]
+        lagret = self._hent([i for i in ider if i is not None])
+
+        endrede = []
+        uendrede = {}
+        for entry, ordre_id, hash_ in zip(entries, ider, hasher):
+            tidligere = lagret.get(ordre_id)
+            if tidligere is not None and tidligere[0] == hash_ and tidligere[1] == self.versjon:
+                uendrede[id(entry)] = pickle.loads(tidligere[2]) if tidligere[2] is not None else None
+            else:
+                endrede.append(entry)
+        return endrede, uendrede
+
+    def registrer(self, entries, rader):
+        """
+        Registrerer behandlede ordre. Lagres først når lagre() kalles.
+
+        :param entries: Liste med work orders.
+        :param rader: Dictionary med id(entry) -> Monday-rad. Ordre som mangler her, var ikke med i importen.
+        """
+        for entry in entries:
+            ordre_id = work_order_id(entry)
+            if ordre_id is None:
+                continue
+            rad = rader.get(id(entry))
+            self._registrert.append((
+                ordre_id, entry.get("modifiedDate"), innholdshash(entry), self.versjon,
+                pickle.dumps(rad, protocol=pickle.HIGHEST_PROTOCOL) if rad is not None else None,
+            ))
+
+    def lagre(self):
+        """Lagrer alle registrerte ordre i én transaksjon."""
+        with self.tilkobling:
+            self.tilkobling.executemany(
+                "INSERT OR REPLACE INTO ordrer (work_order_id, modified_date, innholdshash, versjon, rad) "
+                "VALUES (?, ?, ?, ?, ?)",
+                self._registrert,
+            )
+        self._registrert = []
+
+    def lukk(self):
+        """Lukker databasen. Registreringer som ikke er lagret, forkastes."""
+        self._registrert = []
+        self.tilkobling.close()
+
+    def _hent(self, ider):
+        # Henter (innholdshash, versjon, rad) for ID-ene, i biter så SQLite-grensen ikke nås
+        lagret = {}
+        for start in range(0, len(ider), _MAKS_PARAMETERE):
+            bit = ider[start:start + _MAKS_PARAMETERE]
+            sporring = ("SELECT work_order_id, innholdshash, versjon, rad FROM ordrer "
+                        f"WHERE work_order_id IN ({','.join('?' * len(bit))})")
+            for ordre_id, hash_, versjon, rad in self.tilkobling.execute(sporring, bit):
+                lagret[ordre_id] = (hash_, versjon, rad)
+        return lagret
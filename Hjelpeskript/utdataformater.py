@@ -0,0 +1,157 @@
+import importlib.util
+import io
+import os
+
+from Hjelpeskript.parallell import lag_pool
+from Hjelpeskript.woc_excel_sortfile import skriv_arbeidsbok
+
+# Format -> (filendelse, MIME-type). Monday-importen skrives i hvert valgt format.
+UTDATAFORMATER = {
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (".csv", "text/csv"),
+    "ndjson": (".ndjson", "application/x-ndjson"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+STANDARD_FORMATER = ("xlsx",)
+
+
+def _skriv_csv(fil, df, sheet_name=None):
+    # Lister skrives som tekst, som i Excel-filene
+    df.to_csv(fil, index=False, encoding="utf-8")
+
+
+def _skriv_ndjson(fil, df, sheet_name=None):
+    # Én JSON-linje per ordre. Lister blir JSON-lister og tomme verdier null.
+    df.to_json(fil, orient="records", lines=True, force_ascii=False)
+
+
+def _skriv_parquet(fil, df, sheet_name=None):
+    df.to_parquet(fil, index=False)
+
+
+def _skriv_xlsx(fil, df, sheet_name="Sheet1"):
+    skriv_arbeidsbok(fil, df, sheet_name)
+
+
+_SKRIVERE = {
+    "xlsx": _skriv_xlsx,
+    "csv": _skriv_csv,
+    "ndjson": _skriv_ndjson,
+    "parquet": _skriv_parquet,
+}
+
+
+def tilgjengelige_formater():
+    """
+    Returnerer formatene som kan skrives i denne installasjonen.
+
+    :return: Liste med formatnavn. Parquet krever pyarrow eller fastparquet.
+    """
+    formater = list(UTDATAFORMATER)
+    if not any(importlib.util.find_spec(pakke) for pakke in ("pyarrow", "fastparquet")):
+        formater.remove("parquet")
+    return formater
+
+
+def velg_formater(navn=None):
+    """
+    Sjekker formatene som skal skrives.
+
+    :param navn: Liste med formatnavn. Standard er STANDARD_FORMATER.
+    :return: Tuple med formatene, uten duplikater og i rekkefølgen de ble gitt.
+    :raises ValueError: Hvis et format er ukjent eller ikke kan skrives i denne installasjonen.
+    """
+    formater = tuple(dict.fromkeys(navn or STANDARD_FORMATER))
+    for format_ in formater:
+        if format_ not in UTDATAFORMATER:
+            raise ValueError(f"Ukjent format '{format_}'. Velg blant {', '.join(UTDATAFORMATER)}.")
+        if format_ not in tilgjengelige_formater():
+            raise ValueError(f"Formatet '{format_}' krever en pakke som ikke er installert.")
+    return formater
+
+
+def filnavn_for_format(filnavn, format_):
+    """
+    Bytter filendelsen til endelsen for formatet, f.eks. 'Monday_Import.xlsx' -> 'Monday_Import.csv'.
+
+    :param filnavn: Filnavn eller filsti.
+    :param format_: Formatnavn fra UTDATAFORMATER.
+    :return: Filnavnet med ny endelse.
+    """
+    return os.path.splitext(filnavn)[0] + UTDATAFORMATER[format_][0]
+
+
+def format_for_fil(filnavn):
+    """
+    Finner formatet til en fil ut fra filendelsen.
+
+    :param filnavn: Filnavn eller filsti.
+    :return: Formatnavn fra UTDATAFORMATER.
+    :raises ValueError: Hvis filendelsen ikke hører til noe format.
+    """
+    endelse = os.path.splitext(filnavn)[1].lower()
+    for format_, (format_endelse, _) in UTDATAFORMATER.items():
+        if endelse == format_endelse:
+            return format_
+    raise ValueError(f"Ukjent filendelse '{endelse}' for {filnavn}.")
+
+
+def skriv_fil(filsti, df, sheet_name="Sheet1"):
+    """
+    Skriver én DataFrame i formatet filendelsen angir.
+
+    :param filsti: Filen som skrives. Overskrives hvis den finnes.
+    :param df: DataFrame som skal skrives.
+    :param sheet_name: Navnet på arket. Brukes bare for xlsx.
+    :return: Filstien.
+    :raises ValueError: Hvis filendelsen ikke hører til noe format.
+    """
+    _SKRIVERE[format_for_fil(filsti)](filsti, df, sheet_name)
+    return filsti
+
+
+def lag_fil(filnavn, df, sheet_name="Sheet1"):
+    """
+    Lager innholdet i én fil i minnet, i formatet filendelsen angir. Ingenting skrives til disk.
+
+    :param filnavn: Filnavnet. Bare filendelsen brukes.
+    :param df: DataFrame som skal skrives.
+    :param sheet_name: Navnet på arket. Brukes bare for xlsx.
+    :return: Filinnholdet som bytes.
+    :raises ValueError: Hvis filendelsen ikke hører til noe format.
+    """
+    buffer = io.BytesIO()
+    _SKRIVERE[format_for_fil(filnavn)](buffer, df, sheet_name)
+    return buffer.getvalue()
+
+
+def _i_prosesser(funksjon, filer, antall_arbeidere):
+    # Kjører funksjonen for hver (filnavn, DataFrame, arknavn), i en prosesspool hvis det er flere arbeidere
+    antall_arbeidere = min(antall_arbeidere, len(filer))
+    if antall_arbeidere > 1:
+        with lag_pool(antall_arbeidere) as pool:
+            return list(pool.map(funksjon, *zip(*filer)))
+    return [funksjon(*fil) for fil in filer]
+
+
+def skriv_filer(filer, antall_arbeidere=1):
+    """
+    Skriver flere filer, eventuelt samtidig i hver sin prosess.
+
+    :param filer: Liste med (filsti, DataFrame, arknavn). Formatet bestemmes av filendelsen.
+    :param antall_arbeidere: Maks antall prosesser. 1 skriver filene etter hverandre i denne prosessen.
+    :return: Liste med filstiene, i samme rekkefølge.
+    """
+    return _i_prosesser(skriv_fil, filer, antall_arbeidere)
+
+
+def lag_filer(filer, antall_arbeidere=1):
+    """
+    Lager innholdet i flere filer i minnet, eventuelt samtidig i hver sin prosess.
+
+    :param filer: Liste med (filnavn, DataFrame, arknavn). Formatet bestemmes av filendelsen.
+    :param antall_arbeidere: Maks antall prosesser. 1 lager filene etter hverandre i denne prosessen.
+    :return: Dictionary med filnavn -> innhold som bytes, i samme rekkefølge.
+    """
+    return dict(zip((fil[0] for fil in filer), _i_prosesser(lag_fil, filer, antall_arbeidere)))
@@ -1,31 +1,80 @@
 import os
+
 import pandas as pd
 
+from Hjelpeskript.xlsx_strom import skriv_xlsx
+
+# Filnavnene for P- og B-filene
+PRIVAT_FIL = "Monday_Import - P.xlsx"
+BEDRIFT_FIL = "Monday_Import - B.xlsx"
+
+
+def del_etter_kundekategori(df):
+    """
+    Splitter Monday-importen i privat- og bedriftsordre basert på verdien i 'Kunde Kategori'.
+
+    P- og B-filene får samme celletyper som Monday-importen. Før ble de laget ved å lese
+    Monday_Import.xlsx inn igjen med pd.read_excel, som gjør tekstkolonner der alle verdiene ser ut
+    som tall om til tall. Ordrenummer og Telefon (og andre slike kolonner) var derfor tall i P- og
+    B-filene, og telefonnumre med tomme celler ble desimaltall. Nå er de tekst, som i Monday-importen.
+
+    :param df: DataFrame med Monday-importen.
+    :return: Tuple med (DataFrame med 'privat', DataFrame med 'bedrift').
+    :raises ValueError: Hvis kolonnen 'Kunde Kategori' mangler.
+    """
+    # Sjekk om nødvendig kolonne eksisterer
+    if "Kunde Kategori" not in df.columns:
+        raise ValueError("Kolonnen 'Kunde Kategori' finnes ikke i Monday-importen.")
 
-def split_excel_by_customer_category(input_file):
+    # Filtrer dataene
+    return df[df["Kunde Kategori"] == "privat"], df[df["Kunde Kategori"] == "bedrift"]
+
+
+def skriv_arbeidsbok(filsti, df, sheet_name="Sheet1"):
+    """
+    Skriver én DataFrame til en Excel-fil, uten indeks.
+
+    Radene strømmes til filen med skriv_xlsx, så arbeidsboken bygges ikke opp i minnet.
+    Cellene blir de samme som med df.to_excel.
+
+    :param filsti: Filen som skrives. Overskrives hvis den finnes.
+    :param df: DataFrame som skal skrives.
+    :param sheet_name: Navnet på arket.
+    :return: Filstien.
+    """
+    skriv_xlsx(filsti, df.itertuples(index=False, name=None), df.columns, sheet_name)
+    return filsti
+
+
+def split_excel_by_customer_category(input_file, output_directory=None):
     """
     Leser en Excel-fil og splitter den i to filer basert på verdien i 'Kunde Kategori'.
 
+    Monday-importen fra woc_to_monday splittes i minnet med del_etter_kundekategori. Denne brukes
+    for en Excel-fil som allerede ligger på disk.
+
     - Rader med 'privat' lagres i 'Monday_Import - P.xlsx'
     - Rader med 'bedrift' lagres i 'Monday_Import - B.xlsx'
 
     Args:
         input_file (str): Filsti til den opprinnelige Excel-filen.
+        output_directory (str): Mappen filene lagres i. Standard er prosjektmappen.
 
     Returns:
         None
     """
     # Definer utfilene
     
-    output_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if output_directory is None:
+        output_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
     # Ensure the directory exists
     if not os.path.exists(output_directory):
         os.makedirs(output_directory, exist_ok=True)
     
     # Correctly define file paths
-    output_file_priv = os.path.join(output_directory, "Monday_Import - P.xlsx")
-    output_file_bedrift = os.path.join(output_directory, "Monday_Import - B.xlsx")
+    output_file_priv = os.path.join(output_directory, PRIVAT_FIL)
+    output_file_bedrift = os.path.join(output_directory, BEDRIFT_FIL)
 
 
     # Les Excel-filen
@@ -34,17 +83,8 @@ def split_excel_by_customer_category(input_file):
     # Fjern eventuelle ledende eller etterfølgende mellomrom i kolonnenavn
     df.columns = df.columns.str.strip()
 
-    # Sjekk om nødvendig kolonne eksisterer
-    if "Kunde Kategori" not in df.columns:
-        raise ValueError("Kolonnen 'Kunde Kategori' finnes ikke i Excel-filen.")
-
-    # Filtrer dataene
-    df_priv = df[df["Kunde Kategori"] == "privat"]
-    df_bedrift = df[df["Kunde Kategori"] == "bedrift"]
+    df_priv, df_bedrift = del_etter_kundekategori(df)
 
     # Lagre til nye Excel-filer
-    df_priv.to_excel(output_file_priv, index=False)
-    df_bedrift.to_excel(output_file_bedrift, index=False)
-
-
-
+    skriv_arbeidsbok(output_file_priv, df_priv)
+    skriv_arbeidsbok(output_file_bedrift, df_bedrift)
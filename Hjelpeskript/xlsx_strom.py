@@ -0,0 +1,100 @@
+import math
+import numbers
+
+from openpyxl import Workbook
+
+
+def celleverdi(verdi):
+    """
+    Gjør om en verdi til det pandas' to_excel skriver i cellen.
+
+    Tomme verdier (None, NaN, pd.NA) gir tom celle, numpy-tall blir vanlige tall, og lister
+    og andre objekter skrives som tekst.
+
+    :param verdi: Verdien fra raden.
+    :return: Verdi openpyxl kan skrive, eller None for tom celle.
+    """
+    if verdi is None or type(verdi) is str:
+        return verdi
+    if isinstance(verdi, bool) or type(verdi).__name__ == "bool_":
+        return bool(verdi)
+    if isinstance(verdi, numbers.Integral):
+        return int(verdi)
+    if isinstance(verdi, numbers.Real):
+        verdi = float(verdi)
+        if math.isnan(verdi):
+            return None
+        if math.isinf(verdi):
+            return "inf" if verdi > 0 else "-inf"
+        return verdi
+    if hasattr(verdi, "isoformat"):
+        # datetime, date og time skrives som de er. NaT regnes som tom.
+        return None if verdi != verdi else verdi
+    if type(verdi).__name__ == "NAType":
+        return None
+    return str(verdi)
+
+
+class Arbeidsbokstrom:
+    """
+    Excel-fil som skrives rad for rad med openpyxl i write_only-modus.
+
+    Radene skrives til arket med en gang, så hele arbeidsboken aldri bygges opp i minnet.
+    Filen lagres når lagre() kalles, eller når with-blokken avsluttes uten feil.
+    """
+
+    def __init__(self, filsti, kolonner, sheet_name="Data"):
+        """
+        :param filsti: Filen som skrives, eller en binær strøm som io.BytesIO. Filen overskrives hvis den finnes.
+        :param kolonner: Kolonnenavnene, i rekkefølgen verdiene har i radene.
+        :param sheet_name: Navnet på arket.
+        """
+        self.filsti = filsti
+        self.antall_rader = 0
+        self._arbeidsbok = Workbook(write_only=True)
+        self._ark = self._arbeidsbok.create_sheet(sheet_name)
+        self._ark.append([str(kolonne) for kolonne in kolonner])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.lagre()
+
+    def skriv(self, rad):
+        """
+        Skriver én rad.
+
+        :param rad: Verdiene i samme rekkefølge som kolonnene.
+        """
+        self._ark.append([celleverdi(verdi) for verdi in rad])
+        self.antall_rader += 1
+
+    def skriv_rader(self, rader):
+        """
+        Skriver alle radene fra en iterable, f.eks. en generator, uten å samle dem først.
+
+        :param rader: Iterable med rader.
+        """
+        for rad in rader:
+            self.skriv(rad)
+
+    def lagre(self):
+        """Lagrer filen. Arbeidsboken kan ikke skrives til etterpå."""
+        self._arbeidsbok.save(self.filsti)
+
+
+def skriv_xlsx(filsti, rader, kolonner, sheet_name="Data"):
+    """
+    Skriver radene til en Excel-fil uten å bygge hele arbeidsboken i minnet.
+
+    :param filsti: Filen som skrives, eller en binær strøm. Filen overskrives hvis den finnes.
+    :param rader: Iterable med rader, f.eks. en generator eller df.itertuples(index=False, name=None).
+    :param kolonner: Kolonnenavnene.
+    :param sheet_name: Navnet på arket.
+    :return: Antall rader som ble skrevet, uten overskriften.
+    """
+    with Arbeidsbokstrom(filsti, kolonner, sheet_name) as strom:
+        strom.skriv_rader(rader)
+    return strom.antall_rader
@@ -1,88 +1,188 @@
 import streamlit as st
-import json
 import os
-import subprocess
 import shutil
-import zipfile
+import time
+from Hjelpeskript.preflight import kjor_preflight
+from Hjelpeskript.referansedata import hent_referansedata, referansedata_versjon
+from Hjelpeskript.resultatcache import LRUCache, lag_resultatnokkel
+
+# Maks samlet størrelse på behandlede opplastinger som holdes i minnet, med PDF-er og nedlastinger
+RESULTATCACHE_MAKS_BYTES = 256 * 1024 * 1024
+
+
+@st.cache_resource
+def startup_preflight():
+    """Sjekker at pakkene kan importeres. Kjøres én gang per serverprosess, uten nettverk."""
+    return kjor_preflight()
+
+
+@st.cache_resource
+def last_referansedata():
+    """Laster referansetabellene én gang per serverprosess, delt mellom alle sesjoner."""
+    start = time.perf_counter()
+    hent_referansedata()
+    return {"versjon": referansedata_versjon(), "sekunder": time.perf_counter() - start}
+
+
+def resultat_storrelse(result):
+    """Omtrentlig minnebruk i bytes for et resultat: tabellene, PDF-ene og nedlastingene."""
+    storrelse = sum(len(pdf) for _, pdf in result["pdfer"])
+    for tabell in ("monday", "monday_endret"):
+        if tabell in result:
+            storrelse += int(result[tabell].memory_usage(deep=True).sum())
+    for nedlastinger in result.get("nedlastinger", {}).values():
+        storrelse += sum(len(data) for data in nedlastinger.values())
+    return storrelse
+
+
+@st.cache_resource
+def hent_resultatcache():
+    """Resultater per opplasting (innhold + referansedata-versjon), delt mellom alle sesjoner."""
+    return LRUCache(RESULTATCACHE_MAKS_BYTES, resultat_storrelse)
+
+
+def hent_inkrementell_resultatcache():
+    """
+    Inkrementelle resultater for denne sesjonen, per opplasting (file_id).
+
+    Et inkrementelt resultat avhenger av tilstandslageret, som endres når resultatet lagres. Det
+    gjenbrukes derfor bare når siden kjøres på nytt for samme opplasting, aldri for en ny opplasting
+    av de samme filene eller i en annen sesjon.
+    """
+    if "inkrementelle_resultater" not in st.session_state:
+        st.session_state["inkrementelle_resultater"] = LRUCache(RESULTATCACHE_MAKS_BYTES, resultat_storrelse)
+    return st.session_state["inkrementelle_resultater"]
 
 # Streamlit UI configuration (must be first command)
 st.set_page_config(page_title="WoC Report Processor", layout="wide")
 
-# Ensure dependencies are installed
-st.subheader("🔍 Checking & Installing Dependencies")
-required_packages = ["pandas", "numpy", "openpyxl", "streamlit", "fpdf", "dateutil"]
-for package in required_packages:
-    subprocess.run(["pip", "install", package])
+# Ensure dependencies are available
+preflight = startup_preflight()
+if preflight["mangler"]:
+    st.subheader("🔍 Missing Dependencies")
+    for package in preflight["pakker"]:
+        if not package["ok"]:
+            st.error(f"{package['pakke']}: {package['feil']}")
+    st.stop()
+
+# Importeres først når vi vet at pakkene finnes
+from woc_pipeline import MOTORER, PDF_ZIP_FIL, STANDARD_MOTOR, lag_nedlastinger, process_export
+from Hjelpeskript.flere_eksporter import les_eksporter
+from Hjelpeskript.tilstandslager import Tilstandslager
+from Hjelpeskript.ordrecache import Ordrecache
+from Hjelpeskript.utdataformater import (STANDARD_FORMATER, UTDATAFORMATER, format_for_fil, tilgjengelige_formater,
+                                         velg_formater)
+
+reference_data = last_referansedata()
+
+with st.expander("🔍 Startup"):
+    st.write(f"Dependency check: {preflight['sekunder'] * 1000:.0f} ms, "
+             f"reference data: {reference_data['sekunder'] * 1000:.0f} ms "
+             f"(version {reference_data['versjon']})")
+    st.write(f"Python {preflight['python']}, "
+             + ", ".join(f"{package['pakke']} {package['versjon']}" for package in preflight["pakker"]))
 
 st.title("📊 WoC JSON-Report Processor")
-st.write("Upload a JSON file to process it using the 'woc_to_monday.py' and 'Generere_PDF_fra_JSON.py' scripts.")
+st.write("Upload one or more JSON files to create the Monday import and work order PDFs. "
+         "Orders that appear in several exports are included once, using the newest version.")
 
 # File uploader
-uploaded_file = st.file_uploader("📂 Upload JSON File", type="json")
+uploaded_files = st.file_uploader("📂 Upload JSON Files", type="json", accept_multiple_files=True)
+incremental = st.checkbox(
+    "Only process new or changed orders",
+    help="Orders that are unchanged since an earlier incremental run are taken from the local state store. "
+         "PDFs and an extra Monday import are created for new and changed orders only.",
+)
+workers = st.number_input(
+    "Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1,
+    help="Number of processes that create Monday rows, PDFs and Excel files in parallel. "
+         "The result is the same for any number.",
+)
+engine = st.selectbox(
+    "Monday engine", MOTORER, index=MOTORER.index(STANDARD_MOTOR),
+    help="'rad' builds the Monday rows order by order, 'kolonne' builds them for a whole block at a time. "
+         "The result is the same.",
+)
+output_formats = velg_formater(st.multiselect(
+    "Output formats", tilgjengelige_formater(), default=list(STANDARD_FORMATER),
+    help="The Monday import and the P and B files are written in every selected format. "
+         "CSV, NDJSON and Parquet are faster to write and to load into other tools than xlsx. "
+         "If none are selected, xlsx is used.",
+))
 
-if uploaded_file:
-    # Save uploaded file to a temporary location
-    temp_json_path = "uploaded_file.json"
-    with open(temp_json_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+if uploaded_files:
+    if incremental:
+        result_key = (engine,) + tuple(f.file_id for f in uploaded_files)
+        result_cache = hent_inkrementell_resultatcache()
+    else:
+        # Samme filer og samme referansedata gir samme resultat, så det behandles bare én gang
+        result_key = lag_resultatnokkel([f.getvalue() for f in uploaded_files], reference_data["versjon"], engine)
+        result_cache = hent_resultatcache()
+    result = result_cache.hent(result_key)
+    if result is not None:
+        # PDF-ene har tidspunktet for behandlingen i toppteksten, så det må komme frem at resultatet er gjenbrukt
+        st.write(f"Reusing the result processed {result['tidspunkt']:%d.%m.%Y, %H:%M}. The PDFs show that time.")
 
-    st.write("Processing the uploaded file...")
+    processing_error = None
+    if result is None:
+        st.write(f"Processing {len(uploaded_files)} uploaded file(s)...")
+
+        # Kjør Monday-importen og PDF-genereringen rett fra opplastingene i minnet
+        try:
+            entries = les_eksporter([f.getbuffer() for f in uploaded_files], workers)
+            ordrecache = Ordrecache(versjon=reference_data["versjon"])
+            if incremental:
+                # Tilstanden lagres først når filene er laget
+                with Tilstandslager(versjon=reference_data["versjon"]) as tilstandslager:
+                    result = process_export(entries, tilstandslager=tilstandslager, ordrecache=ordrecache,
+                                            antall_arbeidere=workers, motor=engine)
+                    result["nedlastinger"] = {output_formats: lag_nedlastinger(result, workers, output_formats)}
+                    tilstandslager.lagre()
+                st.write(f"{len(result['monday_endret'])} new or changed orders of {len(result['monday'])}.")
+            else:
+                result = process_export(entries, ordrecache=ordrecache, antall_arbeidere=workers, motor=engine)
+            st.write(f"Order cache: {result['ordrecache']['treff']} hits, {result['ordrecache']['bom']} misses.")
+            result_cache.lagre(result_key, result)
+        except Exception as e:
+            processing_error = e
+
+    # Filene lages i minnet én gang per opplasting og formatvalg, og holdes sammen med resultatet
+    downloads = None
+    if result is not None:
+        downloads = result.setdefault("nedlastinger", {}).get(output_formats)
+        if downloads is None:
+            try:
+                downloads = lag_nedlastinger(result, workers, output_formats)
+                result["nedlastinger"][output_formats] = downloads
+                # Lagres på nytt, så cachen får med størrelsen på de nye filene
+                result_cache.lagre(result_key, result)
+            except Exception as e:
+                processing_error = e
 
-    # Run the woc_to_monday.py script
-    result_monday = subprocess.run(["python", "woc_to_monday.py", temp_json_path], capture_output=True, text=True)
-    
-    # Run the Generere_PDF_fra_JSON.py script
-    result_pdf = subprocess.run(["python", "Generere_PDF_fra_JSON.py", temp_json_path], capture_output=True, text=True)
-    
-    # List of expected output files
     st.subheader("📁 Output Files:")
-    output_files = ["Monday_Import.xlsx", "Monday_Import - B.xlsx", "Monday_Import - P.xlsx"]
-    
-    for output_file in output_files:
-        if os.path.exists(output_file):
-            with open(output_file, "rb") as file:
+    if downloads is None:
+        st.error("Processing failed, so no files were generated.")
+    else:
+        for file_name, data in downloads.items():
+            if file_name == PDF_ZIP_FIL:
+                if not result["pdfer"]:
+                    st.error("No PDFs were generated.")
+                    continue
                 st.download_button(
-                    label=f"📥 Download {output_file}",
-                    data=file,
-                    file_name=output_file,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    label="📥 Download All PDFs (ZIP)",
+                    data=data,
+                    file_name=file_name,
+                    mime="application/zip"
+                )
+            else:
+                st.download_button(
+                    label=f"📥 Download {file_name}",
+                    data=data,
+                    file_name=file_name,
+                    mime=UTDATAFORMATER[format_for_fil(file_name)][1]
                 )
-        else:
-            st.error(f"Processing failed or {output_file} was not generated.")
-    
-    # Handle PDFs - Zip the generated PDFs folder
-    pdf_base_dir = "generated_pdfs"  # Adjust this to match the actual output folder
-    zip_file_path = "generated_pdfs.zip"
-    
-    if os.path.exists(pdf_base_dir):
-        with zipfile.ZipFile(zip_file_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(pdf_base_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    zipf.write(file_path, os.path.relpath(file_path, pdf_base_dir))
-        
-        # Provide download button for ZIP file
-        with open(zip_file_path, "rb") as zip_file:
-            st.download_button(
-                label="📥 Download All PDFs (ZIP)",
-                data=zip_file,
-                file_name="generated_pdfs.zip",
-                mime="application/zip"
-            )
-    else:
-        st.error("No PDFs were generated or directory does not exist.")
-    
-    # Display output logs
-    # st.subheader("🔍 Script Output (WoC to Monday)")
-    # st.text(result_monday.stdout)
-
-    if result_monday.stderr:
-        st.subheader("🚨 Errors (if any) - WoC to Monday")
-        st.text(result_monday.stderr)
-    
-    # st.subheader("🔍 Script Output (Generate PDF)")
-    # st.text(result_pdf.stdout)
     
-    if (result_pdf.stderr):
-        st.subheader("🚨 Errors (if any) - Generate PDF")
-        st.text(result_pdf.stderr)
+    # Display errors
+    if processing_error:
+        st.subheader("🚨 Errors (if any)")
+        st.exception(processing_error)
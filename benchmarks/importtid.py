@@ -0,0 +1,84 @@
+"""
+Måler hvor lang tid det tar å importere hjelpemodulene i en ny Python-prosess,
+og feiler hvis importen bruker mer enn budsjettet eller laster referansedata.
+
+Bruk:
+    python benchmarks/importtid.py [--budsjett-ms 250] [--runder 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Moduler som skal være billige å importere
+MODULER = [
+    "Hjelpeskript.referansedata",
+    "Hjelpeskript.oppslag",
+    "Hjelpeskript.kommune_til_fylke",
+    "Hjelpeskript.poststed_til_kommune",
+    "Hjelpeskript.fylke_kommune_entreprenor",
+    "Hjelpeskript.produktprioritet",
+    "Hjelpeskript.add_days_to_date",
+    "Hjelpeskript.json_innlesing",
+    "Hjelpeskript.ordreberikelse",
+    "Hjelpeskript.flere_eksporter",
+    "Hjelpeskript.tilstandslager",
+    "Hjelpeskript.ordrecache",
+    "Hjelpeskript.parallell",
+    "Generere_PDF_fra_JSON",
+]
+
+# Kjøres i en ny prosess, slik at ingenting er importert fra før
+_MALING = """
+import json, sys, time
+start = time.perf_counter()
+for modul in {moduler!r}:
+    __import__(modul)
+varighet = time.perf_counter() - start
+import Hjelpeskript.referansedata as referansedata
+print(json.dumps({{
+    "sekunder": varighet,
+    "pandas_importert": "pandas" in sys.modules,
+    "referansedata_lastet": referansedata._referansedata is not None,
+}}))
+"""
+
+
+def mal_import(moduler):
+    """Importerer modulene i en ny prosess og returnerer målingen."""
+    resultat = subprocess.run(
+        [sys.executable, "-c", _MALING.format(moduler=moduler)],
+        cwd=PROSJEKT_MAPPE, capture_output=True, text=True, check=True,
+    )
+    return json.loads(resultat.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budsjett-ms", type=float, default=250, help="Maks importtid (median) i millisekunder.")
+    parser.add_argument("--runder", type=int, default=5, help="Antall målinger.")
+    args = parser.parse_args()
+
+    malinger = [mal_import(MODULER) for _ in range(args.runder)]
+    median_ms = statistics.median(m["sekunder"] for m in malinger) * 1000
+    print(f"Importtid (median av {args.runder}): {median_ms:.1f} ms (budsjett {args.budsjett_ms:.0f} ms)")
+
+    feil = []
+    if median_ms > args.budsjett_ms:
+        feil.append("importtiden er over budsjettet")
+    if any(m["pandas_importert"] for m in malinger):
+        feil.append("pandas ble importert")
+    if any(m["referansedata_lastet"] for m in malinger):
+        feil.append("referansedata ble lastet under import")
+
+    for melding in feil:
+        print(f"FEIL: {melding}")
+    sys.exit(1 if feil else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Sammenligner JSON-dekoderne på en stor syntetisk WoC-eksport.
+
+Måler tiden det tar å lese alle work orders fra opplastingen i minnet med standardvalget og med
+hver installerte dekoder, med strømmende lesing fra fil, og med json.load av hele filen slik
+scriptene gjorde før. Viser også hvor mye minne hver måte bruker på det meste, i tillegg til eksporten.
+
+Bruk:
+    python benchmarks/json_dekoder.py [--antall 20000] [--runder 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from benchmarks.syntetisk_eksport import lag_eksport
+from Hjelpeskript.json_innlesing import les_work_orders, tilgjengelige_dekodere
+
+
+def mal(funksjon, runder):
+    """Kjører funksjonen `runder` ganger og returnerer mediantiden i sekunder."""
+    tider = []
+    for _ in range(runder):
+        start = time.perf_counter()
+        funksjon()
+        tider.append(time.perf_counter() - start)
+    return statistics.median(tider)
+
+
+def mal_minne(funksjon):
+    """Kjører funksjonen én gang og returnerer hvor mange bytes den hadde allokert på det meste."""
+    tracemalloc.start()
+    try:
+        funksjon()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def last_hele_filen(filsti):
+    """Leser eksporten med json.load, slik Monday- og PDF-scriptene gjorde hver for seg før."""
+    with open(filsti, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--antall", type=int, default=20000, help="Antall work orders i eksporten.")
+    parser.add_argument("--runder", type=int, default=3, help="Antall målinger per dekoder.")
+    args = parser.parse_args()
+
+    data = json.dumps(lag_eksport(args.antall), ensure_ascii=False).encode("utf-8")
+    print(f"Syntetisk eksport: {args.antall} work orders, {len(data) / 1e6:.1f} MB")
+
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as file:
+        file.write(data)
+    try:
+        malinger = {"auto (i minnet)": lambda: sum(1 for _ in les_work_orders(data))}
+        malinger |= {
+            f"{navn} (i minnet)": (lambda navn=navn: sum(1 for _ in les_work_orders(data, dekoder=navn)))
+            for navn in tilgjengelige_dekodere()
+        }
+        malinger["json (strøm fra fil)"] = lambda: sum(1 for _ in les_work_orders(file.name))
+        malinger["json.load (hele filen)"] = lambda: len(last_hele_filen(file.name))
+
+        resultater = {navn: mal(funksjon, args.runder) for navn, funksjon in malinger.items()}
+        minne = {navn: mal_minne(funksjon) for navn, funksjon in malinger.items()}
+    finally:
+        os.remove(file.name)
+
+    raskest = min(resultater.values())
+    for navn, sekunder in resultater.items():
+        print(f"{navn:<24} {sekunder * 1000:8.0f} ms  {sekunder / raskest:5.1f}x  {minne[navn] / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Sammenligner klassifiseringsreglene (Hjelpeskript.klassifisering) med de gamle if/elif-kjedene rad for rad.
+
+Kunde Kategori, Status Leveranse, Type oppdrag, Type FTTx og GPON/P2P regnes ut begge veier for
+en stor syntetisk WoC-eksport. Sjekker at resultatet er likt, måler tiden for hver av dem og viser
+hvor mange ordre hver regel slo til for.
+
+Bruk:
+    python benchmarks/klassifisering.py [--antall 100000] [--runder 3]
+"""
+import argparse
+import contextlib
+import gc
+import os
+import statistics
+import sys
+import time
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from benchmarks.syntetisk_eksport import lag_eksport
+from Hjelpeskript.klassifisering import klassifiser, tell_regler
+from woc_kolonnemotor import lag_monday_tabell
+
+# Kolonnene klassifiseringen leser
+INNDATA = ["Item", "Customer Category", "kontraktdetaljer", "Produkt ID", "Hovedprodukt",
+           "Orderinfo Description", "GPON/P2P - WOC", "Wholesale ?"]
+
+
+# Fasiten: if/elif-kjedene woc_to_monday brukte før klassifiseringen ble en regeltabell, uendret.
+# Reglene skal bare finnes i Hjelpeskript.klassifisering. Endres de med vilje, må kjedene her
+# endres likt, ellers melder denne sammenligningen og tests/test_klassifisering.py forskjell.
+
+# BEDRIFT eller PRIVAT
+def determine_oppdrag_kategori(customer_category, contract_details):
+    """
+    Bestemmer oppdragkategori basert på kunde- og kontraktsdetaljer.
+
+    :param customer_category: Kundekategori (str) or None.
+    :param contract_details: Kontraktsdetaljer (str) or None.
+    :return: Oppdragkategori (str) - 'bedrift', 'privat' eller 'denne må sjekkes'.
+    """
+    # Ensure values are strings to avoid AttributeError
+    customer_category = (customer_category or "").lower().strip()
+    contract_details = (contract_details or "").lower().strip()
+
+    if any(keyword in customer_category for keyword in ["bedrift", "fttb"]) or any(keyword in contract_details for keyword in ["bedrift", "fttb"]):
+        return "bedrift"
+    elif "privat" in customer_category or "ftth" in contract_details:
+        return "privat"
+    else:
+        print("Sjekk om denne er bedrift eller privat")
+        return "denne må sjekkes"
+
+
+# Status Leveranse
+def determine_status_leveranse(orderlines_productId, orderinfo_description, contract_details, gpon_p2p_woc, VULA_nr, oppdrag_kategori, item):
+    if oppdrag_kategori == "bedrift":
+        if "U0009A" in orderlines_productId:
+            return ""
+        elif "LVLU" in orderlines_productId:
+            return "Booket"
+        elif VULA_nr:
+            return "NY wholesale"
+        elif orderinfo_description == "BB_ACCESS":
+            return "NY FWA"
+        elif contract_details == "FTTB" or gpon_p2p_woc == "HELIOS":
+            return "NY bedrift"
+        else:
+            print(f"{item} - Bedriftsoppdrag leveransekode må sjekkes")
+            return None
+    elif oppdrag_kategori == "privat":
+        if any(product_id in orderlines_productId for product_id in ["LVA1A", "LVA1B", "LVA1D", "LVA2F"]):
+            return "NY FTTH"
+        elif VULA_nr:
+            return "NY wholesale"
+        elif orderinfo_description == "BB_ACCESS":
+            return "NY FWA"
+        else : #contract_details == "AEG":
+            return "NY privat"
+
+    else:
+        print(f"{item} - Oppdrag kategori må sjekkes")
+        return None
+
+
+# Type FTTx til monday
+def determine_fttx(orderlines_productId, prioritert_product_id, contract_details, gpon_p2p_woc, orderinfo_description, status_leveranse, oppdrag_kategori, item):
+
+
+    if oppdrag_kategori == "bedrift":
+        if "U0009A" in orderlines_productId:
+            return "FTTB Planunderlag"
+        elif "LVLU" in orderlines_productId:
+            return "FTTB Offnet"
+        elif contract_details == "FTTB" or gpon_p2p_woc == "HELIOS" or orderinfo_description == "BB_ACCESS":
+            return "FTTB Onnet"
+        elif "DLS99" in prioritert_product_id:
+            return "FTTB Onnet"
+        else:
+            print(f"{item}: Mangler FTTx")
+            return None
+
+    service_keywords = {"aeg", "eksperthjelpen", "installasjonshjelpen"}
+    if oppdrag_kategori == "privat":
+        if status_leveranse == "NY wholesale":
+            return "Wholesale"
+        elif any(keyword in prioritert_product_id.lower() for keyword in service_keywords):
+            return "FTTH Service"
+        elif status_leveranse == "NY FTTH":
+            return "FTTH Fortetning"
+        else:
+            print(f"{item}: Mangler FTTx")
+            return "FTTH Fortetning" #None
+
+
+    print(f"{item}: Mangler FTTx")
+    return None
+
+
+# Type oppdrag til Monday
+def determine_type_oppdrag(orderinfo_description, VULA_nr, prioritert_product_id):
+    """
+    Bestemmer type oppdrag basert på ordrebeskrivelse, leveransestatus, WOC-type oppdrag og VULA-referanser.
+
+    :param orderinfo_description: Ordrebeskrivelse (str).
+    :param VULA_nr: VULA-referansenummer (str eller list).
+    :return: Type oppdrag (str) eller None hvis ingen kriterier er oppfylt.
+    """
+    if orderinfo_description == "BB_ACCESS":
+        return "BB-Access"
+    elif "LVA1A" in prioritert_product_id: #status_leveranse == "NY FTTH" or
+        return "Komplett fortetning"
+    elif "LVK0" in prioritert_product_id:
+        return "Eksperthjelpen"
+    elif "LVK2F" in prioritert_product_id:
+        return "Installasjonshjelpen"
+    elif VULA_nr == "VULA":
+        return "VULA"
+    elif VULA_nr == "VULA CDK":
+        return "VULA CDK"
+    elif "LVT2D" in prioritert_product_id:
+        return "AEG"
+    elif "LVT1C" in prioritert_product_id:
+        return "Leveranse timer - Fiber"
+    elif "DLS99" in prioritert_product_id:
+        return "DLS99"
+
+
+    return None
+
+
+# GPON/P2P
+def determine_gpon_p2p(status_leveranse, VULA_nr, gpon_p2p_woc):
+    """
+    Bestemmer GPON/P2P-type basert på leveransestatus, VULA-referanser og WOC-type.
+
+    :param status_leveranse: Status for leveranse (str).
+    :param VULA_nr: VULA-referansenummer (str eller list).
+    :param gpon_p2p_woc: WOC-type (str).
+    :return: GPON/P2P-type (str) eller None hvis ingen kriterier er oppfylt.
+    """
+    if status_leveranse == "NY FWA":
+        return "Antenne"
+    elif status_leveranse == "NY FTTH":
+        return "FTTH"
+    elif VULA_nr or gpon_p2p_woc == "GPON":
+        return "GPON"
+    elif gpon_p2p_woc == "LEIDE SAMBAND":
+        return "P2P"
+    elif status_leveranse == "NY privat":
+        return "AEG"
+    elif gpon_p2p_woc == "NORDIC CONNECT":
+        return "Ruterbytte"
+
+    return None
+
+
+def rad_for_rad(kolonner):
+    """Klassifiserer ordrene med determine_*-funksjonene, én ordre om gangen."""
+    kategori = [determine_oppdrag_kategori(cc, cd)
+                for cc, cd in zip(kolonner["Customer Category"], kolonner["kontraktdetaljer"])]
+    status = [
+        determine_status_leveranse(ids, desc, cd, woc, vula, kat, item)
+        for ids, desc, cd, woc, vula, kat, item in zip(
+            kolonner["Produkt ID"], kolonner["Orderinfo Description"], kolonner["kontraktdetaljer"],
+            kolonner["GPON/P2P - WOC"], kolonner["Wholesale ?"], kategori, kolonner["Item"])
+    ]
+    type_oppdrag = [determine_type_oppdrag(desc, vula, hoved) for desc, vula, hoved in zip(
+        kolonner["Orderinfo Description"], kolonner["Wholesale ?"], kolonner["Hovedprodukt"])]
+    fttx = [
+        determine_fttx(ids, hoved, cd, woc, desc, st, kat, item)
+        for ids, hoved, cd, woc, desc, st, kat, item in zip(
+            kolonner["Produkt ID"], kolonner["Hovedprodukt"], kolonner["kontraktdetaljer"],
+            kolonner["GPON/P2P - WOC"], kolonner["Orderinfo Description"], status, kategori, kolonner["Item"])
+    ]
+    gpon_p2p = [determine_gpon_p2p(st, vula, woc)
+                for st, vula, woc in zip(status, kolonner["Wholesale ?"], kolonner["GPON/P2P - WOC"])]
+    return {"Kunde Kategori": kategori, "Status Leveranse": status, "Type oppdrag": type_oppdrag,
+            "Type FTTx": fttx, "GPON/P2P": gpon_p2p}
+
+
+def mal(funksjon, runder):
+    """Kjører funksjonen `runder` ganger uten GC og utskrift, og returnerer resultatet og mediantiden i sekunder."""
+    tider = []
+    gc.disable()
+    try:
+        with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            for _ in range(runder):
+                start = time.perf_counter()
+                resultat = funksjon()
+                tider.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return resultat, statistics.median(tider)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--antall", type=int, default=100000, help="Antall work orders i eksporten.")
+    parser.add_argument("--runder", type=int, default=3, help="Antall målinger per variant.")
+    args = parser.parse_args()
+
+    entries = lag_eksport(args.antall)
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        tabell = lag_monday_tabell(entries)
+    kolonner = {kolonne: tabell[kolonne].tolist() for kolonne in INNDATA}
+    print(f"Syntetisk eksport: {args.antall} work orders, {len(tabell)} aktuelle")
+
+    rader, rader_sekunder = mal(lambda: rad_for_rad(kolonner), args.runder)
+    (regler, regelnavn), regler_sekunder = mal(lambda: klassifiser(kolonner), args.runder)
+
+    print(f"determine_* rad for rad   {rader_sekunder * 1e3:8.1f} ms")
+    print(f"klassifiser (regeltabell) {regler_sekunder * 1e3:8.1f} ms  {rader_sekunder / regler_sekunder:5.1f}x")
+    if rader != regler:
+        sys.exit("Regeltabellen gir ikke samme klassifisering som determine_*.")
+    print("Samme klassifisering fra begge.\n")
+
+    for kolonne, antall in tell_regler(regelnavn).items():
+        print(kolonne)
+        for navn, treff in sorted(antall.items(), key=lambda par: -par[1]):
+            print(f"    {treff:8d}  {navn}")
+
+
+if __name__ == "__main__":
+    main()
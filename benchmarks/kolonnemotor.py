@@ -0,0 +1,59 @@
+"""
+Sammenligner den kolonnevise motoren (woc_kolonnemotor) med lag_monday_import på en stor syntetisk WoC-eksport.
+
+Sjekker at begge gir nøyaktig samme Monday-import, og måler tiden for hver av dem.
+
+Bruk:
+    python benchmarks/kolonnemotor.py [--antall 100000] [--runder 1]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from benchmarks.syntetisk_eksport import lag_eksport
+from woc_kolonnemotor import lag_monday_tabell
+from woc_to_monday import lag_monday_import
+
+
+def mal(funksjon, runder):
+    """Kjører funksjonen `runder` ganger uten utskrift, og returnerer resultatet og mediantiden i sekunder."""
+    tider = []
+    for _ in range(runder):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            resultat = funksjon()
+            tider.append(time.perf_counter() - start)
+    return resultat, statistics.median(tider)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--antall", type=int, default=100000, help="Antall work orders i eksporten.")
+    parser.add_argument("--runder", type=int, default=1, help="Antall målinger per motor.")
+    args = parser.parse_args()
+
+    entries = lag_eksport(args.antall)
+    print(f"Syntetisk eksport: {args.antall} work orders")
+
+    # Oppvarming, så referansedata og oppslag ikke tas med i målingene
+    mal(lambda: lag_monday_import(entries[:100]), 1)
+
+    rader, rader_sekunder = mal(lambda: lag_monday_import(entries), args.runder)
+    kolonner, kolonner_sekunder = mal(lambda: lag_monday_tabell(entries), args.runder)
+
+    print(f"lag_monday_import (rad for rad)  {rader_sekunder:7.2f} s")
+    print(f"lag_monday_tabell (kolonnevis)   {kolonner_sekunder:7.2f} s  {rader_sekunder / kolonner_sekunder:4.1f}x")
+    if not rader.equals(kolonner):
+        sys.exit("Motorene gir ikke samme Monday-import.")
+    print(f"Samme Monday-import fra begge: {len(rader)} rader.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Måler hvor raskt Monday-importen sendes med send_til_monday, mot den lokale Monday-serveren.
+
+Serveren har et kompleksitetsbudsjett og kan gi feil både før og etter at et kall er utført, så
+målingen viser også hvor mange kall som ble begrenset eller feilet og sendt på nytt. Importen sendes
+to ganger: første gang opprettes alle items, andre gang skal alle oppdateres. Sjekker at hver
+kjøring sendte alle ordrene, at feilene fra serveren ble sendt på nytt, og at det ikke finnes
+duplikater på boardet etterpå.
+
+Bruk:
+    python benchmarks/monday_push.py [--antall 2000] [--tilkoblinger 4] [--feilrate 0.02] [--feilrate-etter 0.02]
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from benchmarks.syntetisk_eksport import lag_eksport
+from Hjelpeskript.monday_api import STANDARD_BATCHSTORRELSE, MondayKlient, send_til_monday
+from Hjelpeskript.monday_lokal_server import start_lokal_server
+from woc_to_monday import columns, lag_monday_import
+
+BOARD_ID = 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--antall", type=int, default=2000, help="Antall work orders i eksporten.")
+    parser.add_argument("--tilkoblinger", type=int, default=4, help="Maks antall samtidige kall.")
+    parser.add_argument("--batch", type=int, default=STANDARD_BATCHSTORRELSE, help="Rader i første batch.")
+    parser.add_argument("--budsjett", type=int, default=10_000_000, help="Kompleksitet per tidsvindu på serveren.")
+    parser.add_argument("--vindu", type=float, default=5, help="Sekunder før budsjettet fornyes.")
+    parser.add_argument("--feilrate", type=float, default=0.02, help="Andel kall som feiler før de utføres.")
+    parser.add_argument("--feilrate-etter", type=float, default=0.02,
+                        help="Andel kall som utføres, men der svaret er en feil.")
+    parser.add_argument("--forsinkelse", type=float, default=0.02, help="Sekunder hvert kall tar på serveren.")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        df = lag_monday_import(lag_eksport(args.antall))
+    print(f"Syntetisk eksport: {args.antall} work orders, {len(df)} rader")
+
+    server, lokal, url = start_lokal_server(budsjett=args.budsjett, vindu_sekunder=args.vindu,
+                                            feilrate=args.feilrate, feilrate_etter=args.feilrate_etter,
+                                            forsinkelse=args.forsinkelse, token="lokal", seed=1)
+    kolonnekart = {kolonne: kolonne for kolonne in columns if kolonne != "Item"}
+    antall_ordre = df["Ordrenummer"].nunique()
+    try:
+        for runde in ("Første kjøring", "Ny kjøring"):
+            start = time.perf_counter()
+            with MondayKlient("lokal", url, antall_tilkoblinger=args.tilkoblinger) as klient:
+                resultat = send_til_monday(df, klient, BOARD_ID, kolonnekart, args.batch)
+            sekunder = time.perf_counter() - start
+            print(f"{runde:15s} {sekunder:6.2f} s  {len(df) / sekunder:7.1f} rader/s  "
+                  f"opprettet {resultat['opprettet']}, oppdatert {resultat['oppdatert']}, "
+                  f"{resultat['kall']} kall, {resultat['begrenset']} begrenset, {resultat['feil']} feil")
+            # Items som ble opprettet selv om svaret feilet, oppdateres i neste forsøk
+            sendt = resultat["opprettet"] + resultat["oppdatert"]
+            if sendt != antall_ordre or resultat["feilet"] or (runde == "Ny kjøring" and resultat["opprettet"]):
+                sys.exit(f"{runde}: {sendt} av {antall_ordre} ordre sendt, {resultat['opprettet']} opprettet, "
+                         f"{len(resultat['feilet'])} avvist.")
+        if (args.feilrate or args.feilrate_etter) and not lokal.antall_feil:
+            sys.exit("Serveren ga ingen feil, så målingen sier ingenting om nye forsøk. Øk --feilrate.")
+        items = lokal.items_pa_board(BOARD_ID)
+    finally:
+        server.shutdown()
+
+    ordrenumre = {item["verdier"]["Ordrenummer"] for item in items}
+    if len(items) != len(ordrenumre) or len(items) != antall_ordre:
+        sys.exit(f"{len(items)} items på boardet for {antall_ordre} ordrenumre.")
+    print(f"{len(items)} items på boardet, ett per ordrenummer, etter {lokal.antall_feil} feil fra serveren.")
+
+
+if __name__ == "__main__":
+    main()
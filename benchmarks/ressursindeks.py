@@ -0,0 +1,153 @@
+"""
+Måler hvor mye ressursoppslaget fra serviceDetails koster per ordre, før og etter indekser_ressurser.
+
+Før ble serviceDetails gått gjennom fire ganger i extract_service_details, to ganger for CircuitId
+og CustomerId til PDF-en, og én gang hver for LU-nummer og produktbeskrivelser. Nå gås listen
+gjennom én gang, og alle feltene leses fra oppslaget. Sjekker også at resultatene er like.
+
+Bruk:
+    python benchmarks/ressursindeks.py [--antall 20000] [--runder 5] [--linjer 8]
+"""
+import argparse
+import contextlib
+import gc
+import os
+import statistics
+import sys
+import time
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from benchmarks.syntetisk_eksport import RESSURSTYPER, lag_eksport
+from Hjelpeskript.ordreberikelse import extract_resource_id, extract_service_details, indekser_ressurser
+from woc_to_monday import extract_lu_number, extract_product_descriptions
+
+
+# Slik ressursfeltene ble hentet før indekser_ressurser, med én gjennomgang av serviceDetails per felt
+def _gammel_service_details(entry):
+    service_details = entry.get("detailedOrderInformation", {}).get("serviceDetails", [])
+    sambandsnummer = None
+    available_resources = []
+    if isinstance(service_details, list):
+        circuit_ids = [d.get("resourceId", "").strip() for d in service_details
+                       if d.get("resourceType", "").strip().lower() == "circuitid" and d.get("resourceId")]
+        if circuit_ids:
+            sambandsnummer = circuit_ids[0]
+        else:
+            customer_ids = [d.get("resourceId", "").strip() for d in service_details
+                            if d.get("resourceType", "").strip().lower() == "customerid" and d.get("resourceId")]
+            if customer_ids:
+                sambandsnummer = customer_ids[0]
+        available_resources = [f"{d.get('resourceType', '').strip()}: {d.get('resourceId', '').strip()}"
+                               for d in service_details
+                               if d.get("resourceType", "").strip().lower() not in ["circuitid", "customerid"]]
+        available_resources.extend(f"DG: {d.get('resourceId', '').strip()}" for d in service_details
+                                   if d.get("resourceType", "").strip().lower() == "dg" and d.get("resourceId"))
+    if not sambandsnummer:
+        print(f"\nIngen sambandsnummer funnet for: {None}")
+        print("Tilgjengelige nummer:", available_resources)
+    return sambandsnummer, available_resources
+
+
+def _gammel_resource_id(entry, resource_type):
+    for sd in entry.get("detailedOrderInformation", {}).get("serviceDetails", []) or []:
+        if sd.get("resourceType") == resource_type:
+            return sd.get("resourceId", "")
+    return ""
+
+
+def _gammel_lu_number(entry):
+    service_details = entry.get("detailedOrderInformation", {}).get("serviceDetails", [])
+    if isinstance(service_details, list):
+        for detail in service_details:
+            if detail.get("resourceType") == "LU":
+                return detail.get("resourceId", "").strip()
+    return None
+
+
+def _gammel_product_descriptions(entry):
+    service_details = entry.get("detailedOrderInformation", {}).get("serviceDetails", [])
+    product_description = []
+    if isinstance(service_details, list):
+        for line in service_details:
+            prod_dscr = line.get("productDescription")
+            if prod_dscr:
+                product_description.append(prod_dscr)
+    return product_description
+
+
+def for_indeks(entries):
+    """Henter alle ressursfeltene for hver ordre med én gjennomgang av serviceDetails per felt."""
+    return [(_gammel_service_details(entry), _gammel_resource_id(entry, "CircuitId"),
+             _gammel_resource_id(entry, "CustomerId"), _gammel_lu_number(entry),
+             _gammel_product_descriptions(entry)) for entry in entries]
+
+
+def med_indeks(entries):
+    """Henter alle ressursfeltene for hver ordre fra indekser_ressurser."""
+    resultater = []
+    for entry in entries:
+        ressurser = indekser_ressurser(entry)
+        service_details = extract_service_details(entry, None, ressurser)
+        resultater.append((service_details, extract_resource_id(entry, "CircuitId", ressurser),
+                           extract_resource_id(entry, "CustomerId", ressurser),
+                           extract_lu_number(entry, ressurser), extract_product_descriptions(entry, ressurser)))
+    return resultater
+
+
+def med_flere_linjer(entries, linjer):
+    """Erstatter serviceDetails i hver ordre med `linjer` linjer, der ressurstypene går på rundgang."""
+    for nummer, entry in enumerate(entries):
+        entry["detailedOrderInformation"]["serviceDetails"] = [
+            {"resourceType": ressurs, "resourceId": f"{ressurs}-{nummer}-{i}", "productDescription": f"Prod {ressurs}"}
+            for i, ressurs in ((i, RESSURSTYPER[(nummer + i) % len(RESSURSTYPER)]) for i in range(linjer))
+        ]
+
+
+def mal(funksjon, runder):
+    """Kjører funksjonen `runder` ganger uten GC, og returnerer resultatet og mediantiden i sekunder."""
+    tider = []
+    gc.disable()
+    try:
+        for _ in range(runder):
+            start = time.perf_counter()
+            resultat = funksjon()
+            tider.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return resultat, statistics.median(tider)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--antall", type=int, default=20000, help="Antall work orders i eksporten.")
+    parser.add_argument("--runder", type=int, default=5, help="Antall målinger per variant.")
+    parser.add_argument("--linjer", type=int, default=0,
+                        help="Antall serviceDetails-linjer per ordre. Standard er 0-4 som i den syntetiske eksporten.")
+    args = parser.parse_args()
+
+    entries = lag_eksport(args.antall)
+    if args.linjer:
+        med_flere_linjer(entries, args.linjer)
+    print(f"Syntetisk eksport: {args.antall} work orders, "
+          f"{sum(len(e['detailedOrderInformation']['serviceDetails']) for e in entries) / args.antall:.1f} "
+          "serviceDetails-linjer per ordre")
+
+    # Ordre uten sambandsnummer skrives ut i begge variantene, men ikke til terminalen
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        for_, for_sekunder = mal(lambda: for_indeks(entries), args.runder)
+        med, med_sekunder = mal(lambda: med_indeks(entries), args.runder)
+
+    for_per_ordre = for_sekunder / args.antall * 1e6
+    med_per_ordre = med_sekunder / args.antall * 1e6
+    print(f"Én gjennomgang per felt    {for_per_ordre:6.2f} µs per ordre")
+    print(f"indekser_ressurser         {med_per_ordre:6.2f} µs per ordre  "
+          f"({for_per_ordre - med_per_ordre:.2f} µs spart, {for_sekunder / med_sekunder:.1f}x)")
+    if for_ != med:
+        sys.exit("Ressursfeltene er ikke like før og etter indekser_ressurser.")
+    print("Samme ressursfelter fra begge.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Lager en syntetisk WoC-eksport med samme struktur som de ekte eksportene, til bruk i benchmarkene.
+
+Bruk:
+    python benchmarks/syntetisk_eksport.py <antall ordre> <filsti> [--seed 1]
+"""
+import argparse
+import json
+import random
+
+# (kommune, postnummer, poststed)
+KOMMUNER = [
+    ("DRAMMEN", "3001", "DRAMMEN"),
+    ("Oslo", "0150", "OSLO"),
+    ("Bergen", "5003", "BERGEN"),
+    ("Trondheim", "7010", "TRONDHEIM"),
+    ("Bærum", "1337", "SANDVIKA"),
+    ("Ukjentby", "9999", "UKJENT"),
+]
+
+PRODUKTKODER = ["LVA1A", "LVA1B", "LVK0", "LVK2F", "LVT2D", "LVT1C", "DLS99", "LVLU", "U0009A", "LVA2F", "LR02A"]
+
+RESSURSTYPER = ["CircuitId", "CustomerId", "DG", "LU", "Other"]
+
+
+def lag_work_order(nummer, rng):
+    """
+    Lager én syntetisk work order.
+
+    :param nummer: Løpenummer, brukes i ordrenummer og adresse.
+    :param rng: random.Random-instans.
+    :return: Dictionary med samme felter som i WoC-eksporten.
+    """
+    kommune, postnummer, poststed = rng.choice(KOMMUNER)
+    adresse = {"coordinates": {"system": "EUREF89", "x": 1.0 * nummer, "y": 2.0 * nummer}}
+    if rng.random() < 0.85:
+        adresse["streetAddress"] = {
+            "municipalityName": kommune, "municipalityNumber": "3301", "countyNumber": "33",
+            "streetName": f"Gate{nummer % 50}", "streetCode": "1", "houseNumber": str(nummer % 90 + 1),
+            "houseChar": rng.choice(["", "A"]), "city": poststed, "postalCode": postnummer,
+        }
+    else:
+        adresse["streetAddress"] = None
+        adresse["cadastralUnit"] = {
+            "municipalityName": kommune, "cadastralUnitNumber": nummer, "propertyUnitNumber": 2,
+            "postalCode": postnummer, "city": poststed,
+        }
+
+    produkter = rng.sample(PRODUKTKODER, rng.randint(1, 3))
+    service_details = [
+        {"resourceType": ressurs, "resourceId": f"{ressurs}-{nummer}", "productDescription": f"Prod {ressurs}"}
+        for ressurs in rng.sample(RESSURSTYPER, rng.randint(0, 4))
+    ]
+
+    entry = {
+        "workOrderId": {"referenceName": "WO", "referenceNumber": str(100000 + nummer)},
+        "clientOrderId": {"referenceName": "CO", "referenceNumber": str(500000 + nummer)},
+        "title": rng.choice(["Order", "Order OLT"]),
+        "supplier": {"companyName": "Leverandør", "contactPersons": []},
+        "buyer": {"companyName": "Kunde", "contactPersons": [
+            {"firstName": "Ola", "familyName": f"Nordmann{nummer}", "phone1": "99999999", "email": "ola@example.no"}]},
+        "wocOrderStatus": rng.choice(["Accepted", "received", "appointed", "closed"]),
+        "orderStatus": "open",
+        "orderType": rng.choice(["New", "Change"]),
+        "connectionPoint": {"fullName": f"CP{nummer}", "id": str(nummer), "remark": "Merknad"},
+        "areaOfSubject": rng.choice(["GPON", "LEIDE SAMBAND", "HELIOS", "NORDIC CONNECT"]),
+        "detailedAreaOfSubject": rng.choice(["GPON", "AEG"]),
+        "workOrderAddress": [adresse],
+        "issuedDate": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T07:42:32.347Z",
+        "modifiedDate": f"2025-02-{rng.randint(1, 28):02d}T08:00:00+01:00",
+        "deliveryPeriod": {"startDate": "2025-01-15T08:00:00+01:00", "endDate": "2025-03-01T08:00:00+01:00"},
+        "activityLog": [
+            {"action": rng.choice(["AcceptWorkOrder", "Other"]), "changed": f"2025-01-{rng.randint(10, 28)}T10:00:00Z"}
+            for _ in range(rng.randint(0, 5))
+        ],
+        "detailedOrderInformation": {
+            "customerCategory": rng.choice(["Privat", "Bedrift"]),
+            "orderDescription": rng.choice(["BB_ACCESS", "Installasjon"]),
+            "serviceDetails": service_details,
+            "user1": {},
+            "additionalInformation": [{"description": "Info", "characteristics": [{"name": "n", "value": "v"}]}],
+        },
+        "contract": {"detailedPurchaseArea": rng.choice(["FTTB", "FTTH", "AEG"]), "contractType": "T",
+                     "contractSegment": "S", "purchaseArea": "P", "priceRegion": "R"},
+        "orderlines": [
+            {"contractorProductId": kode, "description": f"Beskrivelse {kode}", "isMainProduct": linje == 0,
+             "lineNumber": linje, "quantity": 1, "unitOfMeasure": "stk", "project": None}
+            for linje, kode in enumerate(produkter)
+        ],
+        "externalOrderReferences": [],
+        "dependentWorkOrders": None,
+        "remarks": [{"initiator": "BUYER", "createdDate": "2025-01-29T07:42:32.347Z", "text": "Ring før oppmøte."}],
+    }
+    return entry
+
+
+def lag_eksport(antall, seed=1):
+    """
+    Lager en syntetisk WoC-eksport.
+
+    :param antall: Antall work orders.
+    :param seed: Seed, samme seed gir samme eksport.
+    :return: Liste med work orders.
+    """
+    rng = random.Random(seed)
+    return [lag_work_order(nummer, rng) for nummer in range(antall)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("antall", type=int, help="Antall work orders.")
+    parser.add_argument("filsti", help="Filen eksporten skrives til.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.filsti, "w", encoding="utf-8") as file:
+        json.dump(lag_eksport(args.antall, args.seed), file, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Sammenligner skrivetid og minnebruk for Monday_Import.xlsx med df.to_excel og med skriv_xlsx.
+
+df.to_excel (openpyxl) bygger hele arbeidsboken i minnet før noe skrives. skriv_xlsx skriver
+radene til filen etter hvert, og kan lese radene rett fra strom_monday_rader.
+
+Skrivetiden måles på de samme ferdige radene. Høyeste RSS måles i en egen prosess per variant,
+som leser en syntetisk eksport fra disk og skriver filen: med DataFrame som i dag, og med radene
+strømmet fra eksporten til filen. Sjekker også at cellene blir like.
+
+Bruk:
+    python benchmarks/xlsx_skriving.py [--antall 20000] [--runder 3]
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from benchmarks.syntetisk_eksport import lag_eksport
+
+
+def _maks_rss_mb():
+    # VmHWM gjelder bare denne prosessen. ru_maxrss arver toppen fra foreldreprosessen på Linux.
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for linje in status:
+                if linje.startswith("VmHWM:"):
+                    return int(linje.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss er i kB på Linux og i byte på macOS
+    maks = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maks / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def med_dataframe(rows, filsti):
+    """Skriver radene slik det ble gjort før, med pd.DataFrame(...).to_excel."""
+    import pandas as pd
+    from woc_to_monday import columns
+
+    with pd.ExcelWriter(filsti, engine="openpyxl", mode="w") as writer:
+        pd.DataFrame(rows, columns=columns).to_excel(writer, index=False, sheet_name="Data")
+
+
+def med_strom(rows, filsti):
+    """Skriver radene med skriv_xlsx."""
+    from Hjelpeskript.xlsx_strom import skriv_xlsx
+    from woc_to_monday import columns
+
+    skriv_xlsx(filsti, rows, columns, "Data")
+
+
+def les_celler(filsti):
+    """Leser alle cellene i det første arket."""
+    from openpyxl import load_workbook
+
+    arbeidsbok = load_workbook(filsti, read_only=True)
+    try:
+        return list(arbeidsbok.worksheets[0].iter_rows(values_only=True))
+    finally:
+        arbeidsbok.close()
+
+
+def _rss_for_variant(variant, eksportfil, filsti):
+    # Kjøres i en ny prosess, så høyeste RSS gjelder bare denne varianten
+    from Hjelpeskript.json_innlesing import les_work_orders
+    from woc_to_monday import extract_data_from_json, strom_monday_rader
+
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        # Ordrepristabellen lastes før målingen starter
+        extract_data_from_json([])
+        for_skriving = _maks_rss_mb()
+        start = time.perf_counter()
+        if variant == "dataframe":
+            med_dataframe(extract_data_from_json(les_work_orders(eksportfil)), filsti)
+        else:
+            med_strom(strom_monday_rader(les_work_orders(eksportfil)), filsti)
+        sekunder = time.perf_counter() - start
+    return for_skriving, _maks_rss_mb(), sekunder
+
+
+def mal(funksjon, runder):
+    """Kjører funksjonen `runder` ganger, og returnerer mediantiden i sekunder."""
+    tider = []
+    for _ in range(runder):
+        start = time.perf_counter()
+        funksjon()
+        tider.append(time.perf_counter() - start)
+    return statistics.median(tider)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--antall", type=int, default=20000, help="Antall work orders i eksporten.")
+    parser.add_argument("--runder", type=int, default=3, help="Antall målinger av skrivetiden per variant.")
+    args = parser.parse_args()
+
+    from woc_to_monday import columns, extract_data_from_json
+
+    entries = lag_eksport(args.antall)
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        rows = extract_data_from_json(entries)
+    print(f"Syntetisk eksport: {args.antall} work orders, {len(rows)} rader x {len(columns)} kolonner")
+
+    with tempfile.TemporaryDirectory() as mappe:
+        dataframe_fil = os.path.join(mappe, "dataframe.xlsx")
+        strom_fil = os.path.join(mappe, "strom.xlsx")
+
+        dataframe_sekunder = mal(lambda: med_dataframe(rows, dataframe_fil), args.runder)
+        strom_sekunder = mal(lambda: med_strom(rows, strom_fil), args.runder)
+        print("\nSkrivetid for ferdige rader")
+        print(f"    df.to_excel (openpyxl)  {dataframe_sekunder:7.2f} s")
+        print(f"    skriv_xlsx              {strom_sekunder:7.2f} s  {dataframe_sekunder / strom_sekunder:5.1f}x")
+        if les_celler(dataframe_fil) != les_celler(strom_fil):
+            sys.exit("skriv_xlsx gir ikke de samme cellene som df.to_excel.")
+        print("    Samme celler fra begge.")
+
+        eksportfil = os.path.join(mappe, "eksport.json")
+        with open(eksportfil, "w", encoding="utf-8") as file:
+            json.dump(entries, file, ensure_ascii=False)
+        del entries, rows
+
+        print("\nHele kjøringen fra eksportfil til Excel-fil, i en egen prosess per variant")
+        kontekst = multiprocessing.get_context("spawn")
+        for variant, navn in (("dataframe", "DataFrame + to_excel"), ("strom", "strom_monday_rader + skriv_xlsx")):
+            with kontekst.Pool(1) as pool:
+                for_skriving, maks, sekunder = pool.apply(
+                    _rss_for_variant, (variant, eksportfil, os.path.join(mappe, f"{variant}_rss.xlsx")))
+            print(f"    {navn:33s} {sekunder:7.2f} s  høyeste RSS {maks:7.1f} MB "
+                  f"({maks - for_skriving:+7.1f} MB under kjøringen)")
+
+
+if __name__ == "__main__":
+    main()
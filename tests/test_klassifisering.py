@@ -0,0 +1,50 @@
+"""
+Tester at regeltabellen i Hjelpeskript.klassifisering gir samme klassifisering som de gamle
+if/elif-kjedene i benchmarks/klassifisering.py.
+
+Kjør med:
+    python -m pytest tests
+"""
+import contextlib
+import io
+import os
+import sys
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from benchmarks.klassifisering import INNDATA, rad_for_rad
+from benchmarks.syntetisk_eksport import lag_eksport
+from Hjelpeskript.klassifisering import klassifiser
+from woc_kolonnemotor import lag_monday_tabell
+
+# Ordre som den syntetiske eksporten ikke lager: wholesale og ukjent kundekategori
+EKSTRA_RADER = [
+    {"Item": "VULA-1", "Customer Category": "Privat", "kontraktdetaljer": "FTTH", "Produkt ID": ["LR02A"],
+     "Hovedprodukt": "LR02A: Reise", "Orderinfo Description": "", "GPON/P2P - WOC": "GPON",
+     "Wholesale ?": ["WS-EC123"]},
+    {"Item": "VULA-2", "Customer Category": "Bedrift", "kontraktdetaljer": "AEG", "Produkt ID": [],
+     "Hovedprodukt": "", "Orderinfo Description": "", "GPON/P2P - WOC": "", "Wholesale ?": ["VULA9"]},
+    {"Item": "UKJENT-1", "Customer Category": None, "kontraktdetaljer": None, "Produkt ID": ["LVA1A"],
+     "Hovedprodukt": "LVA1A: Fortetning", "Orderinfo Description": "", "GPON/P2P - WOC": "NORDIC CONNECT",
+     "Wholesale ?": []},
+    {"Item": "PRIVAT-AEG", "Customer Category": "Privat", "kontraktdetaljer": "AEG", "Produkt ID": ["LVT2D"],
+     "Hovedprodukt": "LVT2D: AEG", "Orderinfo Description": "", "GPON/P2P - WOC": "", "Wholesale ?": []},
+]
+
+
+def test_regeltabellen_gir_samme_klassifisering_som_if_elif_kjedene():
+    with contextlib.redirect_stdout(io.StringIO()):
+        tabell = lag_monday_tabell(lag_eksport(2000))
+    kolonner = {kolonne: tabell[kolonne].tolist() for kolonne in INNDATA}
+    for rad in EKSTRA_RADER:
+        for kolonne in INNDATA:
+            kolonner[kolonne].append(rad[kolonne])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        forventet = rad_for_rad(kolonner)
+        resultat, _ = klassifiser(kolonner)
+
+    assert resultat == forventet
+    # De ekstra radene dekker wholesale og ukjent kundekategori
+    assert forventet["Status Leveranse"][-4:] == ["NY wholesale", "NY wholesale", None, "NY privat"]
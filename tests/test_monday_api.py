@@ -0,0 +1,89 @@
+"""
+Tester send_til_monday mot den lokale Monday-serveren.
+
+Kjør med:
+    python -m pytest tests
+"""
+import contextlib
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+PROSJEKT_MAPPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROSJEKT_MAPPE)
+
+from Hjelpeskript.monday_api import MondayKlient, send_til_monday
+from Hjelpeskript.monday_lokal_server import start_lokal_server
+
+BOARD_ID = 1
+KOLONNEKART = {"Ordrenummer": "ordre", "Kunde": "kunde"}
+
+
+@contextlib.contextmanager
+def lokal_monday(**innstillinger):
+    server, lokal, url = start_lokal_server(token="lokal", **innstillinger)
+    try:
+        yield lokal, url
+    finally:
+        server.shutdown()
+
+
+def lag_import(antall, kunde="Kunde", unntak=None):
+    ordrenumre = [str(1000 + i) for i in range(antall)]
+    kunder = [(unntak or {}).get(ordrenummer, f"{kunde} {ordrenummer}") for ordrenummer in ordrenumre]
+    return pd.DataFrame({"Item": [f"WO {o}" for o in ordrenumre], "Ordrenummer": ordrenumre, "Kunde": kunder})
+
+
+def send(url, df, batchstorrelse=5):
+    with MondayKlient("lokal", url, antall_tilkoblinger=2) as klient:
+        return send_til_monday(df, klient, BOARD_ID, KOLONNEKART, batchstorrelse)
+
+
+def verdier_pa_board(lokal):
+    items = lokal.items_pa_board(BOARD_ID)
+    ordrenumre = [item["verdier"]["ordre"] for item in items]
+    assert len(ordrenumre) == len(set(ordrenumre)), "Duplikater på boardet"
+    return {item["verdier"]["ordre"]: item["verdier"]["kunde"] for item in items}
+
+
+def test_ny_kjoring_oppdaterer_uten_duplikater():
+    with lokal_monday(budsjett=10_000_000, feilrate=0.2, feilrate_etter=0.2, seed=3) as (lokal, url):
+        df = lag_import(40)
+        forste = send(url, df)
+        andre = send(url, lag_import(40, kunde="Ny kunde"))
+
+    assert forste["opprettet"] + forste["oppdatert"] == 40
+    assert forste["feilet"] == []
+    assert (andre["opprettet"], andre["oppdatert"], andre["feilet"]) == (0, 40, [])
+
+    # Feilene etter at et kall er utført, må ha gitt nye forsøk uten at items ble opprettet to ganger
+    assert lokal.antall_feil > 0
+    assert forste["feil"] + andre["feil"] > 0
+    assert verdier_pa_board(lokal) == {o: f"Ny kunde {o}" for o in df["Ordrenummer"]}
+
+
+def test_begrenset_kall_sendes_pa_nytt():
+    with lokal_monday(budsjett=60_000, vindu_sekunder=1) as (lokal, url):
+        resultat = send(url, lag_import(20))
+
+    assert (resultat["opprettet"], resultat["oppdatert"], resultat["feilet"]) == (20, 0, [])
+    assert resultat["begrenset"] > 0
+    assert len(verdier_pa_board(lokal)) == 20
+
+
+@pytest.mark.parametrize("delvise_feil", [True, False], ids=["feil_per_item", "feil_for_hele_kallet"])
+def test_avvist_rad_rapporteres_og_resten_sendes(delvise_feil):
+    with lokal_monday(ugyldige_verdier={"UGYLDIG"}, delvise_feil=delvise_feil) as (lokal, url):
+        resultat = send(url, lag_import(12, unntak={"1006": "UGYLDIG"}))
+        # Uten feil per item kan radene før den avviste være opprettet, og oppdateres da i neste forsøk
+        assert resultat["opprettet"] + resultat["oppdatert"] == 11
+        assert [ordrenummer for ordrenummer, _ in resultat["feilet"]] == ["1006"]
+        assert "Ugyldig verdi i kolonne kunde" in resultat["feilet"][0][1]
+        assert "1006" not in verdier_pa_board(lokal)
+
+        # Med gyldig verdi opprettes den avviste ordren, og de andre oppdateres
+        resultat = send(url, lag_import(12))
+        assert (resultat["opprettet"], resultat["oppdatert"], resultat["feilet"]) == (1, 11, [])
+        assert verdier_pa_board(lokal) == {str(1000 + i): f"Kunde {1000 + i}" for i in range(12)}
@@ -0,0 +1,497 @@
+import argparse
+import contextlib
+import gc
+import itertools
+import re
+
+import numpy as np
+import pandas as pd
+from dateutil.parser import parse
+
+from woc_to_monday import columns, format_date, skriv_monday_import
+from Hjelpeskript.add_days_to_date import add_working_days_batch
+from Hjelpeskript.flere_eksporter import finn_eksportfiler, les_eksporter
+from Hjelpeskript.fylke_kommune_entreprenor import finn_entreprenor
+from Hjelpeskript.json_innlesing import i_blokker
+from Hjelpeskript.klassifisering import klassifiser, skriv_meldinger
+from Hjelpeskript.kommune_til_fylke import finn_fylke
+from Hjelpeskript.ordreberikelse import er_aktuell_ordre
+from Hjelpeskript.ordrepriser import finn_ordrepriser
+from Hjelpeskript.produktprioritet import velg_hovedprodukter
+
+# Antall work orders som flates ut og behandles samlet. Større blokker gir færre, men større tabeller.
+KOLONNE_BLOKKSTORRELSE = 20000
+
+# Tekst som starter med en ISO-dato. Datoen foran 'T' er da den lokale datoen dateutil ville gitt.
+_ISO_DATO = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+### UTFLATING ###
+
+def _tabell(poster):
+    """
+    Lager en tabell av en liste med dictionaries, med én kolonne per felt på øverste nivå.
+
+    Gir samme tabell som pd.json_normalize(poster, max_level=0), men uten json_normalize sin kopi
+    av hver post, som tar mesteparten av tiden på store eksporter. Helt utflatet (max_level=None)
+    kan ikke brukes, fordi tomme objekter og null da blir like, og heltall blir float.
+
+    Nestede objekter beholdes som dict, og tekst som object, slik at null i JSON (None) kan
+    skilles fra et felt som mangler (NaN). Skriptene bruker .get(felt, standard), som skiller på dette.
+    """
+    with pd.option_context("future.infer_string", False):
+        return pd.DataFrame(poster)
+
+
+def _felt(tabell, kolonne, standard=None):
+    """
+    Returnerer rad.get(kolonne, standard) for hver rad i tabellen.
+
+    :return: NumPy-array med dtype object.
+    """
+    if kolonne not in tabell:
+        return _fyll(len(tabell), standard)
+    verdier = tabell[kolonne].to_numpy(dtype=object, copy=True)
+    mangler = pd.isna(verdier) & (verdier != None)  # noqa: E711 - elementvis sammenligning
+    for posisjon in np.flatnonzero(mangler):
+        verdier[posisjon] = standard
+    return verdier
+
+
+def _objekter(verdier):
+    """Lager en endimensjonal NumPy-array med dtype object, også når verdiene er lister."""
+    verdier = list(verdier)
+    resultat = np.empty(len(verdier), dtype=object)
+    resultat[:] = verdier
+    return resultat
+
+
+def _fra_dict(verdier, nokkel, standard=None):
+    """Returnerer v.get(nokkel, standard) for hver dictionary i verdier, og standard for alt annet."""
+    return _objekter([v.get(nokkel, standard) if isinstance(v, dict) else standard for v in verdier])
+
+
+def _fyll(antall, verdi):
+    # np.full kan ikke brukes med lister og dictionaries som verdi
+    return _objekter(itertools.repeat(verdi, antall))
+
+
+def _barnetabell(lister):
+    """
+    Flater ut en kolonne med lister (f.eks. serviceDetails) til én tabell med én rad per element.
+
+    :param lister: Én liste per ordre. Verdier som ikke er lister, gir ingen rader.
+    :return: Tabell med feltene i elementene og 'ordre' (radnummeret i ordretabellen), i samme rekkefølge som i listene.
+    """
+    serie = pd.Series(lister, dtype=object)
+    serie = serie[[isinstance(liste, list) for liste in lister]].explode()
+    serie = serie[[isinstance(post, dict) for post in serie]]
+    tabell = _tabell(serie.tolist())
+    tabell["ordre"] = serie.index.to_numpy(dtype=np.int64)
+    return tabell
+
+
+def flat_ut_eksport(entries):
+    """
+    Flater ut work orders til tabeller, én rad per ordre eller per element i en liste.
+
+    :param entries: Liste med work orders.
+    :return: Dictionary med 'ordrer', 'adresser' (første workOrderAddress), 'kontaktpersoner' (første kontaktperson),
+             'tjenestedetaljer' (serviceDetails), 'ordrelinjer', 'eksterne_referanser' og 'aktivitetslogg'.
+             Alle tabellene unntatt 'ordrer' har kolonnen 'ordre' med radnummeret i 'ordrer'.
+    """
+    ordrer = _tabell(entries)
+    detaljer = _felt(ordrer, "detailedOrderInformation", {})
+    user1 = _fra_dict(detaljer, "user1", {})
+
+    # Første adresse. Mangler workOrderAddress, brukes en tom adresse, slik som i extract_work_order_details.
+    adresselister = _felt(ordrer, "workOrderAddress", [{}])
+    adresser = _tabell([liste[0] for liste in adresselister if liste])
+    adresser["ordre"] = np.flatnonzero([bool(liste) for liste in adresselister])
+
+    # Kontaktpersoner fra user1 hvis den finnes, ellers fra buyer
+    personlister = np.where([bool(u) for u in user1], _fra_dict(user1, "contactPersons", []),
+                            _fra_dict(_felt(ordrer, "buyer", {}), "contactPersons", []))
+    kontaktpersoner = _tabell([liste[0] for liste in personlister if liste])
+    kontaktpersoner["ordre"] = np.flatnonzero([bool(liste) for liste in personlister])
+
+    return {
+        "ordrer": ordrer,
+        "adresser": adresser,
+        "kontaktpersoner": kontaktpersoner,
+        "tjenestedetaljer": _barnetabell(_fra_dict(detaljer, "serviceDetails", [])),
+        "ordrelinjer": _barnetabell(_felt(ordrer, "orderlines", [])),
+        "eksterne_referanser": _barnetabell(_felt(ordrer, "externalOrderReferences", [])),
+        "aktivitetslogg": _barnetabell(_felt(ordrer, "activityLog", [])),
+    }
+
+
+### HJELPEFUNKSJONER FOR KOLONNENE ###
+
+def _per_ordre(tabell, verdier, antall, standard=None):
+    """Spre verdier fra en tabell med kolonnen 'ordre' til én verdi per ordre."""
+    resultat = _fyll(antall, standard)
+    resultat[tabell["ordre"].to_numpy()] = verdier
+    return resultat
+
+
+def _forste(tabell, maske, verdier, antall):
+    """Første verdi per ordre blant radene der maske er sann, eller None."""
+    ordre, start = np.unique(tabell["ordre"].to_numpy()[maske], return_index=True)
+    resultat = _fyll(antall, None)
+    resultat[ordre] = verdier[maske][start]
+    return resultat
+
+
+def _lister(tabell, maske, verdier, antall):
+    """Liste med verdiene per ordre blant radene der maske er sann, i samme rekkefølge som i eksporten."""
+    # Radene i barnetabellene er sortert på ordre, så hver ordre er et sammenhengende stykke
+    ordre, start = np.unique(tabell["ordre"].to_numpy()[maske], return_index=True)
+    verdier = verdier[maske].tolist()
+    slutt = start[1:].tolist() + [len(verdier)]
+    resultat = [[] for _ in range(antall)]
+    for posisjon, fra, til in zip(ordre.tolist(), start.tolist(), slutt):
+        resultat[posisjon] = verdier[fra:til]
+    return _objekter(resultat)
+
+
+def _sann(verdier):
+    return np.array([bool(v) for v in verdier], dtype=bool)
+
+
+def _tekst(verdier):
+    """f-streng av hver verdi, som NumPy-tekst (None blir 'None', slik som i skriptene)."""
+    return np.asarray(verdier, dtype=object).astype(str)
+
+
+def _map_unike(verdier, funksjon):
+    """Kaller funksjonen én gang per unike verdi og sprer resultatet til alle radene."""
+    koder, unike = pd.factorize(pd.Series(verdier, dtype=object), use_na_sentinel=False)
+    resultater = np.empty(len(unike), dtype=object)
+    for posisjon, verdi in enumerate(unike):
+        resultater[posisjon] = funksjon(None if pd.isna(verdi) else verdi)
+    return resultater[koder]
+
+
+def _tekstkolonne(tabell, kolonne, standard=""):
+    """Tekstfelt som kan sammenlignes vektorisert. Verdier som ikke er tekst, blir tomme."""
+    return pd.Series([v if isinstance(v, str) else "" for v in _felt(tabell, kolonne, standard)],
+                     index=tabell.index, dtype=object)
+
+
+### KOLONNENE I MONDAY-IMPORTEN ###
+
+def _items(ordrer, user1):
+    # Item: user1.fullName, ellers connectionPoint og detailedAreaOfSubject, med -OLT for OLT-ordre
+    connection_point = _felt(ordrer, "connectionPoint", {})
+    basis = np.char.add(np.char.add(np.char.add(np.char.add(
+        _tekst(_fra_dict(connection_point, "fullName")), "-"),
+        _tekst(_fra_dict(connection_point, "id"))), "-"),
+        _tekst(_felt(ordrer, "detailedAreaOfSubject")))
+    olt = np.char.endswith(np.char.strip(_tekst(_felt(ordrer, "title"))), "OLT")
+    basis = np.where(olt, np.char.add(basis, "-OLT"), basis).astype(object)
+    return np.where(_sann(user1), _fra_dict(user1, "fullName"), basis)
+
+
+def _adresser(adresser, antall):
+    # Adresse, kommune, postnummer og koordinater fra første workOrderAddress
+    gate = _felt(adresser, "streetAddress", {})
+    matrikkel = _felt(adresser, "cadastralUnit", {})
+    har_gate = _sann(gate)
+
+    adr_step = np.char.add(np.char.add(_tekst(_fra_dict(gate, "streetName", "")), " "),
+                           _tekst(_fra_dict(gate, "houseNumber", "")))
+    house_char = _fra_dict(gate, "houseChar", "")
+    adr_step = np.where(_sann(house_char), np.char.add(adr_step, _tekst(house_char)), adr_step)
+    gateadresse = np.char.add(np.char.add(adr_step, ", "), np.char.add(_tekst(_fra_dict(gate, "city")), ", Norge"))
+    matrikkeladresse = np.char.add(np.char.add("Gnr. ", _tekst(_fra_dict(matrikkel, "cadastralUnitNumber"))),
+                                   np.char.add(" Bnr. ", _tekst(_fra_dict(matrikkel, "propertyUnitNumber"))))
+
+    koordinater = _felt(adresser, "coordinates", {})
+    kolonner = {
+        "adresse": np.where(har_gate, gateadresse, matrikkeladresse).astype(object),
+        "kommune": np.where(har_gate, _fra_dict(gate, "municipalityName"), _fra_dict(matrikkel, "municipalityName")),
+        "post_nummer": np.where(har_gate, _fra_dict(gate, "postalCode"), _fra_dict(matrikkel, "postalCode")),
+        "coordsys": _fra_dict(koordinater, "system"),
+        "x_koordinat": _fra_dict(koordinater, "x"),
+        "y_koordinat": _fra_dict(koordinater, "y"),
+    }
+    resultat = {navn: _per_ordre(adresser, verdier, antall) for navn, verdier in kolonner.items()}
+    # Ordre uten adresse
+    resultat["adresse"][resultat["adresse"] == None] = "finner ikke addresse"  # noqa: E711
+    return resultat
+
+
+def _kontaktinfo(kontaktpersoner, antall):
+    # Kunde og telefon fra første kontaktperson, 'Ukjent' hvis det ikke finnes noen
+    navn = np.char.strip(np.char.add(np.char.add(_tekst(_felt(kontaktpersoner, "firstName", "")), " "),
+                                     _tekst(_felt(kontaktpersoner, "familyName", ""))))
+    telefon = _objekter(v.strip() if isinstance(v, str) else "Ukjent" for v in _felt(kontaktpersoner, "phone1", ""))
+    return (_per_ordre(kontaktpersoner, navn.astype(object), antall, "Ukjent"),
+            _per_ordre(kontaktpersoner, telefon, antall, "Ukjent"))
+
+
+def _tjenestedetaljer(tjenestedetaljer, items):
+    # Sambandsnummer (første CircuitId, ellers første CustomerId), LU-nummer og produktbeskrivelser
+    antall = len(items)
+    ressurstype = _tekstkolonne(tjenestedetaljer, "resourceType")
+    normalisert = ressurstype.str.strip().str.lower().to_numpy(dtype=object)
+    ressurs_id = _felt(tjenestedetaljer, "resourceId", "")
+    har_id = _sann(ressurs_id)
+    strippet = _objekter(v.strip() if isinstance(v, str) else v for v in ressurs_id)
+
+    circuit_id = _forste(tjenestedetaljer, (normalisert == "circuitid") & har_id, strippet, antall)
+    customer_id = _forste(tjenestedetaljer, (normalisert == "customerid") & har_id, strippet, antall)
+    sambandsnummer = np.where(circuit_id != None, circuit_id, customer_id)  # noqa: E711
+
+    # LU-nummer er første linje med resourceType 'LU', også hvis resourceId er tom
+    lu_nummer = _forste(tjenestedetaljer, (ressurstype == "LU").to_numpy(), strippet, antall)
+
+    beskrivelse = _felt(tjenestedetaljer, "productDescription")
+    produktbeskrivelser = _lister(tjenestedetaljer, _sann(beskrivelse), beskrivelse, antall)
+
+    # Samme logging som extract_service_details for ordre uten sambandsnummer
+    mangler = np.flatnonzero(~_sann(sambandsnummer))
+    if len(mangler):
+        tekst_id = _objekter(v if isinstance(v, str) else "" for v in strippet)
+        andre = _lister(tjenestedetaljer, ~np.isin(normalisert, ["circuitid", "customerid"]),
+                        (ressurstype.str.strip() + ": ").to_numpy(dtype=object) + tekst_id, antall)
+        dg = _lister(tjenestedetaljer, (normalisert == "dg") & har_id, "DG: " + tekst_id, antall)
+        for posisjon in mangler:
+            print(f"\nIngen sambandsnummer funnet for: {items[posisjon]}")
+            print("Tilgjengelige nummer:", andre[posisjon] + dg[posisjon])
+
+    return sambandsnummer, lu_nummer, produktbeskrivelser
+
+
+def _ordrelinjer(ordrelinjer, antall):
+    # Produkt-ID og type oppdrag fra WOC (beskrivelsen av hovedproduktet)
+    produkt_id = _felt(ordrelinjer, "contractorProductId")
+    beskrivelse = _felt(ordrelinjer, "description")
+    hovedprodukt = np.array([v is True for v in _felt(ordrelinjer, "isMainProduct")], dtype=bool)
+    return (_lister(ordrelinjer, _sann(produkt_id), produkt_id, antall),
+            _lister(ordrelinjer, _sann(beskrivelse) & hovedprodukt, beskrivelse, antall))
+
+
+def _vula_nummer(ordrer, eksterne_referanser, items):
+    # VULA/wholesale: referenceNumber som inneholder 'WS-EC' eller 'VULA'
+    referanse = _felt(eksterne_referanser, "referenceNumber")
+    tekst = _tekstkolonne(eksterne_referanser, "referenceNumber")
+    vula = (tekst.str.contains("WS-EC", regex=False) | tekst.str.contains("VULA", regex=False)).to_numpy()
+    vula_nr = _lister(eksterne_referanser, _sann(referanse) & vula, referanse, len(ordrer))
+
+    # Er externalOrderReferences ett objekt og ikke en liste, brukes referenceNumber uten filter
+    for posisjon, verdi in enumerate(_felt(ordrer, "externalOrderReferences", [])):
+        if not isinstance(verdi, list):
+            ref_num = verdi.get("referenceNumber")
+            if ref_num:
+                vula_nr[posisjon] = [ref_num]
+            print(f'\nSjekk om {items[posisjon]} er VULA')
+    return vula_nr
+
+
+def _ordredatoer(aktivitetslogg, issued_dates, items):
+    # Ordredato: siste AcceptWorkOrder i activityLog, ellers issuedDate
+    antall = len(issued_dates)
+    changed = _felt(aktivitetslogg, "changed")
+    maske = (_felt(aktivitetslogg, "action") == "AcceptWorkOrder") & _sann(changed)
+    aksept = pd.Series(changed[maske], index=aktivitetslogg.index[maske], dtype=object)
+
+    # Tidspunktene sammenlignes i UTC. Tekst pandas ikke forstår, leses med dateutil.
+    tidspunkt = pd.to_datetime(aksept, utc=True, format="ISO8601", errors="coerce")
+    for indeks in tidspunkt.index[tidspunkt.isna()]:
+        dato = pd.Timestamp(parse(aksept[indeks]))
+        tidspunkt[indeks] = dato.tz_localize("UTC") if dato.tzinfo is None else dato.tz_convert("UTC")
+
+    ordre = aktivitetslogg.loc[maske, "ordre"]
+    vinnere = tidspunkt.groupby(ordre.to_numpy(), sort=False).idxmax()
+
+    ordre_datoer = np.array(issued_dates, dtype=object)
+    for posisjon, indeks in vinnere.items():
+        tekst = aksept[indeks]
+        ordre_datoer[posisjon] = tekst[:10] if _ISO_DATO.match(tekst) else parse(tekst).strftime("%Y-%m-%d")
+
+    # Samme logging som lag_monday_rader for ordre uten AcceptWorkOrder
+    mangler = np.ones(antall, dtype=bool)
+    mangler[vinnere.index.to_numpy(dtype=np.int64)] = False
+    for posisjon in np.flatnonzero(mangler):
+        print(items[posisjon])
+    return ordre_datoer
+
+
+@contextlib.contextmanager
+def _uten_gc():
+    # Tabellene lager mange små objekter, og GC-en ville ellers gå gjennom dem gang på gang.
+    # Slås bare av mens én blokk behandles, så søppel fra blokken ryddes før neste.
+    gc_var_pa = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_var_pa:
+            gc.enable()
+
+
+def lag_monday_tabell_for_blokk(json_data):
+    """
+    Lager Monday-radene for én blokk med work orders, kolonnevis.
+
+    :param json_data: Liste med work orders.
+    :return: Dictionary med kolonnenavn -> liste med verdier, én per aktuell ordre, uten Ordreverdi.
+    """
+    with _uten_gc():
+        return _monday_tabell_for_blokk(json_data)
+
+
+def lag_monday_rader_for_blokk(json_data):
+    """
+    Lager Monday-radene for én blokk med work orders med den kolonnevise motoren, som rader.
+
+    :param json_data: Liste med work orders.
+    :return: Liste med rader, én per aktuell ordre, med kolonnene i `columns`, uten Ordreverdi.
+             Samme rader som woc_to_monday.extract_data_from_block.
+    """
+    tabell = lag_monday_tabell_for_blokk(json_data)
+    return [list(rad) for rad in zip(*(tabell[kolonne] for kolonne in columns))]
+
+
+def _monday_tabell_for_blokk(json_data):
+    entries = [entry for entry in json_data if er_aktuell_ordre(entry)]
+    if not entries:
+        return {kolonne: [] for kolonne in columns}
+    tabeller = flat_ut_eksport(entries)
+    ordrer = tabeller["ordrer"]
+    antall = len(ordrer)
+
+    detaljer = _felt(ordrer, "detailedOrderInformation", {})
+    user1 = _fra_dict(detaljer, "user1", {})
+    items = _items(ordrer, user1)
+
+    adresse = _adresser(tabeller["adresser"], antall)
+    ingen_adresse = np.ones(antall, dtype=bool)
+    ingen_adresse[tabeller["adresser"]["ordre"].to_numpy()] = False
+    fylker = _fyll(antall, None)
+    fylker[~ingen_adresse] = _map_unike(adresse["kommune"][~ingen_adresse], finn_fylke)
+    if ingen_adresse.any():
+        fylker[ingen_adresse] = finn_fylke("Mangler info")
+    entreprenorer = _map_unike(adresse["post_nummer"], finn_entreprenor)
+
+    kunde_navn, telefon_nr = _kontaktinfo(tabeller["kontaktpersoner"], antall)
+
+    sambandsnummer, lu_nummer, produktbeskrivelser = _tjenestedetaljer(tabeller["tjenestedetaljer"], items)
+
+    product_ids, woc_type_oppdrag = _ordrelinjer(tabeller["ordrelinjer"], antall)
+    hovedprodukter = velg_hovedprodukter(zip(product_ids, woc_type_oppdrag))
+
+    # Spidernummer: workOrderId i første dependentWorkOrders
+    spidernummer = []
+    for avhengige in _felt(ordrer, "dependentWorkOrders"):
+        if isinstance(avhengige, list) and avhengige:
+            spidernummer.append(avhengige[0].get("workOrderId", "").strip())
+        else:
+            spidernummer.append(None)
+
+    vula_nr = _vula_nummer(ordrer, tabeller["eksterne_referanser"], items)
+
+    # Datoer
+    issued = _felt(ordrer, "issuedDate")
+    issued_dates = [dato.split("T")[0] for dato in issued]
+    leveringsperiode = _felt(ordrer, "deliveryPeriod", {})
+    start_arbeid = _map_unike(_fra_dict(leveringsperiode, "startDate"), format_date)
+    dato_leveranse = _map_unike(_fra_dict(leveringsperiode, "endDate"), format_date)
+    last_transaction = _map_unike(_felt(ordrer, "modifiedDate"), format_date)
+    ordre_datoer = _ordredatoer(tabeller["aktivitetslogg"], issued_dates, items)
+    bookes_innen = add_working_days_batch(list(issued), 4)
+
+    orderinfo_description = _fra_dict(detaljer, "orderDescription")
+    customer_category = _fra_dict(detaljer, "customerCategory")
+    contract_details = _fra_dict(_felt(ordrer, "contract", {}), "detailedPurchaseArea")
+    gpon_p2p_woc = _felt(ordrer, "areaOfSubject")
+
+    tabell = {
+        "Item": items,
+        "Adresse": adresse["adresse"],
+        "Kommune": adresse["kommune"],
+        "Fylke": fylker,
+        "Kunde": kunde_navn,
+        "Telefon": telefon_nr,
+        "Issued Date": issued_dates,
+        "Bookes innen": bookes_innen,
+        "Ordredato": ordre_datoer,
+        "Entreprenør": entreprenorer,
+        "Fylke Status": fylker,
+        "Start arbeid tidligst": start_arbeid,
+        "Dato leveranse": dato_leveranse,
+        "WOC Status": _fyll(antall, None),
+        "BC Status": _fyll(antall, None),
+        "UE Status": _fyll(antall, None),
+        "Ordrenummer": _fra_dict(_felt(ordrer, "clientOrderId", {}), "referenceNumber"),
+        "Sambandsnummer": sambandsnummer,
+        "WOC/connector": _fyll(antall, "WOC"),
+        "Spidernummer": spidernummer,
+        "Status Leveranse": None,
+        "kontraktdetaljer": contract_details,
+        "Type FTTx": None,
+        "Ordreverdi": _fyll(antall, None),
+        "Due Date": dato_leveranse,
+        "Kunde Kategori": None,
+        "GPON/P2P": None,
+        "GPON/P2P - WOC": gpon_p2p_woc,
+        "GPON/AEG - from detailedAreaOfSubject": _felt(ordrer, "detailedAreaOfSubject"),
+        "Type oppdrag": None,
+        "Type oppdrag WOC": woc_type_oppdrag,
+        "LU-nummer": lu_nummer,
+        "Last Transaction Date": last_transaction,
+        "Hovedprodukt": hovedprodukter,
+        "Produkt ID": product_ids,
+        "Wholesale ?": vula_nr,
+        "Beskrivelse av produkt": produktbeskrivelser,
+        "Coordsys": adresse["coordsys"],
+        "X-koordinat": adresse["x_koordinat"],
+        "Y-koordinat": adresse["y_koordinat"],
+        "Orderinfo Description": orderinfo_description,
+        "Customer Category": customer_category,
+    }
+
+    # Kunde Kategori, Status Leveranse, Type oppdrag, Type FTTx og GPON/P2P med de samme reglene som lag_monday_rader.
+    # Ordrene som må sjekkes, skrives ut samlet for hele eksporten, se lag_monday_tabell.
+    klassifisering, _ = klassifiser(tabell)
+    tabell.update(klassifisering)
+    return {kolonne: list(verdier) for kolonne, verdier in tabell.items()}
+
+
+def lag_monday_tabell(json_data, blokkstorrelse=KOLONNE_BLOKKSTORRELSE):
+    """
+    Lager Monday-importen kolonnevis, som et alternativ til lag_monday_import.
+
+    Eksporten flates ut til tabeller (ordrer, adresser, kontaktpersoner, serviceDetails, orderlines,
+    externalOrderReferences og activityLog), og kolonnene regnes ut for hele blokker med ordre om
+    gangen. Resultatet er det samme som fra lag_monday_import.
+
+    :param json_data: Iterable med work orders, f.eks. les_work_orders(json_file_path).
+    :param blokkstorrelse: Antall work orders som behandles samlet.
+    :return: DataFrame med én rad per aktuell ordre og kolonnene i `columns`.
+    """
+    kolonner = {kolonne: [] for kolonne in columns}
+    for blokk in i_blokker(json_data, blokkstorrelse):
+        for kolonne, verdier in lag_monday_tabell_for_blokk(blokk).items():
+            kolonner[kolonne].extend(verdier)
+    if kolonner["Item"]:
+        skriv_meldinger(klassifiser(kolonner)[1], kolonner["Item"])
+
+    # Ordreverdi for alle ordrene i én omgang, slik som fyll_inn_ordrepriser
+    kolonner["Ordreverdi"] = list(finn_ordrepriser(kolonner["Type FTTx"], kolonner["Hovedprodukt"]))
+    return pd.DataFrame(kolonner, columns=columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lager Monday-importen med den kolonnevise motoren.")
+    parser.add_argument("json_file_paths", nargs="+",
+                        help="JSON-filer eller mapper. Flere eksporter slås sammen uten duplikater.")
+    args = parser.parse_args()
+
+    skriv_monday_import(lag_monday_tabell(les_eksporter(finn_eksportfiler(args.json_file_paths))))
+
+
+if __name__ == "__main__":
+    main()
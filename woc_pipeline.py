@@ -0,0 +1,365 @@
+import argparse
+import contextlib
+import functools
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from woc_to_monday import (BLOKKSTORRELSE, ENDRINGSIMPORT_FIL, columns, fyll_inn_ordrepriser, lag_monday_filer,
+                           lag_monday_rader, monday_filer, samle_meldinger_for_rader, skriv_endringsimport)
+from woc_kolonnemotor import lag_monday_rader_for_blokk
+from Generere_PDF_fra_JSON import ferdigstill_utkast, generer_pdfer_for_ordrer, lag_pdf_zip, skriv_pdfer
+from Hjelpeskript.arbeidsomrade import Arbeidsomrade
+from Hjelpeskript.json_innlesing import i_blokker
+from Hjelpeskript.klassifisering import skriv_samlede_meldinger
+from Hjelpeskript.flere_eksporter import finn_eksportfiler, les_eksporter
+from Hjelpeskript.ordreberikelse import berik_ordrer, er_aktuell_ordre
+from Hjelpeskript.ordrecache import Ordrecache
+from Hjelpeskript.parallell import (ARBEIDER_BLOKKSTORRELSE, antall_arbeidere_eller_standard, lag_prosesspool,
+                                   map_i_rekkefolge)
+from Hjelpeskript.referansedata import referansedata_versjon
+from Hjelpeskript.tilstandslager import TILSTAND_FIL, Tilstandslager
+from Hjelpeskript.utdataformater import STANDARD_FORMATER, UTDATAFORMATER, lag_fil, skriv_filer, velg_formater
+
+# Standard mappe for resultatene når scriptet kjøres fra kommandolinjen
+output_directory = os.path.dirname(os.path.abspath(__file__))
+
+# Filnavnet til ZIP-filen med alle PDF-ene, se lag_nedlastinger
+PDF_ZIP_FIL = "generated_pdfs.zip"
+
+# Motorene som kan lage Monday-radene: radvis (woc_to_monday) eller kolonnevis (woc_kolonnemotor).
+# Begge gir de samme radene.
+MOTORER = ("rad", "kolonne")
+STANDARD_MOTOR = "rad"
+
+
+def lag_rader_og_pdfer(entries, lag_pdfer=True, motor=STANDARD_MOTOR, tidspunkt=None, med_utkast=False):
+    """
+    Beriker work orders og lager Monday-rad og PDF for hver aktuelle ordre.
+
+    Kjøres enten i denne prosessen eller i en arbeidsprosess, se lag_prosesspool.
+
+    :param entries: Liste med work orders.
+    :param lag_pdfer: Sett til False for å bare lage Monday-radene.
+    :param motor: Motoren som lager Monday-radene, se MOTORER.
+    :param tidspunkt: Tidspunktet i toppteksten på PDF-ene. Standard er nå.
+    :param med_utkast: Ta med PDF-utkastet til ordrecachen, se lag_pdf_utkast.
+    :return: Liste med (posisjon i entries, Monday-rad uten Ordreverdi, PDF eller None, utkast eller None),
+             for aktuelle ordre.
+    :raises ValueError: Hvis motoren er ukjent.
+    """
+    if motor not in MOTORER:
+        raise ValueError(f"Ukjent motor '{motor}'. Velg blant {', '.join(MOTORER)}.")
+    posisjoner = [posisjon for posisjon, entry in enumerate(entries) if er_aktuell_ordre(entry)]
+    if motor == "kolonne" and not lag_pdfer:
+        # Uten PDF-er trengs ikke berikelsen, bare tabellene
+        return [(posisjon, row, None, None)
+                for posisjon, row in zip(posisjoner, lag_monday_rader_for_blokk(entries))]
+
+    ordrer = berik_ordrer(entries)
+    rows = lag_monday_rader(ordrer) if motor == "rad" else lag_monday_rader_for_blokk(entries)
+    utkast = [] if lag_pdfer and med_utkast else None
+    pdfer = list(generer_pdfer_for_ordrer(ordrer, tidspunkt, utkast)) if lag_pdfer else [None] * len(ordrer)
+    return list(zip(posisjoner, rows, pdfer, utkast or [None] * len(ordrer)))
+
+
+def _forbered_blokk(blokk, lag_pdfer, tilstandslager, ordrecache, tidspunkt):
+    # Finner hva i blokken som må behandles: uendrede ordre tas fra tilstandslageret
+    # og ferdige resultater fra ordrecachen. Resten ligger i 'mangler'. PDF-utkastene fra
+    # ordrecachen ferdigstilles med tidspunktet for denne kjøringen.
+    if tilstandslager is None:
+        endrede, uendrede = blokk, {}
+    else:
+        endrede, uendrede = tilstandslager.finn_endrede(blokk)
+
+    resultater = {}
+    nokler = {}
+    if ordrecache is None:
+        mangler = endrede
+    else:
+        mangler = []
+        for entry in endrede:
+            if not er_aktuell_ordre(entry):
+                continue
+            nokler[id(entry)] = ordrecache.nokkel(entry)
+            treff = ordrecache.hent(nokler[id(entry)], med_pdf=lag_pdfer)
+            if treff is None:
+                mangler.append(entry)
+            else:
+                row, utkast = treff
+                resultater[id(entry)] = (row, ferdigstill_utkast(utkast, tidspunkt) if lag_pdfer else None)
+
+    return {"blokk": blokk, "endrede": endrede, "uendrede": uendrede,
+            "resultater": resultater, "nokler": nokler, "mangler": mangler}
+
+
+def _fullfor_blokk(forberedt, nye, ordrecache):
+    # Legger nye resultater fra lag_rader_og_pdfer til cache-treffene, og lagrer dem i ordrecachen
+    resultater = forberedt["resultater"]
+    mangler = forberedt["mangler"]
+    for posisjon, row, pdf, utkast in nye:
+        entry = mangler[posisjon]
+        resultater[id(entry)] = (row, pdf)
+        if ordrecache is not None:
+            ordrecache.lagre(forberedt["nokler"][id(entry)], row, utkast)
+    return resultater
+
+
+def behandle_ordrer(entries, lag_pdfer=True, ordrecache=None, motor=STANDARD_MOTOR, tidspunkt=None):
+    """
+    Lager Monday-rad og PDF for hver aktuelle ordre i en blokk.
+
+    Med ordrecache hentes ferdige rader og PDF-utkast fra cachen, og bare ordrene som mangler
+    i cachen berikes, trekkes ut og legges ut. Utkastene får tidspunktet for denne kjøringen
+    i toppteksten, så en PDF fra cachen er lik en som lages på nytt.
+
+    :param entries: Liste med work orders.
+    :param lag_pdfer: Sett til False for å bare lage Monday-radene.
+    :param ordrecache: Ordrecache, eller None for å behandle alt.
+    :param motor: Motoren som lager Monday-radene, se MOTORER.
+    :param tidspunkt: Tidspunktet i toppteksten på PDF-ene. Standard er nå.
+    :return: Dictionary med id(entry) -> (Monday-rad uten Ordreverdi, PDF eller None), for aktuelle ordre.
+    """
+    tidspunkt = tidspunkt or datetime.now()
+    forberedt = _forbered_blokk(entries, lag_pdfer, None, ordrecache, tidspunkt)
+    nye = lag_rader_og_pdfer(forberedt["mangler"], lag_pdfer, motor, tidspunkt, med_utkast=ordrecache is not None)
+    return _fullfor_blokk(forberedt, nye, ordrecache)
+
+
+def process_export(entries, lag_pdfer=True, tilstandslager=None, ordrecache=None, antall_arbeidere=1,
+                   motor=STANDARD_MOTOR, tidspunkt=None):
+    """
+    Behandler en WoC-eksport: Monday-import og PDF-er.
+
+    Eksporten leses bare én gang. Hver blokk med work orders filtreres og berikes én gang
+    (adresse, fylke, entreprenør, ressurs-IDer og hovedprodukt), og brukes til både
+    Monday-radene og PDF-ene før neste blokk leses.
+
+    Med et tilstandslager behandles bare nye og endrede ordre. Radene for uendrede ordre hentes
+    fra tilstandslageret, så Monday-importen er fortsatt komplett, mens PDF-ene og
+    'monday_endret' bare gjelder nye og endrede ordre. Kall tilstandslager.lagre() når
+    resultatet er skrevet.
+
+    Med en ordrecache hentes rad og PDF for ordre som er behandlet før fra cachen, se behandle_ordrer.
+    Alle PDF-ene får samme tidspunkt i toppteksten, også de fra cachen.
+
+    Med flere arbeidere berikes og rendres blokkene i en prosesspool, mens tilstandslageret,
+    ordrecachen og Ordreverdi håndteres i denne prosessen. Resultatet er det samme som ved
+    seriell behandling, med radene og PDF-ene i samme rekkefølge som i eksporten.
+
+    :param entries: Iterable med work orders, f.eks. les_work_orders(json_file_path).
+    :param lag_pdfer: Sett til False for å bare lage Monday-importen.
+    :param tilstandslager: Tilstandslager for inkrementell behandling, eller None for å behandle alt.
+    :param ordrecache: Ordrecache, eller None for å behandle alle ordrene på nytt.
+    :param antall_arbeidere: Antall prosesser. 1 behandler alt i denne prosessen.
+    :param motor: Motoren som lager Monday-radene, se MOTORER. 'kolonne' lager radene for en hel
+                  blokk om gangen med woc_kolonnemotor.
+    :param tidspunkt: Tidspunktet i toppteksten på PDF-ene. Standard er når behandlingen starter.
+    :return: Dictionary med 'monday' (DataFrame), 'pdfer' (liste med (relativ filsti, PDF som bytes)),
+             'tidspunkt' (tidspunktet i PDF-ene),
+             med tilstandslager også 'monday_endret' (DataFrame med nye og endrede ordre),
+             og med ordrecache også 'ordrecache' (antall treff og bom).
+    """
+    tidspunkt = tidspunkt or datetime.now()
+    med_utkast = ordrecache is not None
+    rows = []
+    endrede_rows = []
+    pdfer = []
+    meldinger = {}
+    with contextlib.ExitStack() as stack:
+        if antall_arbeidere > 1:
+            pool = stack.enter_context(lag_prosesspool(antall_arbeidere))
+            blokker = i_blokker(entries, ARBEIDER_BLOKKSTORRELSE)
+        else:
+            pool = None
+            blokker = i_blokker(entries, BLOKKSTORRELSE)
+
+        forberedte = (_forbered_blokk(blokk, lag_pdfer, tilstandslager, ordrecache, tidspunkt) for blokk in blokker)
+        lag = functools.partial(lag_rader_og_pdfer, lag_pdfer=lag_pdfer, motor=motor, tidspunkt=tidspunkt,
+                                med_utkast=med_utkast)
+        if pool is None:
+            ferdige = ((forberedt, lag(forberedt["mangler"])) for forberedt in forberedte)
+        else:
+            ferdige = map_i_rekkefolge(pool, lag, ((forberedt, forberedt["mangler"]) for forberedt in forberedte),
+                                       antall_arbeidere)
+
+        for forberedt, nye in ferdige:
+            resultater = _fullfor_blokk(forberedt, nye, ordrecache)
+            endrede = forberedt["endrede"]
+            nye_rows = [resultater[id(entry)][0] for entry in endrede if id(entry) in resultater]
+            samle_meldinger_for_rader(nye_rows, meldinger)
+            if lag_pdfer:
+                pdfer.extend(resultater[id(entry)][1] for entry in endrede if id(entry) in resultater)
+
+            if tilstandslager is None:
+                rows.extend(nye_rows)
+                continue
+
+            # Radene lagres før Ordreverdi fylles inn, slik at prisen alltid er fra gjeldende pristabell
+            nye = {id(entry): resultater[id(entry)][0] for entry in endrede if id(entry) in resultater}
+            tilstandslager.registrer(endrede, nye)
+            endrede_rows.extend(nye_rows)
+            uendrede = forberedt["uendrede"]
+            for entry in forberedt["blokk"]:
+                row = nye.get(id(entry)) or uendrede.get(id(entry))
+                if row is not None:
+                    rows.append(row)
+
+    # Ordrene som må sjekkes, også de fra ordrecachen, skrives ut én gang for hele eksporten
+    skriv_samlede_meldinger(meldinger)
+
+    # Cachen og tilstandslageret har allerede lagret radene, så prisen havner ikke der
+    fyll_inn_ordrepriser(rows)
+
+    resultat = {
+        "monday": pd.DataFrame(rows, columns=columns),
+        "pdfer": pdfer,
+        "tidspunkt": tidspunkt,
+    }
+    if tilstandslager is not None:
+        resultat["monday_endret"] = pd.DataFrame(endrede_rows, columns=columns)
+    if ordrecache is not None:
+        resultat["ordrecache"] = ordrecache.oppsummering()
+    return resultat
+
+
+def skriv_resultat(resultat, output_directory=output_directory, antall_arbeidere=1, formater=STANDARD_FORMATER):
+    """
+    Skriver resultatet fra process_export til disk, med samme filnavn som scriptene.
+
+    :param resultat: Resultatet fra process_export.
+    :param output_directory: Mappen Monday_Import*.xlsx og generated_pdfs/ skrives til.
+    :param antall_arbeidere: Antall prosesser. Med flere enn 1 skrives Monday-filene samtidig.
+    :param formater: Formatene Monday-importen skrives i, se velg_formater. Alle lages fra samme DataFrame.
+    :return: Liste med filene og mappene som ble publisert i output_directory.
+    """
+    # Alt skrives til jobbens eget arbeidsområde og publiseres samlet til slutt, så samtidige
+    # kjøringer ikke blander filene sine, og ingen ser en halvskrevet fil
+    with Arbeidsomrade(output_directory) as arbeidsomrade:
+        skriv_filer([(os.path.join(arbeidsomrade.sti, filnavn), df, ark)
+                     for filnavn, df, ark in monday_filer(resultat["monday"], formater)], antall_arbeidere)
+        skriv_endringsimport(resultat.get("monday_endret"), arbeidsomrade.sti)
+        skriv_pdfer(resultat["pdfer"], os.path.join(arbeidsomrade.sti, "generated_pdfs"))
+        publisert = arbeidsomrade.publiser()
+
+    if resultat.get("monday_endret") is None:
+        # Fjern endringsimporten fra en tidligere inkrementell kjøring
+        skriv_endringsimport(None, output_directory)
+    return publisert
+
+
+def lag_nedlastinger(resultat, antall_arbeidere=1, formater=STANDARD_FORMATER):
+    """
+    Lager filene fra skriv_resultat i minnet, til nedlasting. Ingenting skrives til disk.
+
+    :param resultat: Resultatet fra process_export.
+    :param antall_arbeidere: Antall prosesser. Med flere enn 1 lages Monday-filene samtidig.
+    :param formater: Formatene Monday-importen lages i, se velg_formater.
+    :return: Dictionary med filnavn -> innhold som bytes: Monday-filene i hvert format,
+             endringsimporten ved inkrementell behandling, og PDF_ZIP_FIL med alle PDF-ene.
+    """
+    nedlastinger = lag_monday_filer(resultat["monday"], antall_arbeidere, formater)
+    if resultat.get("monday_endret") is not None:
+        nedlastinger[ENDRINGSIMPORT_FIL] = lag_fil(ENDRINGSIMPORT_FIL, resultat["monday_endret"], "Data")
+    nedlastinger[PDF_ZIP_FIL] = lag_pdf_zip(resultat["pdfer"])
+    return nedlastinger
+
+
+def send_resultat_til_monday(resultat, klient, board_id, kolonnekart=None):
+    """
+    Sender Monday-importen direkte til et board, se send_til_monday. Ved inkrementell
+    behandling sendes bare nye og endrede ordre.
+
+    :param resultat: Resultatet fra process_export.
+    :param klient: MondayKlient.
+    :param board_id: Boardet.
+    :param kolonnekart: Dictionary med kolonnenavn i importen -> kolonne-ID i Monday. Standard er at
+                        kolonne-ID-ene er de samme som kolonnenavnene, og Item blir navnet på itemet.
+    :return: Oppsummeringen fra send_til_monday.
+    """
+    # requests lastes bare når API-et faktisk brukes
+    from Hjelpeskript.monday_api import send_til_monday
+
+    df = resultat["monday_endret"] if resultat.get("monday_endret") is not None else resultat["monday"]
+    if kolonnekart is None:
+        kolonnekart = {kolonne: kolonne for kolonne in columns if kolonne != "Item"}
+    return send_til_monday(df, klient, board_id, kolonnekart)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lager Monday-import og PDF-er fra en eller flere WoC-eksporter.")
+    parser.add_argument("json_file_paths", nargs="+",
+                        help="JSON-filer eller mapper. Flere eksporter slås sammen uten duplikater.")
+    parser.add_argument("--inkrementell", action="store_true",
+                        help="Behandle bare nye og endrede ordre, og lag også en import med bare disse.")
+    parser.add_argument("--tilstand", default=TILSTAND_FIL, help="SQLite-filen med tidligere behandlede ordre.")
+    parser.add_argument("--uten-ordrecache", action="store_true",
+                        help="Behandle alle ordrene på nytt, uten å bruke eller oppdatere cachen med ferdige rader og PDF-er.")
+    parser.add_argument("--arbeidere", type=int, default=1,
+                        help="Antall prosesser som lager rader, PDF-er og Excel-filer parallelt. "
+                             "0 gir én per CPU. Standard er 1.")
+    parser.add_argument("--format", nargs="+", default=list(STANDARD_FORMATER), choices=list(UTDATAFORMATER),
+                        dest="formater", help="Formatene Monday-importen skrives i. Standard er xlsx.")
+    parser.add_argument("--motor", choices=MOTORER, default=STANDARD_MOTOR,
+                        help="Motoren som lager Monday-radene: radvis eller kolonnevis. Begge gir samme resultat.")
+    parser.add_argument("--monday-board",
+                        help="Send også importen direkte til dette Monday-boardet. Tokenet leses fra MONDAY_API_TOKEN.")
+    parser.add_argument("--monday-url", help="Adressen til API-et, f.eks. Hjelpeskript/monday_lokal_server.py.")
+    parser.add_argument("--monday-kolonner",
+                        help="JSON-fil med kolonnenavn i importen -> kolonne-ID på boardet. Må ha med Ordrenummer.")
+    parser.add_argument("--monday-tilkoblinger", type=int, help="Maks antall samtidige kall mot Monday. Standard er 4.")
+    args = parser.parse_args()
+    try:
+        formater = velg_formater(args.formater)
+    except ValueError as e:
+        parser.error(str(e))
+
+    monday_klient = kolonnekart = None
+    if args.monday_board:
+        from Hjelpeskript.monday_api import (ANTALL_TILKOBLINGER, MONDAY_API_URL, TOKEN_MILJOVARIABEL, MondayKlient,
+                                             les_kolonnekart)
+        token = os.environ.get(TOKEN_MILJOVARIABEL)
+        if not token:
+            parser.error(f"Sett API-tokenet i miljøvariabelen {TOKEN_MILJOVARIABEL} for å bruke --monday-board.")
+        kolonnekart = les_kolonnekart(args.monday_kolonner) if args.monday_kolonner else None
+        monday_klient = MondayKlient(token, args.monday_url or MONDAY_API_URL,
+                                     args.monday_tilkoblinger or ANTALL_TILKOBLINGER)
+
+    json_file_paths = finn_eksportfiler(args.json_file_paths)
+    versjon = referansedata_versjon()
+    ordrecache = None if args.uten_ordrecache else Ordrecache(versjon=versjon)
+
+    antall_arbeidere = antall_arbeidere_eller_standard(args.arbeidere)
+    monday_sendt = None
+    with contextlib.ExitStack() as stack:
+        tilstandslager = stack.enter_context(Tilstandslager(args.tilstand, versjon)) if args.inkrementell else None
+        resultat = process_export(les_eksporter(json_file_paths, antall_arbeidere), tilstandslager=tilstandslager,
+                                  ordrecache=ordrecache, antall_arbeidere=antall_arbeidere, motor=args.motor)
+        skriv_resultat(resultat, antall_arbeidere=antall_arbeidere, formater=formater)
+        if monday_klient is not None:
+            # Tilstanden lagres først når Monday har fått ordrene, så de sendes på nytt hvis dette feiler
+            with monday_klient:
+                monday_sendt = send_resultat_til_monday(resultat, monday_klient, args.monday_board, kolonnekart)
+        if tilstandslager is not None:
+            if monday_sendt is not None and monday_sendt["feilet"]:
+                print("Tilstanden lagres ikke fordi Monday avviste ordre, så alle ordrene sendes igjen neste gang.")
+            else:
+                tilstandslager.lagre()
+
+    # Oppsummering
+    print(f"{len(resultat['monday'])} ordre i Monday-importen, {len(resultat['pdfer'])} PDF-er.")
+    if "monday_endret" in resultat:
+        print(f"{len(resultat['monday_endret'])} nye eller endrede ordre.")
+    if "ordrecache" in resultat:
+        print(f"Ordrecache: {resultat['ordrecache']['treff']} treff, {resultat['ordrecache']['bom']} bom.")
+    if monday_sendt is not None:
+        print(f"Monday: {monday_sendt['opprettet']} opprettet, {monday_sendt['oppdatert']} oppdatert, "
+              f"{len(monday_sendt['feilet'])} avvist, {monday_sendt['uten_ordrenummer']} uten ordrenummer "
+              f"({monday_sendt['kall']} kall, {monday_sendt['begrenset']} begrenset, {monday_sendt['feil']} feil).")
+        for ordrenummer, melding in monday_sendt["feilet"]:
+            print(f"  Ordre {ordrenummer} ble avvist av Monday: {melding}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,95 +1,33 @@
-import json
 import sys
 import os
 import pandas as pd
 from datetime import datetime
 from dateutil.parser import parse
-from Hjelpeskript.add_days_to_date import add_working_days_with_holidays
-from Hjelpeskript.kommune_til_fylke import finn_fylke
-from Hjelpeskript.woc_excel_sortfile import split_excel_by_customer_category
-from Hjelpeskript.fylke_kommune_entreprenor import finn_entreprenor
-
-# Use the uploaded JSON file passed from Streamlit
-if len(sys.argv) > 1:
-    json_file_path = sys.argv[1]
-else:
-    raise FileNotFoundError("No JSON file provided to the script.")
-
-# Define a valid output directory
+from Hjelpeskript.add_days_to_date import add_working_days_batch
+from Hjelpeskript.arbeidsomrade import Arbeidsomrade
+from Hjelpeskript.woc_excel_sortfile import BEDRIFT_FIL, PRIVAT_FIL, del_etter_kundekategori, skriv_arbeidsbok
+from Hjelpeskript.utdataformater import STANDARD_FORMATER, filnavn_for_format, lag_filer, skriv_filer
+from Hjelpeskript.xlsx_strom import Arbeidsbokstrom
+from Hjelpeskript.produktprioritet import velg_hovedprodukt
+from Hjelpeskript.ordreberikelse import berik_ordrer, er_aktuell_ordre, indekser_ressurser
+from Hjelpeskript.ordrepriser import finn_ordrepriser, hent_prisindeks, korriger_fagomrader, skriv_ukjente_fagomrader
+from Hjelpeskript.json_innlesing import i_blokker
+from Hjelpeskript.klassifisering import klassifiser, samle_meldinger, skriv_samlede_meldinger
+from Hjelpeskript.flere_eksporter import finn_eksportfiler, les_eksporter
+from Hjelpeskript.parallell import ARBEIDER_BLOKKSTORRELSE, lag_prosesspool, map_i_rekkefolge
+
+# Standard mappe for Monday-importen når scriptet kjøres fra kommandolinjen
 output_directory = os.path.dirname(os.path.abspath(__file__))
 
-# Ensure the directory exists before saving
-if not os.path.exists(output_directory):
-    os.makedirs(output_directory, exist_ok=True)
-
-# Define the full file path
-target_excel_file = os.path.join(output_directory, "Monday_Import.xlsx")
-
-# Sletter excelfilen om den finnes fra før
-try:
-    os.remove(target_excel_file)
-    print(f"{target_excel_file} er slettet.")
-except FileNotFoundError:
-    print(f"Filen {target_excel_file} finnes ikke.")
-except PermissionError:
-    print(f"Du har ikke tilgang til å slette {target_excel_file}.")
-except Exception as e:
-    print(f"En feil oppstod: {e}")
+# Antall work orders som behandles samlet når eksporten leses som en strøm
+BLOKKSTORRELSE = 500
 
+# Filnavn for Monday-importen med bare nye og endrede ordre
+ENDRINGSIMPORT_FIL = "Monday_Import - Nye og endrede.xlsx"
 
 
 ### DEFINERER FUNKSJONER ###
 
-# Finne Item-navn
-def extract_item(entry):
-    user1_info = entry.get("detailedOrderInformation", {}).get("user1", {})
-    entr_title = entry.get("title")
-
-    if user1_info:
-        return user1_info.get("fullName")
-
-    cp_fullname = entry.get("connectionPoint", {}).get("fullName")
-    cp_id = entry.get("connectionPoint", {}).get("id")
-    detailed_aos = entry.get("detailedAreaOfSubject")
-    if entr_title.strip().endswith("OLT"):
-        return f"{cp_fullname}-{cp_id}-{detailed_aos}-OLT"
-
-    return f"{cp_fullname}-{cp_id}-{detailed_aos}"
-
-# WorkOrderAddress
-def extract_work_order_details(entry):
-
-    work_order_address = entry.get("workOrderAddress", [{}])[0]
-
-    # Henter gateadresse eller matrikkeladresse
-    street_address = work_order_address.get("streetAddress", {})
-    if street_address:
-        municipality = street_address.get("municipalityName")
-        adr_step = f"{street_address.get('streetName', '')} {street_address.get('houseNumber', '')}"
-        house_char = street_address.get('houseChar', '')
-        if house_char:
-            adr_step += house_char
-        adresse = f"{adr_step}, {street_address.get('city')}, Norge"
-        post_nummer = street_address.get('postalCode')
-    else:
-        cadastral_unit = work_order_address.get('cadastralUnit', {})
-        municipality = cadastral_unit.get('municipalityName')
-        cadastral_unit_number = cadastral_unit.get('cadastralUnitNumber')
-        property_unit_number = cadastral_unit.get('propertyUnitNumber')
-        adresse = f"Gnr. {cadastral_unit_number} Bnr. {property_unit_number}"
-        post_nummer = cadastral_unit.get('postalCode')
-
-    # Hent fylke basert på kommunenavn
-    fylke = finn_fylke(municipality)
-
-    # Hent koordinater
-    coordinates = work_order_address.get("coordinates", {})
-    coordsys = coordinates.get("system")
-    x_koordinat = coordinates.get("x")
-    y_koordinat = coordinates.get("y")
-
-    return adresse, post_nummer, municipality, fylke, coordsys, x_koordinat, y_koordinat
-
 # Kundenavn og kontaktinfo
 def extract_contact_info(entry):
     """
@@ -116,77 +54,21 @@ def extract_contact_info(entry):
 
     return kunde_navn, telefon_nr
 
-# Sambandsnummer
-def extract_service_details(entry, item):
-    """
-    Ekstraherer sambandsnummer og tilgjengelige ressurser fra detailedOrderInformation.
-
-    :param entry: Dictionary som inneholder ordredata.
-    :param item: Valgfritt navn eller ID for logging hvis ingen sambandsnummer finnes.
-    :return: Tuple med (sambandsnummer, available_resources).
-    """
-    service_details = entry.get("detailedOrderInformation", {}).get("serviceDetails", [])
-    sambandsnummer = None
-    available_resources = []  # Liste for å logge ressurstyper
-
-    if isinstance(service_details, list):
-        # PRIORITET 1: Finn første CircuitId
-        circuit_ids = [
-            d.get("resourceId", "").strip()
-            for d in service_details
-            if d.get("resourceType", "").strip().lower() == "circuitid"
-               and d.get("resourceId")
-        ]
-        if circuit_ids:
-            sambandsnummer = circuit_ids[0]
-        else:
-            # PRIORITET 2: Finn første CustomerId
-            customer_ids = [
-                d.get("resourceId", "").strip()
-                for d in service_details
-                if d.get("resourceType", "").strip().lower() == "customerid"
-                   and d.get("resourceId")
-            ]
-            if customer_ids:
-                sambandsnummer = customer_ids[0]
-
-        # Samle andre ressurstyper i available_resources
-        available_resources = [
-            f"{d.get('resourceType', '').strip()}: {d.get('resourceId', '').strip()}"
-            for d in service_details
-            if d.get("resourceType", "").strip().lower() not in ["circuitid", "customerid"]
-        ]
-
-        # Legg til DG i available_resources istedenfor å bruke det som sambandsnummer
-        dg_resources = [
-            f"DG: {d.get('resourceId', '').strip()}"
-            for d in service_details
-            if d.get("resourceType", "").strip().lower() == "dg"
-               and d.get("resourceId")
-        ]
-        available_resources.extend(dg_resources)  # Legg til DG i listen
-
-    # Logging hvis ingen sambandsnummer er funnet
-    if not sambandsnummer:
-        print(f"\nIngen sambandsnummer funnet for: {item}")
-        print("Tilgjengelige nummer:", available_resources)
-
-    return sambandsnummer, available_resources
-
 # LU-Nummer
-def extract_lu_number(entry):
+def extract_lu_number(entry, ressurser=None):
     """
     Ekstraherer LU-nummer fra serviceDetails i detailedOrderInformation.
 
     :param entry: Dictionary som inneholder ordredata.
+    :param ressurser: Ferdig oppslag fra indekser_ressurser. Lages hvis det ikke er gitt.
     :return: LU-nummer (str) eller None hvis ingen finnes.
     """
-    service_details = entry.get("detailedOrderInformation", {}).get("serviceDetails", [])
+    if ressurser is None:
+        ressurser = indekser_ressurser(entry)
 
-    if isinstance(service_details, list):
-        for detail in service_details:
-            if detail.get("resourceType") == "LU":
-                return detail.get("resourceId", "").strip()  # Returnerer første LU som dukker opp
+    for detail in ressurser["typer"].get("lu", ()):
+        if detail.get("resourceType") == "LU":
+            return detail.get("resourceId", "").strip()  # Returnerer første LU som dukker opp
 
     return None  # Returnerer None hvis ingen LU-nummer finnes
 
@@ -206,113 +88,22 @@ def extract_spidernumber(entry):
 
     return None  # Returnerer None hvis ingen Spidernummer finnes
 
-# Finn alle produkt-ID
-def extract_product_ids(entry):
-    """
-    Ekstraherer alle Produkt-IDer fra orderlines.
-
-    :param entry: Dictionary som inneholder ordredata.
-    :return: Liste med Produkt-IDer (list) eller tom liste hvis ingen finnes.
-    """
-    orderlines_list = entry.get("orderlines", [{}])
-    orderlines_productId = []
-
-    if isinstance(orderlines_list, list):
-        for line in orderlines_list:
-            cp_id = line.get("contractorProductId")
-            if cp_id:  # Sjekk at verdien ikke er None eller tom
-                orderlines_productId.append(cp_id)
-
-    return orderlines_productId
-
 # Finne produktkode med høyest prioritet
 def get_highest_priority_product(product_codes, woc_type_oppdrag):
-    try:
-        # Les inn Excel-filen
-        df = pd.read_excel("Datafiler/WOC_Prioritering_Produktkategorier.xlsx", engine="openpyxl")
-
-        # Filtrer etter de spesifikke produktkodene
-        df_filtered = df[df['Produktkode'].isin(product_codes)]
-
-        # Finn raden med høyest prioritet (lavest tall i "Prioritering")
-        highest_priority_row = df_filtered.loc[df_filtered['Prioritering'].idxmin()]
-
-        return highest_priority_row['Produktkode'] + ": " + highest_priority_row['Produkt']
-    except Exception as e:
-        print(f"Produkt ikke i liste: {e}")
-        if woc_type_oppdrag:
-            return woc_type_oppdrag[0]
-        else:
-            return product_codes[0]
-
-# Type oppdrag fra WOC
-def extract_woc_type_oppdrag(entry):
-    """
-    Ekstraherer type oppdrag fra WOC basert på orderlines.
-
-    :param entry: Dictionary som inneholder ordredata.
-    :return: Liste med type oppdrag (list) eller tom liste hvis ingen finnes.
-    """
-    orderlines_list = entry.get("orderlines", [])
-    woc_type_oppdrag = []
-
-    if isinstance(orderlines_list, list):
-        for line in orderlines_list:
-            typop_id = line.get("description")
-            if typop_id and line.get("isMainProduct") is True:
-                woc_type_oppdrag.append(typop_id)
-
-    return woc_type_oppdrag
-
-# Type oppdrag til Monday
-def determine_type_oppdrag(orderinfo_description, VULA_nr, prioritert_product_id):
-    """
-    Bestemmer type oppdrag basert på ordrebeskrivelse, leveransestatus, WOC-type oppdrag og VULA-referanser.
-
-    :param orderinfo_description: Ordrebeskrivelse (str).
-    :param VULA_nr: VULA-referansenummer (str eller list).
-    :return: Type oppdrag (str) eller None hvis ingen kriterier er oppfylt.
-    """
-    if orderinfo_description == "BB_ACCESS":
-        return "BB-Access"
-    elif "LVA1A" in prioritert_product_id: #status_leveranse == "NY FTTH" or
-        return "Komplett fortetning"
-    elif "LVK0" in prioritert_product_id:
-        return "Eksperthjelpen"
-    elif "LVK2F" in prioritert_product_id:
-        return "Installasjonshjelpen"
-    elif VULA_nr == "VULA":
-        return "VULA"
-    elif VULA_nr == "VULA CDK":
-        return "VULA CDK"
-    elif "LVT2D" in prioritert_product_id:
-        return "AEG"
-    elif "LVT1C" in prioritert_product_id:
-        return "Leveranse timer - Fiber"
-    elif "DLS99" in prioritert_product_id:
-        return "DLS99"
-
-
-    return None
+    return velg_hovedprodukt(product_codes, woc_type_oppdrag)
 
 # Beskrivelse av produktet
-def extract_product_descriptions(entry):
+def extract_product_descriptions(entry, ressurser=None):
     """
     Ekstraherer produktbeskrivelser fra serviceDetails i detailedOrderInformation.
 
     :param entry: Dictionary som inneholder ordredata.
+    :param ressurser: Ferdig oppslag fra indekser_ressurser. Lages hvis det ikke er gitt.
     :return: Liste med produktbeskrivelser (list) eller tom liste hvis ingen finnes.
     """
-    service_details = entry.get("detailedOrderInformation", {}).get("serviceDetails", [])
-    product_description = []
-
-    if isinstance(service_details, list):
-        for line in service_details:
-            prod_dscr = line.get("productDescription")
-            if prod_dscr:  # Sikrer at None-verdier ikke legges til
-                product_description.append(prod_dscr)
-
-    return product_description
+    if ressurser is None:
+        ressurser = indekser_ressurser(entry)
+    return list(ressurser["beskrivelser"])
 
 # VULA
 def extract_vula_numbers(entry, item):
@@ -339,151 +130,23 @@ def extract_vula_numbers(entry, item):
 
     return VULA_nr
 
-# BEDRIFT eller PRIVAT
-def determine_oppdrag_kategori(customer_category, contract_details):
-    """
-    Bestemmer oppdragkategori basert på kunde- og kontraktsdetaljer.
-
-    :param customer_category: Kundekategori (str) or None.
-    :param contract_details: Kontraktsdetaljer (str) or None.
-    :return: Oppdragkategori (str) - 'bedrift', 'privat' eller 'denne må sjekkes'.
-    """
-    # Ensure values are strings to avoid AttributeError
-    customer_category = (customer_category or "").lower().strip()
-    contract_details = (contract_details or "").lower().strip()
-
-    if any(keyword in customer_category for keyword in ["bedrift", "fttb"]) or any(keyword in contract_details for keyword in ["bedrift", "fttb"]):
-        return "bedrift"
-    elif "privat" in customer_category or "ftth" in contract_details:
-        return "privat"
-    else:
-        print("Sjekk om denne er bedrift eller privat")
-        return "denne må sjekkes"
-
-
-# Status Leveranse
-def determine_status_leveranse(orderlines_productId, orderinfo_description, contract_details, gpon_p2p_woc, VULA_nr, oppdrag_kategori, item):
-    if oppdrag_kategori == "bedrift":
-        if "U0009A" in orderlines_productId:
-            return ""
-        elif "LVLU" in orderlines_productId:
-            return "Booket"
-        elif VULA_nr:
-            return "NY wholesale"
-        elif orderinfo_description == "BB_ACCESS":
-            return "NY FWA"
-        elif contract_details == "FTTB" or gpon_p2p_woc == "HELIOS":
-            return "NY bedrift"
-        else:
-            print(f"{item} - Bedriftsoppdrag leveransekode må sjekkes")
-            return None
-    elif oppdrag_kategori == "privat":
-        if any(product_id in orderlines_productId for product_id in ["LVA1A", "LVA1B", "LVA1D", "LVA2F"]):
-            return "NY FTTH"
-        elif VULA_nr:
-            return "NY wholesale"
-        elif orderinfo_description == "BB_ACCESS":
-            return "NY FWA"
-        else : #contract_details == "AEG":
-            return "NY privat"
-
-    else:
-        print(f"{item} - Oppdrag kategori må sjekkes")
-        return None
-
-
-# Type FTTx til monday
-def determine_fttx(orderlines_productId, prioritert_product_id, contract_details, gpon_p2p_woc, orderinfo_description, status_leveranse, oppdrag_kategori, item):
-
-
-    if oppdrag_kategori == "bedrift":
-        if "U0009A" in orderlines_productId:
-            return "FTTB Planunderlag"
-        elif "LVLU" in orderlines_productId:
-            return "FTTB Offnet"
-        elif contract_details == "FTTB" or gpon_p2p_woc == "HELIOS" or orderinfo_description == "BB_ACCESS":
-            return "FTTB Onnet"
-        elif "DLS99" in prioritert_product_id:
-            return "FTTB Onnet"
-        else:
-            print(f"{item}: Mangler FTTx")
-            return None
-
-    service_keywords = {"aeg", "eksperthjelpen", "installasjonshjelpen"}
-    if oppdrag_kategori == "privat":
-        if status_leveranse == "NY wholesale":
-            return "Wholesale"
-        elif any(keyword in prioritert_product_id.lower() for keyword in service_keywords):
-            return "FTTH Service"
-        elif status_leveranse == "NY FTTH":
-            return "FTTH Fortetning"
-        else:
-            print(f"{item}: Mangler FTTx")
-            return "FTTH Fortetning" #None
-
-
-    print(f"{item}: Mangler FTTx")
-    return None
-
-
 def hent_ordrepris(fagomrade: str, prioritert_product_id) -> str:
     """
     Tar inn et fagområde og returnerer enhetsprisen fra Excel-filen.
     Hvis fagområdet ikke finnes, returneres en feilmelding.
     """
-
-    # Filbane
-    file_path = "Datafiler/Ordrepriser WOC.xlsx"
-
-    # Lese inn data fra Excel
-    df = pd.read_excel(file_path, sheet_name="Ark1")
-
     # Korrigerer FTTH Service
-    if fagomrade == "FTTH Service":
-        if "aeg" in prioritert_product_id.lower():
-            fagomrade = "AEG"
-        elif "installasjonshjelpen" in prioritert_product_id.lower() or "eksperthjelpen" in prioritert_product_id.lower():
-            fagomrade = "FTTH Ekspert-/Installasjonshjelpen"
-
+    fagomrade = korriger_fagomrader(pd.Series([fagomrade], dtype=object),
+                                    pd.Series([prioritert_product_id], dtype=object))[0]
 
-    # Sjekk om fagområdet finnes i DataFrame
-    rad = df[df["Fagområde"] == fagomrade]
-
-
-    if not rad.empty:
-        return rad['Enhetspris'].values[0]
+    prisindeks = hent_prisindeks()
+    if fagomrade in prisindeks:
+        return prisindeks[fagomrade]
     else:
         return f"'{fagomrade}' ble ikke funnet i Ordrepriser WOC.xlsx."
 
 
 
-# GPON/P2P
-def determine_gpon_p2p(status_leveranse, VULA_nr, gpon_p2p_woc):
-    """
-    Bestemmer GPON/P2P-type basert på leveransestatus, VULA-referanser og WOC-type.
-
-    :param status_leveranse: Status for leveranse (str).
-    :param VULA_nr: VULA-referansenummer (str eller list).
-    :param gpon_p2p_woc: WOC-type (str).
-    :return: GPON/P2P-type (str) eller None hvis ingen kriterier er oppfylt.
-    """
-    if status_leveranse == "NY FWA":
-        return "Antenne"
-    elif status_leveranse == "NY FTTH":
-        return "FTTH"
-    elif VULA_nr or gpon_p2p_woc == "GPON":
-        return "GPON"
-    elif gpon_p2p_woc == "LEIDE SAMBAND":
-        return "P2P"
-    elif status_leveranse == "NY privat":
-        return "AEG"
-    elif gpon_p2p_woc == "NORDIC CONNECT":
-        return "Ruterbytte"
-
-    return None
-
-
-
 # Funksjon for å formatere datoer til yyyy-mm-dd
 def format_date(date_str):
     if date_str:
@@ -511,30 +174,42 @@ def get_latest_accept_workorder_date(entries):
     return latest_date.strftime("%Y-%m-%d") if latest_date else None
 
 
-def extract_data_from_json(json_data):
-    extracted_data = []
+def lag_monday_rader(ordrer):
+    """
+    Lager Monday-radene for ordrer fra den felles berikelsen.
+
+    Ordreverdi fylles ikke inn her, men for alle radene samlet med fyll_inn_ordrepriser. Ordrene som
+    må sjekkes, skrives heller ikke ut her, men samlet med samle_meldinger_for_rader.
 
-    for entry in json_data:
-        # Hopp over rader hvor supplier.contactPersons ikke er tom
-        if entry.get("supplier", {}).get("contactPersons"):
-            continue
-        elif not entry.get("wocOrderStatus", {}).lower() in ['accepted', 'received', 'appointed']:
-            continue
+    :param ordrer: Liste med berikede ordrer fra berik_ordrer.
+    :return: Liste med rader, én per ordre, med kolonnene i `columns`.
+    """
+    extracted_data = []
 
+    # Bookes innen (4 arbeidsdager etter issued date) for alle ordrene i én omgang
+    alle_bookes_innen = add_working_days_batch([ordre["entry"].get("issuedDate") for ordre in ordrer], 4)
 
-        # Finne Item-navn
-        item = extract_item(entry)
+    for ordre, bookes_innen in zip(ordrer, alle_bookes_innen):
+        entry = ordre["entry"]
 
-        # Håndterer WorkOrderAddress som liste
-        addresse, post_nummer, municipality, fylke, coordsys, x_koordinat, y_koordinat = extract_work_order_details(entry)
+        # Item-navn, adresse, fylke, entreprenør, ressurser og produkter fra berikelsen
+        item = ordre["item"]
+        addresse = ordre["adresse"]
+        municipality = ordre["kommune"]
+        fylke = ordre["fylke"]
+        coordsys = ordre["coordsys"]
+        x_koordinat = ordre["x_koordinat"]
+        y_koordinat = ordre["y_koordinat"]
         fylke_status = fylke #for å lage en statuskolonne i Monday, kun for importboardet og automation
+        orderlines_productId = ordre["product_ids"]
+        woc_type_oppdrag = ordre["woc_type_oppdrag"]
+        prioritert_product_id = ordre["hovedprodukt"]
 
         # Kundenavn og kontaktinfo
         kunde_navn, telefon_nr = extract_contact_info(entry)
 
         # Datoer
         issued_date = entry.get("issuedDate").split("T")[0]
-        bookes_innen = add_working_days_with_holidays(issued_date, 4)
         start_arbeid_tidligst = format_date(entry.get("deliveryPeriod", {}).get("startDate"))
         ordre_dato = get_latest_accept_workorder_date(entry.get("activityLog"))
         if not ordre_dato:
@@ -548,27 +223,18 @@ def extract_data_from_json(json_data):
         ordrenr_leveranse = entry.get("clientOrderId", {}).get("referenceNumber")
 
         # Sambandsnummer - Håndterer serviceDetails
-        sambandsnummer, available_resources = extract_service_details(entry, item)
+        sambandsnummer = ordre["sambandsnummer"]
 
         # LU-nummer
-        LU_nummer = extract_lu_number(entry)
+        LU_nummer = extract_lu_number(entry, ordre["ressurser"])
 
         # Spidernummer
         spidernummer = extract_spidernumber(entry)
 
-        # Type oppdrag fra WOC
-        woc_type_oppdrag = extract_woc_type_oppdrag(entry)
-
-        # Legger til Produkt-ID
-        orderlines_productId = extract_product_ids(entry)
-
-        # Finner Produkt-ID med høyeste prioritet
-        prioritert_product_id = get_highest_priority_product(orderlines_productId, woc_type_oppdrag)
-
         orderinfo_description = entry.get("detailedOrderInformation", {}).get("orderDescription")
 
         # Beskrivelse av produktet
-        product_description = extract_product_descriptions(entry)
+        product_description = extract_product_descriptions(entry, ordre["ressurser"])
 
         # VULA
         VULA_nr = extract_vula_numbers(entry, item)
@@ -580,29 +246,18 @@ def extract_data_from_json(json_data):
         customer_category = entry.get("detailedOrderInformation", {}).get("customerCategory")
 
 
-        # Oppdragkategori, BEDRIFT eller PRIVAT
-        oppdrag_kategori = determine_oppdrag_kategori(customer_category, contract_details)
-
-        # Status Leveranse
         gpon_p2p_woc = entry.get("areaOfSubject")
         gpon_from_detailed = entry.get("detailedAreaOfSubject")
-        status_leveranse = determine_status_leveranse(orderlines_productId, orderinfo_description,
-                                                      contract_details, gpon_p2p_woc, VULA_nr, oppdrag_kategori, item)
-
-        # Type oppdrag til Monday
-        type_oppdrag = determine_type_oppdrag(orderinfo_description, VULA_nr, prioritert_product_id)
 
-        # Type FTTx til Monday
-        FTTx = determine_fttx(orderlines_productId, prioritert_product_id, contract_details, gpon_p2p_woc, orderinfo_description, status_leveranse, oppdrag_kategori, item)
+        # Kunde Kategori, Status Leveranse, Type oppdrag, Type FTTx og GPON/P2P klassifiseres for
+        # alle ordrene samlet etter løkken
+        oppdrag_kategori = status_leveranse = type_oppdrag = FTTx = gpon_p2p = None
 
-        #Ordrepris
-        ordre_pris = hent_ordrepris(FTTx, prioritert_product_id)
+        #Ordrepris, fylles inn for alle ordrene etter løkken
+        ordre_pris = None
 
-        ### GPON/P2P til Monday
-        gpon_p2p = determine_gpon_p2p(status_leveranse, VULA_nr, gpon_p2p_woc)
-
-        # Legge til underentreprenør
-        under_entreprenor = finn_entreprenor(post_nummer)
+        # Underentreprenør
+        under_entreprenor = ordre["entreprenor"]
 
         # Statuser
         woc_status = None
@@ -657,9 +312,139 @@ def extract_data_from_json(json_data):
             customer_category
         ])
 
+    klassifiser_rader(extracted_data)
     return extracted_data
 
 
+def klassifiser_rader(rows):
+    """
+    Fyller inn Kunde Kategori, Status Leveranse, Type oppdrag, Type FTTx og GPON/P2P for alle radene
+    med klassifiseringsreglene.
+
+    :param rows: Liste med rader med kolonnene i `columns`. Endres på stedet.
+    """
+    if not rows:
+        return
+    kolonner = {kolonne: [row[indeks] for row in rows] for indeks, kolonne in enumerate(columns)}
+    verdier, _ = klassifiser(kolonner)
+    for kolonne, kolonneverdier in verdier.items():
+        indeks = columns.index(kolonne)
+        for row, verdi in zip(rows, kolonneverdier):
+            row[indeks] = verdi
+
+
+def samle_meldinger_for_rader(rows, meldinger):
+    """
+    Finner ordrene som må sjekkes blant ferdige rader, og legger dem til i meldinger.
+
+    Regelnavnene regnes ut på nytt fra radene, som har alle feltene klassifiseringsreglene bruker.
+    Slik kommer meldingene med også for rader fra ordrecachen eller fra en arbeidsprosess, og kan
+    skrives ut én gang for hele eksporten med skriv_samlede_meldinger.
+
+    :param rows: Liste med rader med kolonnene i `columns`.
+    :param meldinger: Dictionary fra samle_meldinger. Endres på stedet.
+    :return: meldinger.
+    """
+    if rows:
+        kolonner = {kolonne: [row[indeks] for row in rows] for indeks, kolonne in enumerate(columns)}
+        samle_meldinger(klassifiser(kolonner)[1], kolonner["Item"], meldinger)
+    return meldinger
+
+
+def extract_data_from_block(json_data):
+    """
+    Henter ut Monday-radene for én blokk med work orders.
+
+    :param json_data: Liste med work orders, f.eks. en blokk fra les_work_orders.
+    :return: Liste med rader, én per aktuell ordre, uten Ordreverdi.
+    """
+    return lag_monday_rader(berik_ordrer(json_data))
+
+
+def fyll_inn_ordrepriser(extracted_data, ukjente=None):
+    """
+    Fyller inn Ordreverdi for alle radene i én omgang.
+
+    :param extracted_data: Rader fra extract_data_from_block. Endres på stedet.
+    :param ukjente: Dictionary som samler fagområder som mangler i pristabellen, se finn_ordrepriser.
+                    Standard er å skrive dem ut med en gang.
+    """
+    fttx_kolonne = columns.index("Type FTTx")
+    hovedprodukt_kolonne = columns.index("Hovedprodukt")
+    ordrepris_kolonne = columns.index("Ordreverdi")
+    ordrepriser = finn_ordrepriser([rad[fttx_kolonne] for rad in extracted_data],
+                                   [rad[hovedprodukt_kolonne] for rad in extracted_data], ukjente)
+    for rad, ordre_pris in zip(extracted_data, ordrepriser):
+        rad[ordrepris_kolonne] = ordre_pris
+
+
+def monday_blokker(json_data, antall_arbeidere=1):
+    """
+    Henter ut Monday-radene blokk for blokk, uten Ordreverdi.
+
+    Med flere arbeidere deles de aktuelle ordrene i blokker som behandles i en prosesspool.
+    Blokkene kommer i samme rekkefølge, og blir de samme, som ved seriell behandling.
+
+    :param json_data: Iterable med work orders, f.eks. les_work_orders(json_file_path).
+    :param antall_arbeidere: Antall prosesser. 1 behandler alt i denne prosessen.
+    :return: Generator med lister av rader, med kolonnene i `columns`.
+    """
+    if antall_arbeidere > 1:
+        # Bare aktuelle ordre sendes til arbeidsprosessene
+        aktuelle = (entry for entry in json_data if er_aktuell_ordre(entry))
+        with lag_prosesspool(antall_arbeidere) as pool:
+            oppgaver = ((None, blokk) for blokk in i_blokker(aktuelle, ARBEIDER_BLOKKSTORRELSE))
+            for _, rader in map_i_rekkefolge(pool, extract_data_from_block, oppgaver, antall_arbeidere):
+                yield rader
+    else:
+        for blokk in i_blokker(json_data, BLOKKSTORRELSE):
+            yield extract_data_from_block(blokk)
+
+
+def extract_data_from_json(json_data, antall_arbeidere=1):
+    """
+    Henter ut Monday-radene for hele WoC-eksporten.
+
+    Ordrene behandles i blokker, så eksporten kan leses som en strøm uten å ligge i minnet.
+    Ordreverdi fylles inn for alle radene til slutt.
+
+    :param json_data: Iterable med work orders, f.eks. les_work_orders(json_file_path).
+    :param antall_arbeidere: Antall prosesser, se monday_blokker.
+    :return: Liste med rader, én per aktuell ordre, med kolonnene i `columns`.
+    """
+    extracted_data = []
+    meldinger = {}
+    for rader in monday_blokker(json_data, antall_arbeidere):
+        samle_meldinger_for_rader(rader, meldinger)
+        extracted_data.extend(rader)
+    skriv_samlede_meldinger(meldinger)
+    fyll_inn_ordrepriser(extracted_data)
+    return extracted_data
+
+
+def strom_monday_rader(json_data, antall_arbeidere=1):
+    """
+    Henter ut Monday-radene som en strøm, med Ordreverdi fylt inn for hver blokk.
+
+    Radene blir de samme som fra extract_data_from_json, men bare én blokk ligger i minnet om gangen.
+    Ordrene som må sjekkes og fagområdene som mangler i pristabellen, samles for alle blokkene og
+    skrives ut én gang når alle radene er lest.
+
+    :param json_data: Iterable med work orders, f.eks. les_work_orders(json_file_path).
+    :param antall_arbeidere: Antall prosesser, se monday_blokker.
+    :return: Generator med rader, én per aktuell ordre, med kolonnene i `columns`.
+    """
+    meldinger = {}
+    ukjente = {}
+    for rader in monday_blokker(json_data, antall_arbeidere):
+        if rader:
+            samle_meldinger_for_rader(rader, meldinger)
+            fyll_inn_ordrepriser(rader, ukjente)
+        yield from rader
+    skriv_samlede_meldinger(meldinger)
+    skriv_ukjente_fagomrader(ukjente)
+
+
 columns = [
     "Item",
     "Adresse",
@@ -705,16 +490,147 @@ columns = [
     "Customer Category"
 ]
 
-with open(json_file_path, "r", encoding="utf-8") as file:
-    json_data = json.load(file)
+def lag_monday_import(json_data, antall_arbeidere=1):
+    """
+    Lager Monday-importen fra WoC-eksporten.
+
+    :param json_data: Iterable med work orders fra WoC-eksporten.
+    :param antall_arbeidere: Antall prosesser, se extract_data_from_json.
+    :return: DataFrame med én rad per aktuell ordre og kolonnene i `columns`.
+    """
+    rows = extract_data_from_json(json_data, antall_arbeidere)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def slett_monday_import(target_excel_file):
+    """
+    Sletter en gammel Monday_Import.xlsx før en ny skrives, og forteller hvordan det gikk.
+
+    :param target_excel_file: Filsti til Monday_Import.xlsx.
+    """
+    try:
+        os.remove(target_excel_file)
+        print(f"{target_excel_file} er slettet.")
+    except FileNotFoundError:
+        print(f"Filen {target_excel_file} finnes ikke.")
+    except PermissionError:
+        print(f"Du har ikke tilgang til å slette {target_excel_file}.")
+    except Exception as e:
+        print(f"En feil oppstod: {e}")
+
+
+def monday_filer(df, formater=STANDARD_FORMATER):
+    """
+    Splitter Monday-importen i P og B og lister filene som skal lages i hvert format.
+
+    For xlsx blir filene Monday_Import.xlsx, Monday_Import - P.xlsx og Monday_Import - B.xlsx,
+    og de andre formatene får samme navn med sin egen filendelse.
+
+    :param df: DataFrame fra lag_monday_import.
+    :param formater: Formatene som skal lages, se velg_formater.
+    :return: Liste med (filnavn, DataFrame, arknavn).
+    """
+    df_priv, df_bedrift = del_etter_kundekategori(df)
+    deler = [("Monday_Import.xlsx", df, "Data"), (PRIVAT_FIL, df_priv, "Sheet1"), (BEDRIFT_FIL, df_bedrift, "Sheet1")]
+    return [(filnavn_for_format(filnavn, format_), del_df, ark)
+            for format_ in formater for filnavn, del_df, ark in deler]
+
+
+def skriv_monday_import(df, output_directory=output_directory, antall_arbeidere=1, formater=STANDARD_FORMATER):
+    """
+    Skriver Monday-importen og P- og B-delene i samme mappe, i hvert av formatene.
+
+    Splittingen i P og B gjøres én gang på DataFrame-en i minnet, og alle filene skrives fra den.
+
+    :param df: DataFrame fra lag_monday_import.
+    :param output_directory: Mappen filene skal skrives til.
+    :param antall_arbeidere: Antall prosesser. Med flere enn 1 skrives filene samtidig.
+    :param formater: Formatene som skal skrives, se monday_filer.
+    :return: Liste med filstiene som ble skrevet.
+    """
+    # Ensure the directory exists before saving
+    os.makedirs(output_directory, exist_ok=True)
+
+    # Sletter excelfilen om den finnes fra før
+    if "xlsx" in formater:
+        slett_monday_import(os.path.join(output_directory, "Monday_Import.xlsx"))
+
+    return skriv_filer([(os.path.join(output_directory, filnavn), del_df, ark)
+                        for filnavn, del_df, ark in monday_filer(df, formater)], antall_arbeidere)
 
-rows = extract_data_from_json(json_data)
 
+def lag_monday_filer(df, antall_arbeidere=1, formater=STANDARD_FORMATER):
+    """
+    Lager de samme filene som skriv_monday_import, men i minnet.
+
+    :param df: DataFrame fra lag_monday_import.
+    :param antall_arbeidere: Antall prosesser. Med flere enn 1 lages filene samtidig.
+    :param formater: Formatene som skal lages, se monday_filer.
+    :return: Dictionary med filnavn -> innhold som bytes.
+    """
+    return lag_filer(monday_filer(df, formater), antall_arbeidere)
+
+
+def strom_monday_import(rows, output_directory=output_directory):
+    """
+    Skriver Monday_Import.xlsx og P- og B-filene mens radene lages, uten DataFrame.
+
+    Hver rad skrives til Monday_Import.xlsx og til P- eller B-filen etter Kunde Kategori, så
+    verken radene eller arbeidsbøkene ligger i minnet. Filene blir de samme som fra skriv_monday_import.
+    Filer som finnes fra før, overskrives. Skriv til et Arbeidsomrade for å erstatte dem atomisk.
+
+    :param rows: Iterable med rader, f.eks. strom_monday_rader(json_data).
+    :param output_directory: Mappen filene skal skrives til.
+    :return: Tuple med (filsti til Monday_Import.xlsx, antall rader).
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    target_excel_file = os.path.join(output_directory, "Monday_Import.xlsx")
+
+    kategori_kolonne = columns.index("Kunde Kategori")
+    with Arbeidsbokstrom(target_excel_file, columns, "Data") as alle, \
+            Arbeidsbokstrom(os.path.join(output_directory, PRIVAT_FIL), columns, "Sheet1") as privat, \
+            Arbeidsbokstrom(os.path.join(output_directory, BEDRIFT_FIL), columns, "Sheet1") as bedrift:
+        etter_kategori = {"privat": privat, "bedrift": bedrift}
+        for row in rows:
+            alle.skriv(row)
+            kategori = etter_kategori.get(row[kategori_kolonne])
+            if kategori is not None:
+                kategori.skriv(row)
+    return target_excel_file, alle.antall_rader
+
+
+def skriv_endringsimport(df, output_directory=output_directory):
+    """
+    Skriver Monday-importen med bare nye og endrede ordre, ved inkrementell behandling.
+
+    :param df: DataFrame med nye og endrede ordre, eller None for å slette en gammel fil.
+    :param output_directory: Mappen filen skal skrives til.
+    :return: Filsti til filen, eller None hvis det ikke ble skrevet noen fil.
+    """
+    target_excel_file = os.path.join(output_directory, ENDRINGSIMPORT_FIL)
+    if df is None:
+        # Fjern filen fra en tidligere inkrementell kjøring, så den ikke forveksles med denne
+        if os.path.exists(target_excel_file):
+            os.remove(target_excel_file)
+        return None
+
+    os.makedirs(output_directory, exist_ok=True)
+    return skriv_arbeidsbok(target_excel_file, df, "Data")
+
+
+def main():
+    # Én eller flere JSON-filer eller mapper. Flere eksporter slås sammen uten duplikater.
+    if len(sys.argv) > 1:
+        json_file_paths = finn_eksportfiler(sys.argv[1:])
+    else:
+        raise FileNotFoundError("No JSON file provided to the script.")
 
+    # Radene skrives til Excel-filene mens de lages, så store eksporter ikke må ligge i minnet.
+    # Filene publiseres samlet når alt er skrevet, så en kjøring som feiler ikke etterlater halve filer.
+    with Arbeidsomrade(output_directory) as arbeidsomrade:
+        strom_monday_import(strom_monday_rader(les_eksporter(json_file_paths)), arbeidsomrade.sti)
+        arbeidsomrade.publiser()
 
-# Save the Excel file safely
-df = pd.DataFrame(rows, columns=columns)
-with pd.ExcelWriter(target_excel_file, engine="openpyxl", mode="w") as writer:
-    df.to_excel(writer, index=False, sheet_name="Data")
 
-split_excel_by_customer_category(target_excel_file)
+if __name__ == "__main__":
+    main()